@@ -0,0 +1,109 @@
+"""
+Google Vision un Translation API klientu aizstājēji veiktspējas mērījumiem: deterministiski
+atslēgvārdi, konfigurējama aizture un kļūdu injekcija, bez tīkla un akreditācijas datiem.
+"""
+import time
+import random
+import hashlib
+import threading
+import types
+
+from project.analysis import providers
+
+# Angļu atslēgvārdi un to tulkojumi; sintētiskie ALT teksti (skat. benchmarks.site) lieto latviskos
+LABEL_TRANSLATIONS = {
+    'dog': 'suns', 'cat': 'kaķis', 'bird': 'putns', 'horse': 'zirgs', 'sky': 'debesis',
+    'cloud': 'mākonis', 'tree': 'koks', 'grass': 'zāle', 'flower': 'zieds', 'water': 'ūdens',
+    'sea': 'jūra', 'beach': 'pludmale', 'mountain': 'kalns', 'road': 'ceļš', 'car': 'automašīna',
+    'bicycle': 'velosipēds', 'building': 'ēka', 'house': 'māja', 'window': 'logs', 'street': 'iela',
+    'city': 'pilsēta', 'person': 'cilvēks', 'child': 'bērns', 'woman': 'sieviete', 'man': 'vīrietis',
+    'food': 'ēdiens', 'table': 'galds', 'book': 'grāmata', 'sunset': 'saulriets', 'night': 'nakts',
+}
+LABELS = tuple(LABEL_TRANSLATIONS)
+
+
+class FaultInjector:
+    """Kopīga aizture un nejaušas kļūdas (ar fiksētu sēklu atkārtojamībai) vienam API."""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def __call__(self, name):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            failed = self.error_rate and self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if delay:
+            time.sleep(delay)
+        if failed:
+            raise providers.google_exceptions.ServiceUnavailable(f"{name}: injicēta kļūda")
+
+    def stats(self):
+        return {'calls': self.calls, 'errors': self.errors}
+
+
+def labels_for(key, count=4):
+    """Deterministiski (atslēgvārds, ticamība) pāri attēlam pēc tā URL vai satura."""
+    digest = hashlib.sha256(key).digest()
+    return [(LABELS[digest[i] % len(LABELS)], 0.5 + digest[i + count] / 510) for i in range(count)]
+
+
+class FakeImageAnnotatorClient:
+    """vision.ImageAnnotatorClient aizstājējs: batch_annotate_images ar google-cloud-vision tipiem."""
+
+    def __init__(self, faults, image_error_rate=0.0, seed=0):
+        self.faults = faults
+        self.image_error_rate = image_error_rate
+        self._random = random.Random(seed)
+
+    def batch_annotate_images(self, requests, timeout=None, retry=None):
+        vision = providers.vision
+        self.faults('Vision API')
+        responses = []
+        for request in requests:
+            if self.image_error_rate and self._random.random() < self.image_error_rate:
+                responses.append(vision.AnnotateImageResponse(error={'message': 'injicēta attēla kļūda'}))
+                continue
+            key = request.image.content or request.image.source.image_uri.encode('utf-8')
+            responses.append(vision.AnnotateImageResponse(label_annotations=[
+                vision.EntityAnnotation(description=label, score=score) for label, score in labels_for(key)
+            ]))
+        return vision.BatchAnnotateImagesResponse(responses=responses)
+
+
+class FakeTranslateClient:
+    """translate_v2.Client aizstājējs: tulko pēc LABEL_TRANSLATIONS, nezināmus vārdus atstāj."""
+
+    def __init__(self, faults):
+        self.faults = faults
+
+    def translate(self, values, target_language=None):
+        self.faults('Translation API')
+        single = isinstance(values, str)
+        items = [{'translatedText': LABEL_TRANSLATIONS.get(value, value), 'input': value}
+                 for value in ([values] if single else values)]
+        return items[0] if single else items
+
+
+def install_fake_clients(vision_faults, translation_faults, image_error_rate=0.0, seed=0):
+    """
+    Aizstāj providers klientu izveidi ar aizstājējiem un atiestata procesa klientu pūlus un
+    aizsargus. Atgriež False, ja google-cloud-vision/translate nav instalēts (tad MI analīze
+    mērījumos nav pieejama).
+    """
+    if not (providers.load_vision_library() and providers.load_translation_library()):
+        return False
+    providers._create_vision_client = lambda keepalive_ms: FakeImageAnnotatorClient(
+        vision_faults, image_error_rate, seed)
+    providers.translate = types.SimpleNamespace(Client=lambda: FakeTranslateClient(translation_faults))
+    providers._vision_client_pool = providers._translation_client_pool = None
+    providers._vision_guard = providers._translation_guard = None
+    return True
@@ -0,0 +1,88 @@
+"""
+ALT teksta un AI frāžu salīdzināšanas veiktspējas salīdzinājums:
+sākotnējā kopu pārbaude katram pārim pret PhraseIndex (Python kopas un NumPy).
+
+Palaišana no projekta saknes:
+    python -m benchmarks.phrase_matching --pairs 5000 --phrases 10
+"""
+import time
+import random
+import argparse
+
+from project.analysis import phrase_matching
+from project.analysis.word_normalization import tokenize_text, normalize_many
+
+VOCABULARY = (
+    "dog cat bird horse sky cloud tree grass flower water sea beach mountain road car bus "
+    "bicycle building house window door street city person people child woman man face "
+    "smile hand food plate table chair computer phone book paper text logo font design "
+    "art painting photograph landscape sunset night light shadow red blue green white black"
+).split()
+
+
+def legacy_compare(alt_text, phrases, language):
+    """Sākotnējais algoritms: katrai frāzei atsevišķa tokenizācija un set.issubset."""
+    if not phrases:
+        return 0, 0, []
+    alt_words = set(normalize_many(tokenize_text(alt_text), language)) if alt_text else set()
+    mask = []
+    for phrase in phrases:
+        phrase_words = set(normalize_many(tokenize_text(phrase), language))
+        mask.append(bool(phrase_words) and bool(alt_words) and phrase_words.issubset(alt_words))
+    return sum(mask), len(phrases), mask
+
+
+def make_pairs(pair_count, phrases_per_pair, seed=0):
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(pair_count):
+        alt_text = ' '.join(rng.sample(VOCABULARY, rng.randint(2, 12)))
+        phrases = [' '.join(rng.sample(VOCABULARY, rng.randint(1, 3))) for _ in range(phrases_per_pair)]
+        pairs.append((alt_text, phrases))
+    return pairs
+
+
+def measure(function, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pairs', type=int, default=5000)
+    parser.add_argument('--phrases', type=int, default=10, help='AI frāžu skaits katram ALT tekstam')
+    parser.add_argument('--language', default='en')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    pairs = make_pairs(args.pairs, args.phrases)
+    index = phrase_matching.get_phrase_index(args.language)
+    index.match_many(pairs)  # Sagatavo normalizācijas kešatmiņu un vārdu id visām metodēm
+
+    legacy_time, expected = measure(lambda: [legacy_compare(a, p, args.language) for a, p in pairs], args.repeat)
+    timings = {'legacy': legacy_time}
+
+    threshold = phrase_matching.VECTORIZE_MIN_PHRASES
+    try:
+        phrase_matching.VECTORIZE_MIN_PHRASES = float('inf')
+        timings['index_python'], result = measure(lambda: index.match_many(pairs), args.repeat)
+        assert result == expected
+        if phrase_matching.numpy_available:
+            phrase_matching.VECTORIZE_MIN_PHRASES = 0
+            timings['index_numpy'], result = measure(lambda: index.match_many(pairs), args.repeat)
+            assert result == expected
+    finally:
+        phrase_matching.VECTORIZE_MIN_PHRASES = threshold
+
+    print(f"{args.pairs} pāri x {args.phrases} frāzes ({args.language}), labākais no {args.repeat}:")
+    for name, seconds in timings.items():
+        print(f"  {name:<14} {seconds * 1000:9.1f} ms  {legacy_time / seconds:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Lokāls HTTP serveris ar sintētiskām lapām veiktspējas mērījumiem:
+/page?images=N&seed=S - HTML lapa ar N <img> tagiem, /img/<n>.png - mazs PNG attēls.
+"""
+import random
+import struct
+import threading
+import zlib
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from .fakes import LABEL_TRANSLATIONS
+
+TRANSLATED_LABELS = tuple(LABEL_TRANSLATIONS.values())
+FILLER_WORDS = "attēlā redzams skaists vecs jauns liels mazs pie blakus vasarā ziemā".split()
+# Sintētisko ALT tekstu veidi un to biežums (svari) - tipiska lapa ar dažādām problēmām
+ALT_KINDS = (
+    ('descriptive', 60), ('missing', 8), ('empty', 8), ('filename', 6),
+    ('placeholder', 6), ('short', 6), ('long', 6),
+)
+
+
+def synthetic_alt(rng):
+    """Atgriež (alt atribūts HTML formā, veids); descriptive teksti satur MI atslēgvārdu tulkojumus."""
+    kind = rng.choices([kind for kind, _ in ALT_KINDS], [weight for _, weight in ALT_KINDS])[0]
+    if kind == 'missing':
+        return '', kind
+    if kind == 'empty':
+        return ' alt=""', kind
+    if kind == 'filename':
+        return f' alt="IMG_{rng.randint(1000, 9999)}.jpg"', kind
+    if kind == 'placeholder':
+        return ' alt="attēls"', kind
+    if kind == 'short':
+        return ' alt="foto"', kind
+    words = rng.sample(TRANSLATED_LABELS, 3) + rng.sample(FILLER_WORDS, 3)
+    if kind == 'long':
+        words = words * 6
+    rng.shuffle(words)
+    return f' alt="{" ".join(words).capitalize()}"', kind
+
+
+@lru_cache(maxsize=32)
+def synthetic_page(image_count, seed=0):
+    """Deterministiska HTML lapa ar image_count attēliem, tekstu un saitēm starp tiem (baiti)."""
+    rng = random.Random(seed)
+    parts = ['<!DOCTYPE html><html lang="lv"><head><meta charset="utf-8"><title>Sintētiska lapa</title>'
+             '</head><body><main>']
+    for i in range(image_count):
+        alt, _ = synthetic_alt(rng)
+        # Daļai attēlu ir izmēra varianti vai srcset, kā CMS veidotās lapās
+        if i % 10 == 9:
+            src = f'/img/{i}.png?w=640&amp;q=80'
+        else:
+            src = f'/img/{i}.png'
+        srcset = f' srcset="/img/{i}.png?w=320 320w, /img/{i}.png?w=640 640w"' if i % 7 == 0 else ''
+        parts.append(f'<section><h2>Sadaļa {i}</h2><p>{" ".join(rng.sample(FILLER_WORDS, 8))} '
+                     f'<a href="/page?images=10&amp;seed={i}">saite</a></p>'
+                     f'<img src="{src}"{srcset}{alt} width="32" height="32" loading="lazy"></section>')
+    parts.append('</main></body></html>')
+    return ''.join(parts).encode('utf-8')
+
+
+def _png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+
+@lru_cache(maxsize=8192)
+def synthetic_png(number, edge=32):
+    """edge×edge pelēktoņu PNG ar attēla numuru tEXt laukā, lai katram attēlam būtu cits saturs."""
+    shade = bytes([number * 37 % 256])
+    raw = b''.join(b'\x00' + shade * edge for _ in range(edge))
+    return (b'\x89PNG\r\n\x1a\n'
+            + _png_chunk(b'IHDR', struct.pack('>IIBBBBB', edge, edge, 8, 0, 0, 0, 0))
+            + _png_chunk(b'tEXt', b'id\x00' + str(number).encode('ascii'))
+            + _png_chunk(b'IDAT', zlib.compress(raw))
+            + _png_chunk(b'IEND', b''))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        if parts.path == '/page':
+            try:
+                image_count = int(query.get('images', ['10'])[0])
+                seed = int(query.get('seed', ['0'])[0])
+            except ValueError:
+                return self._send(400, b'', 'text/plain')
+            return self._send(200, synthetic_page(image_count, seed), 'text/html; charset=utf-8')
+        if parts.path.startswith('/img/') and parts.path.endswith('.png'):
+            number = parts.path[len('/img/'):-len('.png')]
+            if number.isdigit():
+                return self._send(200, synthetic_png(int(number)), 'image/png')
+        self._send(404, b'', 'text/plain')
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class SyntheticSite:
+    """Sintētisko lapu serveris fona pavedienā uz nejauša brīva porta (konteksta pārvaldnieks)."""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def page_url(self, image_count, seed=0):
+        return f'{self.base_url}/page?images={image_count}&seed={seed}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='benchmark-site', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,359 @@
+"""
+Atkārtojami veiktspējas mērījumi: HTML parsēšana, ALT noteikumu pārbaudes, vārdu
+normalizācija (ALT un MI frāžu salīdzināšana) un pilni pieprasījumi index maršrutam pret
+lokālu sintētisko lapu serveri ar Vision/Translation aizstājējiem (skat. benchmarks.fakes).
+Rezultāti (caurlaidspēja, p50/p99 aizture, maksimālā atmiņa) tiek izvadīti JSON formātā,
+lai tos varētu salīdzināt starp izmaiņām.
+
+Palaišana no projekta saknes:
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --scenarios end_to_end --sizes 100,1000 --vision-latency 0.1
+    python -m benchmarks.suite --output new.json --compare bench.json --max-regression 10
+"""
+import gc
+import os
+import sys
+import json
+import math
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+import dataclasses
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from project import create_app
+from project.analysis import phrase_matching
+from project.analysis.analyzer import analyze_image_alt
+from project.analysis.extraction import extract_image_candidates, iter_image_candidates
+from project.analysis.settings import AnalyzerSettings
+from project.analysis.phrase_matching import compare_alt_text_with_ai_phrases
+
+from .fakes import FaultInjector, LABEL_TRANSLATIONS, install_fake_clients, labels_for
+from .site import SyntheticSite, synthetic_page
+
+REPORT_SCHEMA_VERSION = 1
+DEFAULT_SIZES = (10, 100, 1000, 5000)
+SCENARIOS = ('parse', 'rules', 'normalization', 'end_to_end')
+PARSE_CHUNK_SIZE = 64 * 1024
+
+
+class Scenario:
+    """
+    Viens mērījums: operations - bezargumentu funkcijas, kas kopā veido vienu caurlaidi,
+    unit - ko mēra viena operācija, items_per_pass - cik attēlu apstrādā viena caurlaide.
+    check(result) atgriež kļūdas aprakstu vai None (piem., HTTP statusa pārbaudei).
+    """
+
+    def __init__(self, name, size, unit, operations, items_per_pass, check=None):
+        self.name = name
+        self.size = size
+        self.unit = unit
+        self.operations = operations
+        self.items_per_pass = items_per_pass
+        self.check = check
+
+
+def percentile(sorted_values, percent):
+    """Tuvākā ranga procentile no sakārtota saraksta."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def run_scenario(scenario, repeat, warmup, measure_memory=True):
+    """Izpilda warmup + repeat caurlaides un atgriež caurlaidspēju, aizturi un atmiņas maksimumu."""
+    for _ in range(warmup):
+        for operation in scenario.operations:
+            operation()
+
+    latencies = []
+    errors = 0
+    gc.collect()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for operation in scenario.operations:
+            operation_started = time.perf_counter()
+            result = operation()
+            latencies.append(time.perf_counter() - operation_started)
+            if scenario.check is not None and scenario.check(result):
+                errors += 1
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    peak_memory = None
+    if measure_memory:
+        # Atsevišķa caurlaide, jo tracemalloc ievērojami palēnina izpildi
+        gc.collect()
+        tracemalloc.start()
+        try:
+            for operation in scenario.operations:
+                operation()
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    items = scenario.items_per_pass * repeat
+    return {
+        'scenario': scenario.name,
+        'size': scenario.size,
+        'unit': scenario.unit,
+        'operations': len(latencies),
+        'errors': errors,
+        'items': items,
+        'seconds': round(elapsed, 6),
+        'throughput_items_per_s': round(items / elapsed, 3) if elapsed else None,
+        'throughput_ops_per_s': round(len(latencies) / elapsed, 3) if elapsed else None,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 4),
+            'p99': round(percentile(latencies, 99) * 1000, 4),
+            'mean': round(sum(latencies) / len(latencies) * 1000, 4) if latencies else 0.0,
+            'min': round(latencies[0] * 1000, 4) if latencies else 0.0,
+            'max': round(latencies[-1] * 1000, 4) if latencies else 0.0,
+        },
+        'peak_memory_bytes': peak_memory,
+    }
+
+
+# --- Scenāriji ---
+
+def parse_scenario(size, context):
+    html = synthetic_page(size, context['seed'])
+    chunks = [html[start:start + PARSE_CHUNK_SIZE] for start in range(0, len(html), PARSE_CHUNK_SIZE)]
+    return Scenario('parse', size, 'page', [lambda: sum(1 for _ in iter_image_candidates(iter(chunks)))], size)
+
+
+def rules_scenario(size, context):
+    settings = dataclasses.replace(context['settings'], enable_vision=False, enable_translation=False)
+    page_url = context['page_url']
+    candidates = extract_image_candidates(synthetic_page(size, context['seed']).decode('utf-8'))
+    operations = [lambda img=img: analyze_image_alt(img, page_url, settings, 'lv') for img in candidates]
+    return Scenario('rules', size, 'image', operations, size)
+
+
+def normalization_scenario(size, context):
+    pairs = []
+    for img in extract_image_candidates(synthetic_page(size, context['seed']).decode('utf-8')):
+        labels = [LABEL_TRANSLATIONS[label] for label, _ in labels_for((img.get('src') or '').encode('utf-8'))]
+        pairs.append((img.get('alt') or '', labels))
+    operations = [lambda alt=alt, labels=labels: compare_alt_text_with_ai_phrases(alt, labels, 'lv')
+                  for alt, labels in pairs]
+    return Scenario('normalization', size, 'image', operations, size)
+
+
+def end_to_end_scenario(size, context):
+    client = context['client']
+    page_url = context['site'].page_url(size, context['seed'])
+
+    def request_page():
+        return client.post('/', data={'url': page_url, 'language': 'lv'}).status_code
+
+    return Scenario('end_to_end', size, 'request', [request_page], size,
+                    check=lambda status: None if status == 200 else f"HTTP {status}")
+
+
+SCENARIO_BUILDERS = {
+    'parse': parse_scenario,
+    'rules': rules_scenario,
+    'normalization': normalization_scenario,
+    'end_to_end': end_to_end_scenario,
+}
+
+
+def create_benchmark_app(ai_enabled, job_store_path):
+    """
+    Aplikācija ar aizstājējiem un bez kešatmiņām, lai katrs pieprasījums veiktu visu darbu;
+    analīzes tiek saglabātas pagaidu darbu glabātuvē job_store_path, nevis instance/.
+    """
+    app = create_app(start_job_queue=False)
+    app.config.update(
+        JOB_STORE_PATH=job_store_path,
+        ENABLE_VISION_API=ai_enabled,
+        ENABLE_TRANSLATION_API=ai_enabled,
+        VISION_CACHE_ENABLED=False,
+        TRANSLATION_CACHE_ENABLED=False,
+        PAGE_CACHE_ENABLED=False,
+        VISION_API_RATE_LIMIT=0,
+        TRANSLATION_API_RATE_LIMIT=0,
+    )
+    app.extensions.pop('analyzer_settings', None)
+    app.extensions.pop('analysis_providers', None)
+    return app
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _max_rss_bytes():
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux atgriež kilobaitus, macOS - baitus
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def run_suite(args):
+    vision_faults = FaultInjector(args.vision_latency, args.latency_jitter, args.error_rate, args.seed)
+    translation_faults = FaultInjector(args.translation_latency, args.latency_jitter, args.error_rate, args.seed + 1)
+    ai_enabled = install_fake_clients(vision_faults, translation_faults, args.image_error_rate, args.seed)
+    if not ai_enabled:
+        logging.warning("google-cloud-vision/translate nav instalēti: end_to_end mēra lapas bez MI analīzes.")
+
+    job_store_dir = tempfile.TemporaryDirectory(prefix='alt-benchmark-')
+    app = create_benchmark_app(ai_enabled, os.path.join(job_store_dir.name, 'jobs.sqlite3'))
+    logging.getLogger().setLevel(args.log_level)
+    # Pilna savienojumu pūla brīdinājumi (HTTP_POOL_MAXSIZE) katrā lapā aizpildītu izvadi
+    logging.getLogger('urllib3').setLevel(logging.ERROR)
+
+    results = []
+    with job_store_dir, SyntheticSite() as site:
+        context = {
+            'seed': args.seed,
+            'site': site,
+            'client': app.test_client(),
+            'page_url': site.page_url(0),
+            'settings': AnalyzerSettings.from_config(app.config),
+        }
+        for name in args.scenarios:
+            for size in args.sizes:
+                scenario = SCENARIO_BUILDERS[name](size, context)
+                result = run_scenario(scenario, args.repeat, args.warmup, measure_memory=not args.no_memory)
+                results.append(result)
+                print(_format_result(result), file=sys.stderr)
+
+    return {
+        'schema_version': REPORT_SCHEMA_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'git_commit': _git_commit(),
+            'numpy_available': phrase_matching.numpy_available,
+            'ai_clients': 'fake' if ai_enabled else 'unavailable',
+        },
+        'parameters': {
+            'scenarios': list(args.scenarios),
+            'sizes': list(args.sizes),
+            'repeat': args.repeat,
+            'warmup': args.warmup,
+            'seed': args.seed,
+            'vision_latency': args.vision_latency,
+            'translation_latency': args.translation_latency,
+            'latency_jitter': args.latency_jitter,
+            'error_rate': args.error_rate,
+            'image_error_rate': args.image_error_rate,
+        },
+        'results': results,
+        'api_calls': {'vision': vision_faults.stats(), 'translation': translation_faults.stats()},
+        'max_rss_bytes': _max_rss_bytes(),
+    }
+
+
+def _format_result(result):
+    memory = result['peak_memory_bytes']
+    memory_text = f"{memory / 1024 / 1024:7.1f} MiB" if memory is not None else '      -    '
+    return (f"{result['scenario']:<14} {result['size']:>5}  "
+            f"{result['throughput_items_per_s'] or 0:>11.1f} attēli/s  "
+            f"p50 {result['latency_ms']['p50']:>9.3f} ms  p99 {result['latency_ms']['p99']:>9.3f} ms  "
+            f"{memory_text}  kļūdas {result['errors']}")
+
+
+def compare_reports(baseline, current, max_regression=None):
+    """
+    Salīdzina divus pārskatus pēc (scenārijs, izmērs). Atgriež salīdzinājuma rindas un
+    regresiju sarakstu: caurlaidspējas kritums vai p50 aiztures pieaugums virs max_regression %.
+    """
+    baseline_results = {(result['scenario'], result['size']): result for result in baseline['results']}
+    rows = []
+    regressions = []
+    for result in current['results']:
+        key = (result['scenario'], result['size'])
+        previous = baseline_results.get(key)
+        if previous is None:
+            continue
+        throughput_change = _percent_change(previous['throughput_items_per_s'], result['throughput_items_per_s'])
+        p50_change = _percent_change(previous['latency_ms']['p50'], result['latency_ms']['p50'])
+        p99_change = _percent_change(previous['latency_ms']['p99'], result['latency_ms']['p99'])
+        rows.append(f"{key[0]:<14} {key[1]:>5}  caurlaidspēja {throughput_change:+7.1f}%  "
+                    f"p50 {p50_change:+7.1f}%  p99 {p99_change:+7.1f}%")
+        if max_regression is not None and (throughput_change < -max_regression or p50_change > max_regression):
+            regressions.append(key)
+    return rows, regressions
+
+
+def _percent_change(before, after):
+    if not before or after is None:
+        return 0.0
+    return (after - before) / before * 100
+
+
+def _comma_list(value, convert=str):
+    return [convert(item.strip()) for item in value.split(',') if item.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', type=_comma_list, default=list(SCENARIOS),
+                        help=f"komatatdalīts saraksts no: {', '.join(SCENARIOS)}")
+    parser.add_argument('--sizes', type=lambda value: _comma_list(value, int), default=list(DEFAULT_SIZES),
+                        help='attēlu skaits sintētiskajās lapās (komatatdalīts)')
+    parser.add_argument('--repeat', type=int, default=5, help='mērītās caurlaides katram scenārijam')
+    parser.add_argument('--warmup', type=int, default=1, help='iesildīšanas caurlaides (netiek mērītas)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--vision-latency', type=float, default=0.05, help='Vision API aizture sekundēs')
+    parser.add_argument('--translation-latency', type=float, default=0.02, help='Translation API aizture sekundēs')
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help='nejauša papildu aizture līdz N sekundēm')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='API izsaukumu kļūdu (503) varbūtība')
+    parser.add_argument('--image-error-rate', type=float, default=0.0, help='Vision kļūdu varbūtība attēlam')
+    parser.add_argument('--no-memory', action='store_true', help='neveikt atmiņas mērījuma caurlaidi')
+    parser.add_argument('--output', help='JSON pārskata fails (bez tā - standarta izvadē)')
+    parser.add_argument('--compare', help='iepriekšējais JSON pārskats salīdzināšanai')
+    parser.add_argument('--max-regression', type=float,
+                        help='izejas kods 1, ja caurlaidspēja krīt vai p50 pieaug vairāk par N %%')
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args(argv)
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Nezināmi scenāriji: {', '.join(sorted(unknown))}")
+
+    report = run_suite(args)
+    report_json = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            output.write(report_json + '\n')
+    else:
+        print(report_json)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        rows, regressions = compare_reports(baseline, report, args.max_regression)
+        print(f"Salīdzinājums ar {args.compare}:", file=sys.stderr)
+        for row in rows:
+            print(f"  {row}", file=sys.stderr)
+        if regressions:
+            print(f"Regresijas (>{args.max_regression}%): "
+                  f"{', '.join(f'{name}/{size}' for name, size in regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
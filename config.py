@@ -13,14 +13,123 @@ GOOGLE_CLOUD_PROJECT_ID = os.environ.get('GOOGLE_CLOUD_PROJECT_ID')
 ENABLE_VISION_API = os.environ.get('ENABLE_VISION_API', 'True').lower() == 'true'
 ENABLE_TRANSLATION_API = os.environ.get('ENABLE_TRANSLATION_API', 'True').lower() == 'true'
 
+# Procesa līmeņa Google API klientu pūls
+GOOGLE_CLIENT_POOL_MAX_IDLE = int(os.environ.get('GOOGLE_CLIENT_POOL_MAX_IDLE', 8))
+GRPC_KEEPALIVE_TIME_MS = int(os.environ.get('GRPC_KEEPALIVE_TIME_MS', 30000))
+
+# Google API izsaukumu aizsardzība: pieprasījumu ātrums sekundē (0 - bez ierobežojuma) un uzkrājums,
+# atkārtojumi ar eksponenciālu aizturi (sekundēs) īslaicīgām kļūdām (429, 5xx, taimauti),
+# kopējais termiņš vienam izsaukumam un ķēdes pārtraucējs (kļūmju skaits, atvērtā stāvokļa ilgums)
+VISION_API_RATE_LIMIT = float(os.environ.get('VISION_API_RATE_LIMIT', 10))
+VISION_API_RATE_BURST = int(os.environ.get('VISION_API_RATE_BURST', 10))
+TRANSLATION_API_RATE_LIMIT = float(os.environ.get('TRANSLATION_API_RATE_LIMIT', 10))
+TRANSLATION_API_RATE_BURST = int(os.environ.get('TRANSLATION_API_RATE_BURST', 10))
+GOOGLE_API_MAX_RETRIES = int(os.environ.get('GOOGLE_API_MAX_RETRIES', 3))
+GOOGLE_API_BACKOFF_BASE = float(os.environ.get('GOOGLE_API_BACKOFF_BASE', 0.5))
+GOOGLE_API_BACKOFF_MAX = float(os.environ.get('GOOGLE_API_BACKOFF_MAX', 8))
+GOOGLE_API_CALL_DEADLINE = float(os.environ.get('GOOGLE_API_CALL_DEADLINE', 20))
+GOOGLE_API_BREAKER_FAILURES = int(os.environ.get('GOOGLE_API_BREAKER_FAILURES', 5))
+GOOGLE_API_BREAKER_RESET = float(os.environ.get('GOOGLE_API_BREAKER_RESET', 30))
+
 TARGET_TRANSLATION_LANGUAGE = os.environ.get('TARGET_TRANSLATION_LANGUAGE', 'lv')
+# Maksimālais tekstu skaits vienā Translation API v2 pieprasījumā (API limits ir 128)
+TRANSLATION_API_MAX_SEGMENTS = int(os.environ.get('TRANSLATION_API_MAX_SEGMENTS', 128))
+
+# Tulkojumu kešatmiņa: atmiņas LRU slānis + SQLite fails (TTL sekundēs, 0 - bez termiņa)
+TRANSLATION_CACHE_ENABLED = os.environ.get('TRANSLATION_CACHE_ENABLED', 'True').lower() == 'true'
+TRANSLATION_CACHE_PATH = os.environ.get('TRANSLATION_CACHE_PATH', os.path.join(BASE_DIR, 'instance', 'translation_cache.sqlite3'))
+TRANSLATION_CACHE_MEMORY_SIZE = int(os.environ.get('TRANSLATION_CACHE_MEMORY_SIZE', 4096))
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.environ.get('TRANSLATION_CACHE_MAX_ENTRIES', 100000))
+TRANSLATION_CACHE_TTL = int(os.environ.get('TRANSLATION_CACHE_TTL', 30 * 24 * 3600))
 
 VISION_API_MIN_CONFIDENCE = float(os.environ.get('VISION_API_MIN_CONFIDENCE', 0.65))
 MAX_AI_LABELS_TO_SHOW = int(os.environ.get('MAX_AI_LABELS_TO_SHOW', 5))
+# Attēlu skaits vienā batch_annotate_images pieprasījumā (API maksimums ir 16)
+VISION_API_BATCH_SIZE = int(os.environ.get('VISION_API_BATCH_SIZE', 16))
+
+# Attēli tiek lejupielādēti un sūtīti Vision API kā saturs (image.content), nevis URL.
+# Mazāki par VISION_MIN_IMAGE_EDGE px (izsekošanas pikseļi, atstarpes) un lielāki par
+# VISION_PREFETCH_MAX_BYTES netiek analizēti; lielie attēli tiek samazināti līdz VISION_MAX_IMAGE_EDGE px
+VISION_PREFETCH_ENABLED = os.environ.get('VISION_PREFETCH_ENABLED', 'True').lower() == 'true'
+VISION_PREFETCH_MAX_BYTES = int(os.environ.get('VISION_PREFETCH_MAX_BYTES', 10 * 1024 * 1024))
+VISION_MIN_IMAGE_EDGE = int(os.environ.get('VISION_MIN_IMAGE_EDGE', 16))
+VISION_MAX_IMAGE_EDGE = int(os.environ.get('VISION_MAX_IMAGE_EDGE', 1024))
+
+# Vision rezultātu kešatmiņa pēc attēla URL (ar ETag/Last-Modified) un satura jaucējkoda
+VISION_CACHE_ENABLED = os.environ.get('VISION_CACHE_ENABLED', 'True').lower() == 'true'
+VISION_CACHE_PATH = os.environ.get('VISION_CACHE_PATH', os.path.join(BASE_DIR, 'instance', 'vision_cache.sqlite3'))
+VISION_CACHE_MEMORY_SIZE = int(os.environ.get('VISION_CACHE_MEMORY_SIZE', 2048))
+VISION_CACHE_MAX_ENTRIES = int(os.environ.get('VISION_CACHE_MAX_ENTRIES', 20000))
+# Cik sekundes URL ieraksts tiek uzskatīts par derīgu bez atkārtotas HTTP pārbaudes
+VISION_CACHE_REVALIDATE_AFTER = int(os.environ.get('VISION_CACHE_REVALIDATE_AFTER', 3600))
+VISION_CACHE_MAX_IMAGE_BYTES = int(os.environ.get('VISION_CACHE_MAX_IMAGE_BYTES', 10 * 1024 * 1024))
+
+# Visas lapas analīžu kešatmiņa pēc (URL, valoda, analīzes iestatījumi): atkārtota pārbaude izmanto
+# nosacījuma GET un analizē no jauna tikai attēlus ar mainītu src vai alt (TTL sekundēs, 0 - bez termiņa)
+PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'True').lower() == 'true'
+PAGE_CACHE_PATH = os.environ.get('PAGE_CACHE_PATH', os.path.join(BASE_DIR, 'instance', 'page_cache.sqlite3'))
+PAGE_CACHE_MEMORY_SIZE = int(os.environ.get('PAGE_CACHE_MEMORY_SIZE', 64))
+PAGE_CACHE_MAX_ENTRIES = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', 2000))
+PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL', 7 * 24 * 3600))
 
 USER_AGENT = os.environ.get('USER_AGENT', 'Mozilla/5.0 (compatible; AltTextCheckerBot/1.1; +http://example.com/alt-text-checker-info)')
 REQUEST_TIMEOUT = int(os.environ.get('REQUEST_TIMEOUT', 15))
 
+# Kopīgā HTTP sesija: savienojumu pūli (resursdatoru skaits un savienojumi katram) un atbildes izmēra limits
+HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', 16))
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 10))
+HTTP_MAX_RESPONSE_BYTES = int(os.environ.get('HTTP_MAX_RESPONSE_BYTES', 20 * 1024 * 1024))
+
+# Cik attēlu grupu (pa VISION_API_BATCH_SIZE attēliem) drīkst vienlaicīgi analizēt vienas lapas ietvaros
+MAX_CONCURRENT_IMAGE_ANALYSES = int(os.environ.get('MAX_CONCURRENT_IMAGE_ANALYSES', 8))
+
+# Vietnes pārmeklēšana (flask crawl)
+CRAWL_MAX_PAGES = int(os.environ.get('CRAWL_MAX_PAGES', 500))
+CRAWL_MAX_DEPTH = int(os.environ.get('CRAWL_MAX_DEPTH', 3))
+CRAWL_CONCURRENCY = int(os.environ.get('CRAWL_CONCURRENCY', 4))
+CRAWL_HOST_RATE_LIMIT = float(os.environ.get('CRAWL_HOST_RATE_LIMIT', 2.0)) # pieprasījumi sekundē
+CRAWL_RESPECT_ROBOTS = os.environ.get('CRAWL_RESPECT_ROBOTS', 'True').lower() == 'true'
+CRAWL_USE_SITEMAPS = os.environ.get('CRAWL_USE_SITEMAPS', 'True').lower() == 'true'
+CRAWL_IMAGE_RESULT_CACHE_SIZE = int(os.environ.get('CRAWL_IMAGE_RESULT_CACHE_SIZE', 10000))
+
+# Bezsaistes audits (flask audit): darba procesu skaits, 0 - pēc CPU kodolu skaita
+AUDIT_WORKERS = int(os.environ.get('AUDIT_WORKERS', 0))
+
+# Fona analīzes darbi (POST /jobs); glabātuvi var aizstāt ar citu JobStore realizāciju
+JOB_STORE_BACKEND = os.environ.get('JOB_STORE_BACKEND', 'project.jobs.store.SQLiteJobStore')
+JOB_STORE_PATH = os.environ.get('JOB_STORE_PATH', os.path.join(BASE_DIR, 'instance', 'jobs.sqlite3'))
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_PROGRESS_FLUSH_SIZE = int(os.environ.get('JOB_PROGRESS_FLUSH_SIZE', 16))
+JOB_STALE_AFTER = int(os.environ.get('JOB_STALE_AFTER', 600)) # sekundes bez progresa, pēc kurām darbs tiek atsākts
+JOB_RESULTS_PAGE_SIZE = int(os.environ.get('JOB_RESULTS_PAGE_SIZE', 100))
+# Darbu rinda tiek palaista create_app laikā; ar gunicorn --preload jāizslēdz un jāpalaiž katrā
+# darba procesā (post_fork: get_job_queue(worker.app.wsgi())), citādi tā tiek izveidota pirmajā /jobs pieprasījumā
+JOB_QUEUE_ON_STARTUP = os.environ.get('JOB_QUEUE_ON_STARTUP', 'True').lower() == 'true'
+# Saglabātās rezultātu lapas un pabeigtie fona darbi tiek dzēsti pēc šī laika (sekundēs, 0 - netiek dzēsti)
+RESULTS_RETENTION = int(os.environ.get('RESULTS_RETENTION', 7 * 24 * 3600))
+JOB_RETENTION = int(os.environ.get('JOB_RETENTION', 7 * 24 * 3600))
+
+# ALT teksta noteikumi (klases, skat. project/analysis/rules.py) izpildes secībā, atdalīti ar komatu;
+# tukšs - noklusējuma noteikumi (garums, aizliegtās frāzes, faila nosaukums)
+ALT_TEXT_RULES = [rule.strip() for rule in os.environ.get('ALT_TEXT_RULES', '').split(',') if rule.strip()]
+# Vietņu papildu aizliegtās frāzes: JSON fails {"example.com": {"lv": ["frāze", ...]}}, attiecas arī uz apakšdomēniem
+SITE_FORBIDDEN_PHRASES_PATH = os.environ.get('SITE_FORBIDDEN_PHRASES_PATH')
+
+# Vienlaicīgo straumējošo (NDJSON/SSE) /api/analyze analīžu skaits procesā; pārējie saņem 503
+STREAM_MAX_CONCURRENT = int(os.environ.get('STREAM_MAX_CONCURRENT', 8))
+
+# Rezultātu lapā vienlaikus rādīto attēlu skaits; pārējie tiek ielādēti pa lapām no darbu glabātuves
+RESULTS_PAGE_SIZE = int(os.environ.get('RESULTS_PAGE_SIZE', 50))
+
+# Darba procesa sagatavošana (skat. project/analysis/warmup.py): ielādē valodu modeļus un API klientus
+WARMUP_ON_STARTUP = os.environ.get('WARMUP_ON_STARTUP', 'False').lower() == 'true'
+WARMUP_LANGUAGES = [lang.strip() for lang in os.environ.get('WARMUP_LANGUAGES', 'lv,en').split(',') if lang.strip()]
+
+# Prometheus metrikas (GET /metrics) un pieprasījuma posmu laika sadalījums rezultātu lapā un
+# Server-Timing galvenē (vienmēr, ja SHOW_REQUEST_TIMINGS=True, citādi ar parametru timings=1)
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+SHOW_REQUEST_TIMINGS = os.environ.get('SHOW_REQUEST_TIMINGS', 'False').lower() == 'true'
+
 FLASK_ENV = os.environ.get('FLASK_ENV', 'production')
 FLASK_DEBUG = os.environ.get('FLASK_DEBUG', '0') == '1'
 
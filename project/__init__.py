@@ -1,9 +1,14 @@
 import os
+import time
 from flask import Flask
 import logging
 
-def create_app(config_filename='config.py'):
-    """Flask aplikācijas rūpnīca (factory)."""
+def create_app(config_filename='config.py', start_job_queue=True):
+    """
+    Flask aplikācijas rūpnīca (factory). start_job_queue - palaist fona darbu rindu un atsākt
+    nepabeigtos darbus (ja arī JOB_QUEUE_ON_STARTUP=True); False - piem., audita darba procesiem.
+    """
+    started = time.perf_counter()
     app = Flask(__name__,
                 static_folder='static',
                 template_folder='templates',
@@ -34,10 +39,37 @@ def create_app(config_filename='config.py'):
         from .main import main_bp
         app.register_blueprint(main_bp)
 
+        from .jobs import jobs_bp
+        app.register_blueprint(jobs_bp)
+
+        from .api import api_bp
+        app.register_blueprint(api_bp)
+
+        if app.config.get('METRICS_ENABLED', True):
+            from .monitoring import monitoring_bp
+            app.register_blueprint(monitoring_bp)
+
+        from .crawler.commands import crawl_command
+        app.cli.add_command(crawl_command)
+
+        from .audit.commands import audit_command
+        app.cli.add_command(audit_command)
+
         @app.context_processor
         def inject_config():
             # Padodam visu app.config uz veidnēm
             return dict(config=app.config)
 
-    logging.info("Flask aplikācija izveidota.")
+    from .analysis.warmup import warm_up
+    from .metrics import record_startup_timing
+    if app.config.get('WARMUP_ON_STARTUP'):
+        warm_up(app)
+
+    if start_job_queue and app.config.get('JOB_QUEUE_ON_STARTUP', True):
+        from .jobs.queue import get_job_queue
+        get_job_queue(app)
+
+    elapsed = time.perf_counter() - started
+    record_startup_timing('create_app', elapsed)
+    logging.info(f"Flask aplikācija izveidota ({elapsed:.3f}s).")
     return app
\ No newline at end of file
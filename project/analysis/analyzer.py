@@ -1,15 +1,20 @@
-import os
 import logging
 import re
-import string
 from urllib.parse import urlparse, urljoin
-from flask import current_app
 
-from .providers import get_vision_api_labels, translate_labels
-from .word_normalization import compare_alt_text_with_ai_phrases
+from .images import VISION_SKIPPED_PREFIX
+from .resilience import PROVIDER_UNAVAILABLE_PREFIX
+from ..metrics import stage_timer
+from .phrase_matching import compare_alt_text_with_ai_phrases
 
 logger = logging.getLogger(__name__)
 
+# Ieteikuma sākums rezultātiem, kuru analīze neizdevās (skat. build_failed_result)
+FAILED_ANALYSIS_PREFIX = "Attēla analīze neizdevās"
+
+# Valodas, kurām MI atslēgvārdi tiek tulkoti pirms salīdzināšanas (pārējās salīdzina ar EN atslēgvārdiem)
+LABEL_TRANSLATION_LANGUAGES = ('lv',)
+
 def is_svg_file(url):
     """Pārbauda vai URL norāda uz SVG failu."""
     if not url:
@@ -22,13 +27,86 @@ def is_svg_file(url):
         logger.debug(f"Kļūda URL pārbaudē: {e}")
         return False
 
-def analyze_image_alt(img_tag, page_url, selected_language='lv'):
-    config = current_app.config
-    enable_vision = config.get('ENABLE_VISION_API', False)
-    enable_translation = config.get('ENABLE_TRANSLATION_API', False)
-    min_alt_len = config.get('USER_SPECIFIED_MIN_ALT_LENGTH', 5)
-    max_alt_len = config.get('USER_SPECIFIED_MAX_ALT_LENGTH', 125)
-    forbidden_phrases = config.get('FORBIDDEN_PHRASES', {}).get(selected_language, [])
+def get_vision_candidate_uri(img_tag, page_url):
+    """
+    Atgriež absolūto attēla URL, ja analyze_image_alt šo attēlu sūtītu uz Vision API,
+    citādi None. Izmanto, lai lapas attēlus varētu anotēt vienā pakā.
+    """
+    raw_src = img_tag.get('src')
+    alt = img_tag.get('alt')
+    if not raw_src or not raw_src.strip() or alt is None or not alt.strip():
+        return None
+    try:
+        absolute_src = urljoin(page_url, raw_src.strip())
+        if is_svg_file(absolute_src):
+            return None
+        if urlparse(absolute_src).scheme not in ['http', 'https']:
+            return None
+    except Exception:
+        return None
+    return absolute_src
+
+def build_failed_result(img_tag, page_url, error):
+    """Izveido rezultātu attēlam, kura analīze neizdevās, lai kļūda neietekmētu pārējos attēlus."""
+    raw_src = (img_tag.get('src') or '').strip()
+    try:
+        src_display = urljoin(page_url, raw_src) if raw_src else "Nezināms SRC"
+    except Exception:
+        src_display = raw_src or "Nezināms SRC"
+
+    alt = img_tag.get('alt')
+    analysis = {
+        'exists': alt is not None, 'is_empty': None if alt is None else alt.strip() == "",
+        'is_too_long': None, 'is_too_short': None, 'is_placeholder': None,
+        'is_filename': None, 'ai_analysis': None
+    }
+    return {
+        'src': src_display,
+        'alt': alt,
+        'analysis': analysis,
+        'suggestions': [f"{FAILED_ANALYSIS_PREFIX}: {error}"]
+    }
+
+def is_reusable_result(result):
+    """
+    Pārbauda, vai saglabātu attēla rezultātu drīkst izmantot atkārtoti: rezultāti ar
+    analīzes, Vision vai tulkošanas kļūdām (parasti īslaicīgām) un bez MI analīzes
+    (API nebija pieejams) tiek analizēti no jauna.
+    """
+    if not result or any(suggestion.startswith(FAILED_ANALYSIS_PREFIX) for suggestion in result['suggestions']):
+        return False
+    ai_analysis = result['analysis'].get('ai_analysis') or {}
+    return not (ai_analysis.get('error') or ai_analysis.get('translation_error') or ai_analysis.get('degraded'))
+
+def comparison_phrases(original_ai_labels, selected_language, enable_translation, translation_result):
+    """
+    (frāzes, valoda, tulkošanas kļūda), ar ko tiek salīdzināts ALT teksts: tulkotie atslēgvārdi
+    valodām LABEL_TRANSLATION_LANGUAGES, ja tulkojums izdevās, citādi oriģinālie (EN) atslēgvārdi.
+    """
+    if selected_language in LABEL_TRANSLATION_LANGUAGES and enable_translation and translation_result is not None:
+        translated_labels, translation_error = translation_result
+        if translation_error:
+            return original_ai_labels, 'en', translation_error
+        if translated_labels:
+            return translated_labels, selected_language, None
+    return original_ai_labels, 'en', None
+
+def analyze_image_alt(img_tag, page_url, settings, selected_language='lv', vision_result=None,
+                      translation_result=None, providers=None, rule_result=None, phrase_match=None):
+    """
+    Analizē viena <img> taga ALT tekstu. Nav atkarīga no Flask konteksta.
+    settings - AnalyzerSettings; providers - AnalysisProviders Vision/Translation izsaukumiem.
+    vision_result - iepriekš iegūts (labels, error) pāris no pakešu Vision izsaukuma;
+    ja nav norādīts, Vision API tiek izsaukts šim attēlam atsevišķi.
+    translation_result - iepriekš iegūts (translated_labels, error) pāris no lapas
+    tulkošanas posma; ja nav norādīts, atslēgvārdi tiek tulkoti atsevišķi.
+    rule_result - iepriekš iegūts (flags, suggestions) pāris no RuleEngine.evaluate_many
+    attēlu grupai; ja nav norādīts, noteikumi tiek pārbaudīti šim attēlam atsevišķi.
+    phrase_match - iepriekš iegūts (sakrita, kopā, maska) ALT teksta salīdzinājums ar
+    comparison_phrases frāzēm (skat. pipeline, viens salīdzinājums attēlu grupai).
+    """
+    enable_vision = settings.enable_vision
+    enable_translation = settings.enable_translation
 
     raw_src = img_tag.get('src')
     if not raw_src or raw_src.strip() == '':
@@ -62,90 +140,64 @@ def analyze_image_alt(img_tag, page_url, selected_language='lv'):
         analysis['is_empty'] = alt_text == ""
 
         if not analysis['is_empty']:
-            alt_len = len(alt_text)
-            if alt_len > max_alt_len:
-                analysis['is_too_long'] = True
-                suggestions.append(
-                    f"ALT teksts (garums: {alt_len}) pārsniedz ieteicamo {max_alt_len} rakstzīmju limitu. "
-                    f"Apsveriet saīsināšanu."
-                )
-            elif alt_len < min_alt_len:
-                analysis['is_too_short'] = True
-                suggestions.append(
-                    f"ALT teksts '{alt_text}' (garums: {alt_len}) ir īsāks par {min_alt_len} rakstzīmēm. "
-                    f"Detalizētāks apraksts varētu būt noderīgāks."
-                )
-
-            lower_alt = alt_text.lower()
-            for phrase in forbidden_phrases:
-                phrase_lower = phrase.lower()
-                if lower_alt.startswith(phrase_lower + ' ') or lower_alt == phrase_lower:
-                    analysis['is_placeholder'] = True
-                    suggestions.append(
-                        f"ALT teksts sākas ar vai ir vispārīga frāze: '{phrase}'. "
-                        f"Aizstājiet ar konkrētāku aprakstu."
-                    )
-                    break 
-
-            if absolute_src and not analysis['is_placeholder']:
-                try:
-                    parsed_url = urlparse(absolute_src)
-                    filename = os.path.basename(parsed_url.path)
-                    if filename:
-                        filename_no_ext = os.path.splitext(filename)[0]
-                        alt_text_check = alt_text.strip(string.punctuation + ' ').lower()
-                        fname_check = filename.lower()
-                        fname_noext_check = filename_no_ext.lower()
-                        common_ext = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp', '.tiff', '.ico')
-                        ends_with_common_ext = alt_text_check.endswith(common_ext)
-                        is_exact_filename_match = (alt_text_check == fname_check or alt_text_check == fname_noext_check)
-                        
-                        if is_exact_filename_match or (ends_with_common_ext and len(alt_text_check) < 80):
-                            analysis['is_filename'] = True
-                            suggestions.append(
-                                f"ALT teksts ('{alt_text}') varētu būt faila nosaukums. "
-                                f"Faila nosaukumi parasti nav informatīvi. Aizstājiet ar satura aprakstu."
-                            )
-                except Exception as e:
-                    logger.debug(f"Neizdevās pārbaudīt faila nosaukumu ALT tekstā '{absolute_src}': {e}", exc_info=False)
+            if rule_result is None:
+                rule_result = settings.rule_engine(selected_language, page_url).evaluate(absolute_src, alt)
+            rule_flags, rule_suggestions = rule_result
+            analysis.update(rule_flags)
+            suggestions.extend(rule_suggestions)
 
             if enable_vision and is_valid_for_vision:
                 analysis['ai_analysis'] = {} 
-                original_ai_labels, vision_error = get_vision_api_labels(absolute_src)
+                if vision_result is not None:
+                    original_ai_labels, vision_error = vision_result
+                elif providers is not None:
+                    original_ai_labels, vision_error = providers.vision_labels(absolute_src)
+                else:
+                    original_ai_labels, vision_error = None, "Vision API klients nav pieejams."
 
                 if vision_error and not original_ai_labels:
                     if "AI neatpazina atslēgvārdus" in vision_error:
                         analysis['ai_analysis']['info'] = "MI neatpazina atslēgvārdus šim attēlam."
+                    elif vision_error.startswith(VISION_SKIPPED_PREFIX):
+                        analysis['ai_analysis']['info'] = vision_error
+                    elif vision_error.startswith(PROVIDER_UNAVAILABLE_PREFIX):
+                        # API īslaicīgi nav pieejams - rezultāts balstās tikai uz noteikumu pārbaudēm
+                        analysis['ai_analysis']['info'] = vision_error
+                        analysis['ai_analysis']['degraded'] = True
                     else:
                         analysis['ai_analysis']['error'] = f"MI attēla analīzes kļūda: {vision_error}."
                 
                 elif original_ai_labels: # original_ai_labels ir saraksts (var būt tukšs)
                     analysis['ai_analysis']['api_original_labels'] = original_ai_labels 
 
-                    phrases_for_comparison = original_ai_labels
-                    language_for_comparison = 'en' 
-                    labels_to_display_in_ui = original_ai_labels 
-
-                    if selected_language == 'lv':
-                        if enable_translation:
-                            translated_lv_phrases, translation_err_lv = translate_labels(original_ai_labels, 'lv')
-                            if translation_err_lv:
-                                analysis['ai_analysis']['translation_error'] = translation_err_lv
-                            elif translated_lv_phrases: # Pārbaudām vai tulkošana bija veiksmīga
-                                phrases_for_comparison = translated_lv_phrases
-                                language_for_comparison = 'lv'
-                                analysis['ai_analysis']['api_translated_labels'] = translated_lv_phrases
-                                labels_to_display_in_ui = translated_lv_phrases
-                        
+                    labels_to_display_in_ui = original_ai_labels
+
+                    if selected_language in LABEL_TRANSLATION_LANGUAGES and enable_translation and translation_result is None:
+                        if providers is not None:
+                            translation_result = providers.translate_labels(original_ai_labels, selected_language)
+                        else:
+                            translation_result = original_ai_labels, "Translation API klients nav pieejams vai nav ko tulkot."
+                    phrases_for_comparison, language_for_comparison, translation_error = comparison_phrases(
+                        original_ai_labels, selected_language, enable_translation, translation_result)
+                    if translation_error:
+                        analysis['ai_analysis']['translation_error'] = translation_error
+                    elif phrases_for_comparison is not original_ai_labels:
+                        analysis['ai_analysis']['api_translated_labels'] = phrases_for_comparison
+                        labels_to_display_in_ui = phrases_for_comparison
+
                     analysis['ai_analysis']['labels_for_display'] = labels_to_display_in_ui
                     analysis['ai_analysis']['used_language_for_comparison'] = language_for_comparison.upper()
 
-                    # Saņemam sakritības masku no compare_alt_text_with_ai_phrases
-                    matched_phrase_count, total_input_phrases, matched_keyword_mask = compare_alt_text_with_ai_phrases(
-                        alt_text,
-                        phrases_for_comparison,
-                        language=language_for_comparison
-                    )
+                    # Sakritības maska: no attēlu grupas kopīgās salīdzināšanas vai šim attēlam atsevišķi
+                    if phrase_match is not None:
+                        matched_phrase_count, total_input_phrases, matched_keyword_mask = phrase_match
+                    else:
+                        with stage_timer('normalization'):
+                            matched_phrase_count, total_input_phrases, matched_keyword_mask = compare_alt_text_with_ai_phrases(
+                                alt_text,
+                                phrases_for_comparison,
+                                language=language_for_comparison
+                            )
                     analysis['ai_analysis']['matched_phrase_count'] = matched_phrase_count
                     analysis['ai_analysis']['total_phrases_compared'] = total_input_phrases
                     analysis['ai_analysis']['matched_keyword_mask'] = matched_keyword_mask # Saglabājam masku
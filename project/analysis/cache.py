@@ -0,0 +1,449 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Pavedienu droša atmiņas kešatmiņa ar ierobežotu ierakstu skaitu (LRU izmešana)."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max(0, int(max_entries))
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteStore(ABC):
+    """
+    SQLite savienojuma ietvars, ko droši var lietot no vairākiem pavedieniem.
+    Pēc procesa dalīšanās (fork) savienojums tiek atvērts no jauna.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = None
+        self._pid = None
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        self.init_schema(conn)
+        conn.commit()
+        return conn
+
+    @abstractmethod
+    def init_schema(self, conn):
+        """Izveido tabulas; jāpārraksta apakšklasēs."""
+
+    @contextmanager
+    def connection(self):
+        with self._lock:
+            if self._conn is None or self._pid != os.getpid():
+                self._conn = self._connect()
+                self._pid = os.getpid()
+            try:
+                yield self._conn
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+
+class TranslationCache(SQLiteStore):
+    """
+    Atslēgvārdu tulkojumu kešatmiņa ar atslēgu (avota atslēgvārds, mērķa valoda).
+    Pirmais slānis ir atmiņas LRU, otrais - SQLite fails, kas saglabājas pēc restartēšanas.
+    """
+
+    QUERY_CHUNK_SIZE = 500
+
+    def __init__(self, path=None, memory_size=2048, max_entries=50000, ttl=0):
+        super().__init__(path)
+        self.memory = LRUCache(memory_size)
+        self.max_entries = max(0, int(max_entries))
+        self.ttl = max(0, int(ttl))
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def init_schema(self, conn):
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS translations ('
+            ' source TEXT NOT NULL, language TEXT NOT NULL, translated TEXT NOT NULL,'
+            ' stored_at REAL NOT NULL, last_used REAL NOT NULL,'
+            ' PRIMARY KEY (source, language))'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)')
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    def _is_fresh(self, stored_at, now):
+        return not self.ttl or stored_at >= now - self.ttl
+
+    def get_many(self, labels, language):
+        """Atgriež {atslēgvārds: tulkojums} tiem atslēgvārdiem, kas atrodami kešatmiņā."""
+        now = time.time()
+        found = {}
+        pending = []
+        for label in dict.fromkeys(labels):
+            entry = self.memory.get((label, language))
+            if entry is not None and self._is_fresh(entry[1], now):
+                found[label] = entry[0]
+            else:
+                pending.append(label)
+        memory_hits = len(found)
+
+        if pending and self.path:
+            try:
+                with self.connection() as conn:
+                    for start in range(0, len(pending), self.QUERY_CHUNK_SIZE):
+                        chunk = pending[start:start + self.QUERY_CHUNK_SIZE]
+                        placeholders = ','.join('?' * len(chunk))
+                        rows = conn.execute(
+                            f'SELECT source, translated, stored_at FROM translations '
+                            f'WHERE language = ? AND source IN ({placeholders})',
+                            [language, *chunk]
+                        ).fetchall()
+                        fresh = [row for row in rows if self._is_fresh(row[2], now)]
+                        for source, translated, stored_at in fresh:
+                            found[source] = translated
+                            self.memory.set((source, language), (translated, stored_at))
+                        if fresh:
+                            conn.executemany(
+                                'UPDATE translations SET last_used = ? WHERE source = ? AND language = ?',
+                                [(now, row[0], language) for row in fresh]
+                            )
+            except sqlite3.Error as e:
+                logger.warning(f"Tulkojumu kešatmiņas nolasīšanas kļūda: {e}")
+
+        disk_hits = len(found) - memory_hits
+        self._count(hits=len(found), memory_hits=memory_hits, disk_hits=disk_hits,
+                    misses=len(pending) - disk_hits)
+        return found
+
+    def set_many(self, translations, language):
+        """Saglabā {atslēgvārds: tulkojums} abos kešatmiņas slāņos."""
+        if not translations:
+            return
+        now = time.time()
+        for source, translated in translations.items():
+            self.memory.set((source, language), (translated, now))
+        self._count(stores=len(translations))
+
+        if not self.path:
+            return
+        try:
+            with self.connection() as conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO translations (source, language, translated, stored_at, last_used) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    [(source, language, translated, now, now) for source, translated in translations.items()]
+                )
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            logger.warning(f"Tulkojumu kešatmiņas saglabāšanas kļūda: {e}")
+
+    def _evict(self, conn, now):
+        evicted = 0
+        if self.ttl:
+            evicted += conn.execute('DELETE FROM translations WHERE stored_at < ?', (now - self.ttl,)).rowcount
+        if self.max_entries:
+            (total,) = conn.execute('SELECT COUNT(*) FROM translations').fetchone()
+            if total > self.max_entries:
+                evicted += conn.execute(
+                    'DELETE FROM translations WHERE rowid IN '
+                    '(SELECT rowid FROM translations ORDER BY last_used LIMIT ?)',
+                    (total - self.max_entries,)
+                ).rowcount
+        if evicted:
+            self._count(evictions=evicted)
+            logger.info(f"No tulkojumu kešatmiņas izmesti {evicted} ieraksti.")
+
+    def stats(self):
+        """Atgriež kešatmiņas trāpījumu/netrāpījumu skaitītājus."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['memory_entries'] = len(self.memory)
+        return stats
+
+
+class VisionLabelCache(SQLiteStore):
+    """
+    Vision API rezultātu kešatmiņa divos līmeņos:
+    - pēc absolūtā attēla URL ar HTTP validatoriem (ETag/Last-Modified) un satura jaucējkodu;
+    - pēc attēla baitu jaucējkoda, lai trāpītu arī pārdēvētām (piem., CDN) kopijām.
+    Atslēgvārdi tiek glabāti ar neapstrādātiem ticamības rādītājiem un piezīmi par
+    VISION_API_MIN_CONFIDENCE vērtību, tāpēc tos var pārfiltrēt bez atkārtota API izsaukuma.
+    """
+
+    def __init__(self, path=None, memory_size=2048, max_entries=20000):
+        super().__init__(path)
+        self.memory = LRUCache(memory_size)
+        self.max_entries = max(0, int(max_entries))
+        self._stats_lock = threading.Lock()
+        self._stats = {'url_hits': 0, 'url_misses': 0, 'hash_hits': 0, 'hash_misses': 0,
+                       'stores': 0, 'evictions': 0}
+
+    def init_schema(self, conn):
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS vision_urls ('
+            ' url TEXT PRIMARY KEY, content_hash TEXT NOT NULL, etag TEXT, last_modified TEXT,'
+            ' validated_at REAL NOT NULL, last_used REAL NOT NULL)'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS vision_labels ('
+            ' content_hash TEXT PRIMARY KEY, annotations TEXT NOT NULL, min_confidence REAL NOT NULL,'
+            ' stored_at REAL NOT NULL, last_used REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS vision_urls_last_used ON vision_urls (last_used)')
+        conn.execute('CREATE INDEX IF NOT EXISTS vision_labels_last_used ON vision_labels (last_used)')
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    def get_url_entry(self, url):
+        """Atgriež {'content_hash', 'etag', 'last_modified', 'validated_at'} vai None."""
+        entry = self.memory.get(('url', url))
+        if entry is None and self.path:
+            try:
+                with self.connection() as conn:
+                    row = conn.execute(
+                        'SELECT content_hash, etag, last_modified, validated_at FROM vision_urls WHERE url = ?',
+                        (url,)
+                    ).fetchone()
+                    if row:
+                        conn.execute('UPDATE vision_urls SET last_used = ? WHERE url = ?', (time.time(), url))
+            except sqlite3.Error as e:
+                logger.warning(f"Vision kešatmiņas nolasīšanas kļūda: {e}")
+                row = None
+            if row:
+                entry = dict(zip(('content_hash', 'etag', 'last_modified', 'validated_at'), row))
+                self.memory.set(('url', url), entry)
+        self._count(**{'url_hits' if entry else 'url_misses': 1})
+        return entry
+
+    def store_url(self, url, content_hash, etag=None, last_modified=None):
+        now = time.time()
+        entry = {'content_hash': content_hash, 'etag': etag, 'last_modified': last_modified, 'validated_at': now}
+        self.memory.set(('url', url), entry)
+        if not self.path:
+            return
+        try:
+            with self.connection() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO vision_urls (url, content_hash, etag, last_modified, validated_at, last_used) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (url, content_hash, etag, last_modified, now, now)
+                )
+                self._evict(conn, 'vision_urls')
+        except sqlite3.Error as e:
+            logger.warning(f"Vision kešatmiņas saglabāšanas kļūda: {e}")
+
+    def get_annotations(self, content_hash):
+        """Atgriež ([(description, score), ...], min_confidence) pēc satura jaucējkoda vai None."""
+        cached = self.memory.get(('hash', content_hash))
+        if cached is None and self.path:
+            try:
+                with self.connection() as conn:
+                    row = conn.execute(
+                        'SELECT annotations, min_confidence FROM vision_labels WHERE content_hash = ?',
+                        (content_hash,)
+                    ).fetchone()
+                    if row:
+                        conn.execute('UPDATE vision_labels SET last_used = ? WHERE content_hash = ?',
+                                     (time.time(), content_hash))
+            except sqlite3.Error as e:
+                logger.warning(f"Vision kešatmiņas nolasīšanas kļūda: {e}")
+                row = None
+            if row:
+                cached = ([tuple(item) for item in json.loads(row[0])], row[1])
+                self.memory.set(('hash', content_hash), cached)
+        self._count(**{'hash_hits' if cached else 'hash_misses': 1})
+        return cached
+
+    def store_annotations(self, content_hash, annotations, min_confidence):
+        now = time.time()
+        annotations = [(description, float(score)) for description, score in annotations]
+        self.memory.set(('hash', content_hash), (annotations, min_confidence))
+        self._count(stores=1)
+        if not self.path:
+            return
+        try:
+            with self.connection() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO vision_labels (content_hash, annotations, min_confidence, stored_at, last_used) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (content_hash, json.dumps(annotations), min_confidence, now, now)
+                )
+                self._evict(conn, 'vision_labels')
+        except sqlite3.Error as e:
+            logger.warning(f"Vision kešatmiņas saglabāšanas kļūda: {e}")
+
+    def _evict(self, conn, table):
+        if not self.max_entries:
+            return
+        (total,) = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()
+        if total > self.max_entries:
+            evicted = conn.execute(
+                f'DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} ORDER BY last_used LIMIT ?)',
+                (total - self.max_entries,)
+            ).rowcount
+            self._count(evictions=evicted)
+            logger.info(f"No Vision kešatmiņas ({table}) izmesti {evicted} ieraksti.")
+
+    def stats(self):
+        """Atgriež kešatmiņas trāpījumu/netrāpījumu skaitītājus."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['memory_entries'] = len(self.memory)
+        return stats
+
+
+class PageResultCache(SQLiteStore):
+    """
+    Visas lapas analīzes rezultātu kešatmiņa ar atslēgu (URL, valoda, analīzes iestatījumi).
+    Kopā ar rezultātu tiek glabāti lapas HTTP validatori (ETag/Last-Modified) un izvilkto
+    (src, alt) pāru jaucējkods, lai atkārtotā pārbaudē varētu veikt nosacījuma GET un
+    atkārtoti analizēt tikai tos attēlus, kuru src vai alt ir mainījies.
+    """
+
+    ENTRY_FIELDS = ('url', 'etag', 'last_modified', 'images_hash', 'stored_at')
+
+    def __init__(self, path=None, memory_size=64, max_entries=2000, ttl=0):
+        super().__init__(path)
+        self.memory = LRUCache(memory_size)
+        self.max_entries = max(0, int(max_entries))
+        self.ttl = max(0, int(ttl))
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def init_schema(self, conn):
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS page_results ('
+            ' key TEXT PRIMARY KEY, url TEXT NOT NULL, etag TEXT, last_modified TEXT,'
+            ' images_hash TEXT NOT NULL, payload TEXT NOT NULL,'
+            ' stored_at REAL NOT NULL, last_used REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS page_results_last_used ON page_results (last_used)')
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    def get(self, key):
+        """
+        Atgriež {'url', 'etag', 'last_modified', 'images_hash', 'stored_at', 'page'} vai None.
+        'page' ir katram izsaukumam jauna analyze_page rezultāta kopija.
+        """
+        now = time.time()
+        entry = self.memory.get(key)
+        if entry is None and self.path:
+            try:
+                with self.connection() as conn:
+                    row = conn.execute(
+                        f'SELECT {", ".join(self.ENTRY_FIELDS)}, payload FROM page_results WHERE key = ?', (key,)
+                    ).fetchone()
+                    if row:
+                        conn.execute('UPDATE page_results SET last_used = ? WHERE key = ?', (now, key))
+            except sqlite3.Error as e:
+                logger.warning(f"Lapu rezultātu kešatmiņas nolasīšanas kļūda: {e}")
+                row = None
+            if row:
+                entry = dict(zip(self.ENTRY_FIELDS + ('payload',), row))
+                self.memory.set(key, entry)
+        if entry is not None and self.ttl and entry['stored_at'] < now - self.ttl:
+            self.memory.pop(key)
+            entry = None
+        self._count(**{'hits' if entry else 'misses': 1})
+        if entry is None:
+            return None
+        result = {field: entry[field] for field in self.ENTRY_FIELDS}
+        result['page'] = json.loads(entry['payload'])
+        return result
+
+    def set(self, key, url, page, images_hash, etag=None, last_modified=None):
+        now = time.time()
+        entry = {'url': url, 'etag': etag, 'last_modified': last_modified, 'images_hash': images_hash,
+                 'stored_at': now, 'payload': json.dumps(page, ensure_ascii=False)}
+        self.memory.set(key, entry)
+        self._count(stores=1)
+        if not self.path:
+            return
+        try:
+            with self.connection() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO page_results '
+                    '(key, url, etag, last_modified, images_hash, payload, stored_at, last_used) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (key, url, etag, last_modified, images_hash, entry['payload'], now, now)
+                )
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            logger.warning(f"Lapu rezultātu kešatmiņas saglabāšanas kļūda: {e}")
+
+    def _evict(self, conn, now):
+        evicted = 0
+        if self.ttl:
+            evicted += conn.execute('DELETE FROM page_results WHERE stored_at < ?', (now - self.ttl,)).rowcount
+        if self.max_entries:
+            (total,) = conn.execute('SELECT COUNT(*) FROM page_results').fetchone()
+            if total > self.max_entries:
+                evicted += conn.execute(
+                    'DELETE FROM page_results WHERE rowid IN '
+                    '(SELECT rowid FROM page_results ORDER BY last_used LIMIT ?)',
+                    (total - self.max_entries,)
+                ).rowcount
+        if evicted:
+            self._count(evictions=evicted)
+            logger.info(f"No lapu rezultātu kešatmiņas izmesti {evicted} ieraksti.")
+
+    def stats(self):
+        """Atgriež kešatmiņas trāpījumu/netrāpījumu skaitītājus."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['memory_entries'] = len(self.memory)
+        return stats
@@ -0,0 +1,67 @@
+import os
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_pools = []
+
+
+class ClientPool:
+    """
+    Procesa līmeņa API klientu pūls, ko droši var lietot no vairākiem pavedieniem.
+    Klienti tiek izveidoti slinki un pēc pieprasījuma atgriezti pūlā atkārtotai
+    izmantošanai. Pēc procesa dalīšanās (fork) vecāka klienti (un to gRPC kanāli)
+    tiek atmesti, un bērnprocesā jauni tiek izveidoti tikai tad, kad tie vajadzīgi.
+    """
+
+    def __init__(self, name, factory, max_idle=8):
+        self.name = name
+        self.factory = factory
+        self.max_idle = max(0, int(max_idle))
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self.created_count = 0
+        _pools.append(self)
+
+    def _reset_after_fork(self):
+        # Vecāka procesa klientus neaizveram - to kanāli pieder vecākam
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self.created_count = 0
+
+    def acquire(self):
+        """Atgriež brīvu klientu no pūla vai izveido jaunu."""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset_after_fork()
+            if self._idle:
+                return self._idle.pop()
+        client = self.factory()
+        with self._lock:
+            self.created_count += 1
+        logger.info(f"{self.name} klients izveidots procesam {os.getpid()} (kopā {self.created_count}).")
+        return client
+
+    def release(self, client):
+        """Atgriež klientu pūlā. Klienti no cita procesa vai virs limita tiek atmesti."""
+        if client is None:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and len(self._idle) < self.max_idle:
+                self._idle.append(client)
+
+    def stats(self):
+        with self._lock:
+            return {'idle': len(self._idle), 'created': self.created_count}
+
+
+def _reset_pools_after_fork():
+    for pool in _pools:
+        pool._reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
@@ -0,0 +1,25 @@
+from flask import current_app
+
+from .providers import AnalysisProviders
+from .settings import AnalyzerSettings
+
+
+def get_analyzer_settings(app=None):
+    """
+    Flask adapteris: atgriež aplikācijas AnalyzerSettings, kas tiek sagatavoti
+    no app.config pirmajā izsaukumā un glabāti app.extensions.
+    """
+    app = app or current_app._get_current_object()
+    settings = app.extensions.get('analyzer_settings')
+    if settings is None:
+        settings = app.extensions.setdefault('analyzer_settings', AnalyzerSettings.from_config(app.config))
+    return settings
+
+
+def get_analysis_providers(app=None):
+    """Flask adapteris: atgriež aplikācijas AnalysisProviders (skat. get_analyzer_settings)."""
+    app = app or current_app._get_current_object()
+    providers = app.extensions.get('analysis_providers')
+    if providers is None:
+        providers = app.extensions.setdefault('analysis_providers', AnalysisProviders(get_analyzer_settings(app)))
+    return providers
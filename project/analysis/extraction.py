@@ -0,0 +1,158 @@
+import re
+import codecs
+import logging
+from collections import deque
+from html.parser import HTMLParser
+
+logger = logging.getLogger(__name__)
+
+# Atribūti, kas nepieciešami attēla analīzei; pārējie netiek saglabāti
+IMAGE_ATTRIBUTES = frozenset({'src', 'alt', 'srcset', 'sizes', 'role'})
+# <img> atribūts ar apvienotiem <picture> elementa <source srcset> variantiem (skat. identity.image_identity)
+PICTURE_SRCSET_ATTRIBUTE = 'picture_srcset'
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.IGNORECASE)
+SNIFF_BYTES = 1024
+
+
+class ImageCandidate:
+    """
+    Viena <img> taga dati analīzei. get() darbojas tāpat kā bs4 Tag.get(),
+    tāpēc objektu var tieši padot analyze_image_alt.
+    """
+
+    __slots__ = ('attrs', 'position')
+
+    def __init__(self, attrs, position):
+        self.attrs = attrs
+        self.position = position
+
+    def get(self, name, default=None):
+        return self.attrs.get(name, default)
+
+    def __repr__(self):
+        return f"ImageCandidate({self.position}, {self.attrs!r})"
+
+
+class ImageTagParser(HTMLParser):
+    """
+    Inkrementāls HTML parsētājs, kas savāc tikai <img> tagus (un pēc izvēles
+    <a href> saites), nebūvējot dokumenta koku. <picture> elementa <source srcset>
+    varianti netiek atgriezti kā atsevišķi attēli, bet pievienoti tā <img> atribūtā
+    PICTURE_SRCSET_ATTRIBUTE.
+    """
+
+    def __init__(self, collect_links=False):
+        super().__init__(convert_charrefs=True)
+        self.collect_links = collect_links
+        self._pending = deque()
+        self._links = []
+        self._count = 0
+        self._picture_sources = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a' and self.collect_links:
+            href = dict(attrs).get('href')
+            if href and href.strip():
+                self._links.append(href.strip())
+            return
+        if tag == 'picture':
+            self._picture_sources = []
+            return
+        if tag == 'source':
+            srcset = dict(attrs).get('srcset')
+            if self._picture_sources is not None and srcset and srcset.strip():
+                self._picture_sources.append(srcset.strip())
+            return
+        if tag != 'img':
+            return
+        kept = {}
+        for name, value in attrs:
+            if name in IMAGE_ATTRIBUTES or name.startswith('aria-'):
+                # Atribūts bez vērtības (piem., <img alt>) atbilst tukšai virknei, kā bs4
+                kept[name] = '' if value is None else value
+        if self._picture_sources:
+            kept[PICTURE_SRCSET_ATTRIBUTE] = ', '.join(self._picture_sources)
+        self._pending.append(ImageCandidate(kept, self._count))
+        self._count += 1
+
+    def handle_endtag(self, tag):
+        if tag == 'picture':
+            self._picture_sources = None
+
+    def drain(self):
+        """Atgriež un izņem līdz šim atrastos attēlus."""
+        while self._pending:
+            yield self._pending.popleft()
+
+    def drain_links(self):
+        """Atgriež un izņem līdz šim atrastās saites."""
+        links, self._links = self._links, []
+        return links
+
+
+def sniff_encoding(head, declared=None):
+    """Nosaka kodējumu: Content-Type galvene, BOM, <meta charset> vai UTF-8."""
+    for candidate in (declared, _bom_encoding(head), _meta_encoding(head)):
+        if not candidate:
+            continue
+        try:
+            return codecs.lookup(candidate).name
+        except LookupError:
+            logger.debug(f"Nezināms kodējums: {candidate}")
+    return 'utf-8'
+
+
+def _bom_encoding(head):
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    return None
+
+
+def _meta_encoding(head):
+    match = META_CHARSET_RE.search(head[:SNIFF_BYTES])
+    return match.group(1).decode('ascii', 'ignore') if match else None
+
+
+def iter_image_candidates(chunks, encoding=None, links=None):
+    """
+    Straumējot izvelk <img> tagus no HTML baitu gabaliem.
+    Attēli tiek atgriezti, tiklīdz tie ir nolasīti, tāpēc analīzi var sākt pirms
+    lejupielādes beigām, un atmiņā tiek turēta tikai neapstrādātā teksta aste.
+    Ja padots links saraksts, tajā tiek pievienotas lapas <a href> vērtības.
+    """
+    parser = ImageTagParser(collect_links=links is not None)
+    decoder = None
+    head = b''
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if decoder is None:
+            head += chunk
+            if len(head) < SNIFF_BYTES:
+                continue
+            decoder = codecs.getincrementaldecoder(sniff_encoding(head, encoding))(errors='replace')
+            chunk, head = head, b''
+        parser.feed(decoder.decode(chunk))
+        yield from parser.drain()
+        if links is not None:
+            links.extend(parser.drain_links())
+
+    if decoder is None:
+        decoder = codecs.getincrementaldecoder(sniff_encoding(head, encoding))(errors='replace')
+        parser.feed(decoder.decode(head))
+    parser.feed(decoder.decode(b'', final=True))
+    parser.close()
+    yield from parser.drain()
+    if links is not None:
+        links.extend(parser.drain_links())
+
+
+def extract_image_candidates(html):
+    """Izvelk visus <img> tagus no jau nolasīta HTML teksta."""
+    parser = ImageTagParser()
+    parser.feed(html)
+    parser.close()
+    return list(parser.drain())
@@ -0,0 +1,163 @@
+import os
+import re
+import logging
+import threading
+from contextlib import contextmanager
+
+import charset_normalizer
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# urllib3 atkodē brotli tikai tad, ja ir instalēta kāda no brotli bibliotēkām
+try:
+    import brotli  # noqa: F401
+    brotli_available = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        brotli_available = True
+    except ImportError:
+        brotli_available = False
+
+ACCEPT_ENCODING = 'gzip, deflate, br' if brotli_available else 'gzip, deflate'
+
+CHARSET_RE = re.compile(r'charset=["\']?([\w.:-]+)')
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+class ResponseTooLarge(requests.exceptions.RequestException):
+    """Atbildes saturs pārsniedz atļauto izmēru."""
+
+
+class HttpResponse:
+    """
+    HTTP atbilde ar izmēra ierobežojumu un validatoriem (ETag/Last-Modified).
+    Saturu var lasīt straumējot (iter_content) vai pilnībā (read/content/text).
+    """
+
+    def __init__(self, response, max_bytes=None):
+        self.response = response
+        self.max_bytes = max_bytes
+        self.url = response.url
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.not_modified = response.status_code == 304
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified')
+        self._content = None
+
+    @property
+    def content_type(self):
+        return self.headers.get('content-type', '').lower()
+
+    @property
+    def charset(self):
+        """Kodējums, kas norādīts Content-Type galvenē, vai None."""
+        match = CHARSET_RE.search(self.content_type)
+        return match.group(1) if match else None
+
+    def iter_content(self, chunk_size=65536):
+        """Atgriež atkodēta satura gabalus; pārsniedzot max_bytes, izraisa ResponseTooLarge."""
+        size = 0
+        for chunk in self.response.iter_content(chunk_size=chunk_size):
+            size += len(chunk)
+            if self.max_bytes and size > self.max_bytes:
+                raise ResponseTooLarge(f"Atbilde pārsniedz {self.max_bytes} baitu limitu.", response=self.response)
+            yield chunk
+
+    def read(self):
+        if self._content is None:
+            self._content = b''.join(self.iter_content())
+        return self._content
+
+    @property
+    def content(self):
+        return self.read()
+
+    @property
+    def text(self):
+        # Tāpat kā requests.Response.text: kodējums no galvenēm, citādi noteikts pēc satura
+        content = self.read()
+        encoding = self.response.encoding
+        if not encoding:
+            best_match = charset_normalizer.from_bytes(content).best()
+            encoding = best_match.encoding if best_match else 'utf-8'
+        return str(content, encoding, errors='replace')
+
+    def raise_for_status(self):
+        self.response.raise_for_status()
+
+
+def create_http_session(user_agent=None, pool_connections=16, pool_maxsize=10):
+    """Izveido requests.Session ar savienojumu pūlu un keep-alive."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({
+        'Accept-Encoding': ACCEPT_ENCODING,
+        'Connection': 'keep-alive',
+    })
+    if user_agent:
+        session.headers['User-Agent'] = user_agent
+    return session
+
+
+def get_http_session(settings=None):
+    """
+    Atgriež procesa līmeņa HTTP sesiju (viena katram darba procesam).
+    Pēc procesa dalīšanās (fork) tiek izveidota jauna sesija ar jauniem savienojumiem.
+    settings - AnalyzerSettings (User-Agent un savienojumu pūla izmēri); ja nav norādīti - noklusējuma vērtības.
+    """
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        options = {}
+        if settings is not None:
+            options = dict(user_agent=settings.user_agent, pool_connections=settings.http_pool_connections,
+                           pool_maxsize=settings.http_pool_maxsize)
+        with _session_lock:
+            if _session is None or _session_pid != os.getpid():
+                _session = create_http_session(**options)
+                _session_pid = os.getpid()
+                logger.info(f"HTTP sesija izveidota procesam {_session_pid}.")
+    return _session
+
+
+@contextmanager
+def stream_url(url, settings=None, session=None, timeout=None, max_bytes=None, etag=None, last_modified=None,
+               headers=None):
+    """
+    Atver URL straumēšanai, izmantojot kopīgo sesiju; savienojums tiek atbrīvots, izejot no bloka.
+    settings - AnalyzerSettings: sesija (skat. get_http_session), timeout un max_bytes, ja tie nav norādīti.
+    etag/last_modified - validatori nosacījuma GET pieprasījumam (atbilde 304 => not_modified).
+    max_bytes - maksimālais (atkodētā) satura izmērs; lielākas atbildes izraisa ResponseTooLarge.
+    """
+    if session is None:
+        session = get_http_session(settings)
+    if settings is not None:
+        timeout = timeout if timeout is not None else settings.request_timeout
+        max_bytes = max_bytes if max_bytes is not None else settings.max_response_bytes
+
+    request_headers = dict(headers or {})
+    if etag:
+        request_headers['If-None-Match'] = etag
+    if last_modified:
+        request_headers['If-Modified-Since'] = last_modified
+
+    with session.get(url, headers=request_headers, timeout=timeout, allow_redirects=True, stream=True) as response:
+        content_length = response.headers.get('Content-Length')
+        if max_bytes and content_length and content_length.isdigit() and int(content_length) > max_bytes:
+            raise ResponseTooLarge(f"Atbilde ({content_length} baiti) pārsniedz {max_bytes} baitu limitu.", response=response)
+        yield HttpResponse(response, max_bytes)
+
+
+def fetch_url(url, **kwargs):
+    """Lejupielādē URL pilnībā (ar izmēra ierobežojumu); parametri kā stream_url."""
+    with stream_url(url, **kwargs) as response:
+        response.read()
+        return response
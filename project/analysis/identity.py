@@ -0,0 +1,87 @@
+import re
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+
+from .extraction import PICTURE_SRCSET_ATTRIBUTE
+
+# Vaicājuma parametri, ar kuriem attēlu CDN maina tikai izmēru, kvalitāti vai formātu
+RESIZE_QUERY_PARAMS = frozenset({
+    'w', 'h', 'width', 'height', 'resize', 'size', 'fit', 'crop', 'q', 'quality',
+    'dpr', 'fm', 'format', 'auto', 'scale',
+})
+# Attēlu CDN (domēni un to apakšdomēni), kuriem RESIZE_QUERY_PARAMS tiek noņemti; citos
+# serveros tie var izvēlēties citu attēlu vai izgriezumu, tāpēc URL netiek mainīts
+RESIZING_CDN_HOSTS = (
+    'imgix.net', 'images.unsplash.com', 'images.ctfassets.net', 'cdn.sanity.io',
+    'cdn.shopify.com', 'i0.wp.com', 'i1.wp.com', 'i2.wp.com', 'images.prismic.io',
+)
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+# WordPress augšupielāžu izmēru varianti "-300x200.jpg" (arī Retina "-300x200@2x.jpg");
+# ārpus WORDPRESS_UPLOADS_PATH šādi sufiksi var apzīmēt atšķirīgus attēlus (piem., izgriezumus)
+WORDPRESS_UPLOADS_PATH = '/wp-content/uploads/'
+SIZE_SUFFIX_RE = re.compile(r'(?:-\d+x\d+)?(?:@\d(?:\.\d+)?x)?(?=\.\w+$)')
+
+
+def _is_resizing_cdn(host):
+    return any(host == cdn or host.endswith('.' + cdn) for cdn in RESIZING_CDN_HOSTS)
+
+
+def canonical_image_url(url):
+    """
+    Attēla URL normalizētā forma viena attēla izmēru variantu atpazīšanai: shēma un
+    resursdators mazajiem burtiem, bez noklusējuma porta un fragmenta, vaicājuma parametri
+    sakārtoti. Izmēra varianti tiek apvienoti tikai zināmos gadījumos: WordPress augšupielāžu
+    izmēru sufiksi (skat. SIZE_SUFFIX_RE) un izmēra/kvalitātes parametri RESIZING_CDN_HOSTS.
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS:
+        return url.strip()
+    host = (parts.hostname or '').lower()
+    netloc = host if parts.port is None or str(parts.port) == DEFAULT_PORTS[scheme] else f'{host}:{parts.port}'
+    path = parts.path or '/'
+    if WORDPRESS_UPLOADS_PATH in path:
+        path = SIZE_SUFFIX_RE.sub('', path, count=1)
+    resizing_cdn = _is_resizing_cdn(host)
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if not (resizing_cdn and key.lower() in RESIZE_QUERY_PARAMS))
+    return urlunsplit((scheme, netloc, path, urlencode(query), ''))
+
+
+def parse_srcset(srcset):
+    """Sadala srcset atribūtu [(url, deskriptors), ...] sarakstā (deskriptors, piem., '800w' vai '2x')."""
+    candidates = []
+    for item in (srcset or '').split(','):
+        fields = item.split()
+        if fields:
+            candidates.append((fields[0], fields[1] if len(fields) > 1 else '1x'))
+    return candidates
+
+
+def _descriptor_size(descriptor):
+    try:
+        return float(descriptor[:-1])
+    except ValueError:
+        return 0.0
+
+
+def image_identity(img_tag, page_url):
+    """
+    Attēla identitāte lapā - normalizēts absolūtais attēla URL. Ja src nav norādīts vai
+    tas ir data: vietturis (piem., slinkajai ielādei), tiek izmantots lielākais srcset variants
+    (arī no <picture> <source srcset>, skat. extraction.PICTURE_SRCSET_ATTRIBUTE).
+    Atgriež None, ja attēlam nav adreses.
+    """
+    src = (img_tag.get('src') or '').strip()
+    if not src or src.lower().startswith('data:'):
+        variants = parse_srcset(img_tag.get('srcset')) + parse_srcset(img_tag.get(PICTURE_SRCSET_ATTRIBUTE))
+        candidates = [(url, descriptor) for url, descriptor in variants if not url.lower().startswith('data:')]
+        if not candidates:
+            return None
+        src = max(candidates, key=lambda candidate: _descriptor_size(candidate[1]))[0]
+    try:
+        return canonical_image_url(urljoin(page_url, src))
+    except ValueError:
+        return src
@@ -0,0 +1,186 @@
+import io
+import struct
+import hashlib
+import logging
+
+import requests
+
+try:
+    from PIL import Image
+    pillow_available = True
+except ImportError:
+    Image = None
+    pillow_available = False
+
+logger = logging.getLogger(__name__)
+
+# Vision kļūdu ziņojumu sākums attēliem, kas apzināti netika sūtīti analīzei
+VISION_SKIPPED_PREFIX = "Attēls netika sūtīts MI analīzei"
+
+DOWNSCALE_JPEG_QUALITY = 85
+
+
+class PrefetchedImage:
+    """
+    Iepriekš lejupielādēts attēls: satura jaucējkods un kešatmiņas galvenes, kā arī
+    (ja saglabāts) saturs, tā izmēri un iemesls, kāpēc attēls nav jāsūta Vision API.
+    content ir None, ja saturs netika saglabāts vai serveris atbildēja 304.
+    """
+
+    __slots__ = ('uri', 'content_hash', 'etag', 'last_modified', 'content', 'content_type',
+                 'width', 'height', 'skip_reason')
+
+    def __init__(self, uri, content_hash, etag=None, last_modified=None, content=None, content_type='',
+                 width=None, height=None, skip_reason=None):
+        self.uri = uri
+        self.content_hash = content_hash
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content = content
+        self.content_type = content_type
+        self.width = width
+        self.height = height
+        self.skip_reason = skip_reason
+
+    @property
+    def fingerprint(self):
+        return self.content_hash, self.etag, self.last_modified
+
+
+def image_dimensions(data):
+    """
+    Nolasa attēla platumu un augstumu no faila galvenes (PNG, GIF, JPEG, WebP, BMP),
+    neatkodējot pašu attēlu. Atgriež (width, height) vai None, ja formāts nav atpazīts.
+    """
+    try:
+        if data[:8] == b'\x89PNG\r\n\x1a\n' and data[12:16] == b'IHDR':
+            return struct.unpack('>II', data[16:24])
+        if data[:6] in (b'GIF87a', b'GIF89a'):
+            return struct.unpack('<HH', data[6:10])
+        if data[:2] == b'BM':
+            width, height = struct.unpack('<ii', data[18:26])
+            return width, abs(height)
+        if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+            chunk = data[12:16]
+            if chunk == b'VP8 ':
+                width, height = struct.unpack('<HH', data[26:30])
+                return width & 0x3fff, height & 0x3fff
+            if chunk == b'VP8L':
+                bits = int.from_bytes(data[21:25], 'little')
+                return (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1
+            if chunk == b'VP8X':
+                return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+        if data[:2] == b'\xff\xd8':
+            offset = 2
+            while offset + 9 < len(data):
+                if data[offset] != 0xff:
+                    offset += 1
+                    continue
+                marker = data[offset + 1]
+                if marker in (0xd8, 0x01) or 0xd0 <= marker <= 0xd7 or marker == 0xff:
+                    offset += 1 if marker == 0xff else 2
+                    continue
+                segment_length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+                # SOF0-SOF15 (izņemot DHT, JPG un DAC) satur izmērus
+                if 0xc0 <= marker <= 0xcf and marker not in (0xc4, 0xc8, 0xcc):
+                    height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+                    return width, height
+                offset += 2 + segment_length
+    except struct.error:
+        pass
+    return None
+
+
+def fetch_image(session, image_uri, url_entry=None, timeout=None, max_bytes=10 * 1024 * 1024, keep_content=False):
+    """
+    Lejupielādē attēlu (nosacījuma GET, ja ir url_entry ar ETag/Last-Modified) un nosaka
+    tā satura jaucējkodu. Ar keep_content saglabā arī saturu un pārbauda tā tipu un izmērus.
+    Atgriež PrefetchedImage vai None, ja attēlu neizdevās ielādēt vai tas pārsniedz max_bytes
+    (ar keep_content pārāk lieli un ne-attēlu faili tiek atgriezti ar skip_reason).
+    """
+    headers = {}
+    if url_entry:
+        if url_entry.get('etag'):
+            headers['If-None-Match'] = url_entry['etag']
+        if url_entry.get('last_modified'):
+            headers['If-Modified-Since'] = url_entry['last_modified']
+    try:
+        with session.get(image_uri, headers=headers, timeout=timeout, stream=True) as response:
+            if response.status_code == 304 and url_entry:
+                return PrefetchedImage(image_uri, url_entry['content_hash'],
+                                       response.headers.get('ETag', url_entry.get('etag')),
+                                       response.headers.get('Last-Modified', url_entry.get('last_modified')))
+            response.raise_for_status()
+
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            if keep_content and content_type and (not content_type.startswith('image/') or content_type == 'image/svg+xml'):
+                return _skipped(image_uri, f"saturs nav rastra attēls ({content_type})")
+            declared_length = response.headers.get('Content-Length')
+            if declared_length and declared_length.isdigit() and int(declared_length) > max_bytes:
+                return _skipped(image_uri, f"attēls pārsniedz {max_bytes} baitus") if keep_content else None
+
+            digest = hashlib.sha256()
+            content = bytearray() if keep_content else None
+            size = 0
+            for chunk in response.iter_content(chunk_size=65536):
+                size += len(chunk)
+                if size > max_bytes:
+                    logger.info(f"Attēls pārsniedz {max_bytes} baitus: {image_uri[:80]}")
+                    return _skipped(image_uri, f"attēls pārsniedz {max_bytes} baitus") if keep_content else None
+                digest.update(chunk)
+                if keep_content:
+                    content.extend(chunk)
+
+            image = PrefetchedImage(image_uri, digest.hexdigest(), response.headers.get('ETag'),
+                                    response.headers.get('Last-Modified'), content_type=content_type)
+            if keep_content:
+                image.content = bytes(content)
+                dimensions = image_dimensions(image.content)
+                if dimensions:
+                    image.width, image.height = dimensions
+            return image
+    except requests.exceptions.RequestException as e:
+        logger.debug(f"Neizdevās ielādēt attēlu '{image_uri[:80]}': {e}")
+        return None
+
+
+def _skipped(image_uri, reason):
+    return PrefetchedImage(image_uri, None, skip_reason=reason)
+
+
+def check_image_size(image, min_edge):
+    """Atzīmē izsekošanas pikseļus un atstarpju attēlus (kāda mala īsāka par min_edge) kā izlaižamus."""
+    if image.skip_reason or image.width is None or image.height is None:
+        return image
+    if image.width < min_edge or image.height < min_edge:
+        image.skip_reason = f"attēls ir pārāk mazs ({image.width}×{image.height} px)"
+    return image
+
+
+def prepare_vision_content(image, max_edge):
+    """
+    Atgriež baitus sūtīšanai Vision API image.content laukā: attēli, kuru garākā mala
+    pārsniedz max_edge, tiek samazināti un pārkodēti JPEG formātā (ja pieejams Pillow).
+    """
+    content = image.content
+    if not pillow_available or not max_edge or image.width is None or max(image.width, image.height) <= max_edge:
+        return content
+    try:
+        with Image.open(io.BytesIO(content)) as source:
+            source.draft('RGB', (max_edge, max_edge))
+            if source.mode in ('RGBA', 'LA', 'P'):
+                # Caurspīdīgos attēlus novietojam uz balta fona
+                source = source.convert('RGBA')
+                background = Image.new('RGB', source.size, (255, 255, 255))
+                background.paste(source, mask=source.getchannel('A'))
+                source = background
+            elif source.mode != 'RGB':
+                source = source.convert('RGB')
+            source.thumbnail((max_edge, max_edge))
+            output = io.BytesIO()
+            source.save(output, 'JPEG', quality=DOWNSCALE_JPEG_QUALITY)
+    except Exception as e:
+        logger.debug(f"Neizdevās samazināt attēlu '{image.uri[:80]}': {e}")
+        return content
+    downscaled = output.getvalue()
+    return downscaled if len(downscaled) < len(content) else content
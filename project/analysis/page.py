@@ -0,0 +1,268 @@
+import json
+import hashlib
+import logging
+import time
+import threading
+from collections import Counter
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+from .analyzer import is_svg_file, is_reusable_result
+from .context import get_analyzer_settings
+from .extraction import iter_image_candidates
+from .fetcher import stream_url, ResponseTooLarge
+from .pipeline import iter_image_analyses, resolve_languages, language_key
+from .providers import get_page_cache
+from .summary import ResultSummary, summarize_results
+from ..metrics import PAGES_ANALYZED, ERRORS, record_stage, timed_iter
+
+logger = logging.getLogger(__name__)
+
+
+class NotHtmlError(Exception):
+    """Lapas saturs nav HTML."""
+
+    def __init__(self, content_type):
+        super().__init__(f"Saturs nav HTML (Tips: {content_type}).")
+        self.content_type = content_type
+
+
+def validate_page_url(page_url):
+    """Atgriež kļūdas ziņojumu, ja URL nav derīgs analīzei, citādi None."""
+    if not page_url:
+        return "Lūdzu, ievadiet URL adresi."
+    if urlparse(page_url).scheme not in ['http', 'https']:
+        return "URL jāsākas ar http:// vai https://."
+    return None
+
+
+def parse_languages(value):
+    """
+    Valodu saraksts no pieprasījuma parametra: komatatdalīta virkne ('lv,en'), saraksts
+    (JSON masīvs vai atkārtots formas lauks) vai None; tukšas vērtības tiek izlaistas.
+    """
+    if not value:
+        return []
+    items = [value] if isinstance(value, str) else value
+    return [language.strip() for item in items for language in str(item).split(',') if language.strip()]
+
+
+def validate_languages(languages, supported_languages):
+    """Atgriež kļūdas ziņojumu, ja kāda no valodām nav SUPPORTED_LANGUAGES, citādi None."""
+    for language in languages:
+        if language not in supported_languages:
+            return f"Neatbalstīta valoda: '{language}'."
+    return None
+
+
+def describe_page_error(error, page_url, config):
+    """Pārvērš lapas ielādes vai analīzes izņēmumu lietotājam saprotamā kļūdas ziņojumā."""
+    if isinstance(error, NotHtmlError):
+        return str(error)
+    if isinstance(error, requests.exceptions.Timeout):
+        return f"Vaicājuma laiks ({config.get('REQUEST_TIMEOUT')}s) pārsniegts."
+    if isinstance(error, requests.exceptions.HTTPError):
+        status_code = error.response.status_code if error.response is not None else 'N/A'
+        if status_code == 404:
+            return f"Lapa nav atrasta (404): '{page_url}'."
+        if status_code == 403:
+            return f"Piekļuve liegta (403): '{page_url}'."
+        return f"HTTP kļūda {status_code} piekļūstot '{page_url}'."
+    if isinstance(error, requests.exceptions.ConnectionError):
+        server_host = urlparse(page_url).netloc or page_url
+        return f"Neizdevās savienoties ar '{server_host}'."
+    if isinstance(error, ResponseTooLarge):
+        return f"Lapa ir pārāk liela analīzei (vairāk nekā {config.get('HTTP_MAX_RESPONSE_BYTES')} baiti)."
+    if isinstance(error, requests.exceptions.InvalidURL):
+        return f"Nederīgs URL formāts: '{page_url}'."
+    if isinstance(error, requests.exceptions.RequestException):
+        return f"Tīkla pieprasījuma kļūda: {error}"
+    return "Radās neparedzēta iekšēja kļūda."
+
+
+def page_cache_key(page_url, languages, settings):
+    """Lapu analīžu kešatmiņas atslēga: URL, valodas (skat. pipeline.language_key) un analīzes iestatījumu jaucējkods."""
+    return f"{settings.analysis_fingerprint()}:{language_key(languages)}:{page_url}"
+
+
+class _ReusedResults:
+    """
+    result_cache saskarne (get/set, skat. iter_image_analyses) pār iepriekšējās lapas
+    analīzes rezultātiem: attēli ar nemainītu src un alt netiek analizēti no jauna.
+    Rezultāti ar kļūdām netiek izmantoti; pārējās atslēgas tiek nodotas fallback kešatmiņai.
+    """
+
+    def __init__(self, previous_results, languages, fallback=None):
+        self._previous = {
+            (result['src'], result['alt'], language_key(languages)): result
+            for result in previous_results if is_reusable_result(result)
+        }
+        self._fallback = fallback
+        self._lock = threading.Lock()
+        self.reused = 0
+
+    def get(self, key, default=None):
+        result = self._previous.get(key)
+        if result is not None:
+            with self._lock:
+                self.reused += 1
+            return result
+        return self._fallback.get(key, default) if self._fallback is not None else default
+
+    def set(self, key, value):
+        if self._fallback is not None:
+            self._fallback.set(key, value)
+
+
+def _counted(items, counter, images_digest=None):
+    for item in items:
+        counter['found'] += 1
+        if images_digest is not None:
+            images_digest.update(json.dumps([item.get('src'), item.get('alt')]).encode('utf-8'))
+        yield item
+
+
+def analyze_html(chunks, page_url, selected_language='lv', encoding=None, links=None,
+                 result_cache=None, on_result=None, images_digest=None, languages=None, settings=None, providers=None):
+    """
+    Izvelk <img> tagus no HTML baitu daļu plūsmas un analizē tos, kamēr plūsma vēl tiek lasīta.
+    page_url tiek izmantots relatīvo attēlu adrešu atrisināšanai. links - saraksts, kurā
+    tiek savāktas lapas saites (kā tās norādītas lapā). images_digest - hashlib objekts,
+    kas tiek papildināts ar katra <img> taga (src, alt). Pārējie argumenti - skat. analyze_page.
+    """
+    results = []
+    summary = ResultSummary()
+    image_count = 0
+    svg_count = 0
+    empty_src_count = 0
+
+    progress = {'found': 0}
+    candidates = _counted(timed_iter(iter_image_candidates(chunks, encoding=encoding, links=links), 'parse'),
+                          progress, images_digest)
+    languages = resolve_languages(selected_language, languages)
+    for img, image_analysis_data in iter_image_analyses(candidates, page_url, selected_language, result_cache,
+                                                        settings=settings, providers=providers, languages=languages):
+        image_count += 1
+        if on_result is not None:
+            on_result(image_analysis_data, image_count, progress['found'])
+        if image_analysis_data is not None:
+            results.append(image_analysis_data)
+            summary.add(image_analysis_data)
+            continue
+        # Pārbaudām, kāpēc attēls tika izlaists
+        src = img.get('src', '')
+        if not src or src.strip() == '':
+            empty_src_count += 1
+        elif is_svg_file(urljoin(page_url, src)):
+            svg_count += 1
+
+    logger.info(f"Atrasti {image_count} <img> tagi lapā {page_url}.")
+    # Informējam par izlaistajiem
+    if svg_count > 0 or empty_src_count > 0:
+        logger.info(f"Izlaisti {svg_count} SVG attēli un {empty_src_count} attēli bez src")
+
+    # Cik reizes katrs attēls (arī citos izmēra variantos) parādās lapas rezultātos
+    occurrences = Counter(result.get('image_id') for result in results if result.get('image_id'))
+    for result in results:
+        result['occurrences'] = occurrences.get(result.get('image_id'), 1)
+
+    return {
+        'url': page_url,
+        'languages': list(languages),
+        'results': results,
+        'image_count': image_count,
+        'unique_image_count': len(occurrences) + sum(1 for result in results if not result.get('image_id')),
+        'summary': summary.as_dict(),
+        'svg_count': svg_count,
+        'empty_src_count': empty_src_count,
+    }
+
+
+def _replay_cached(page_analysis, on_result):
+    image_count = page_analysis['image_count']
+    results = page_analysis['results']
+    for images_done, result in enumerate(results, 1):
+        on_result(result, images_done, image_count)
+    for images_done in range(len(results) + 1, image_count + 1):
+        on_result(None, images_done, image_count)
+
+
+def analyze_page(page_url, selected_language='lv', links=None, result_cache=None, on_result=None,
+                 use_page_cache=False, languages=None, settings=None, providers=None):
+    """
+    Lejupielādē lapu straumējot, izvelk <img> tagus un analizē tos, kamēr lapa vēl lādējas.
+    Atgriež {'url', 'languages', 'results', 'image_count', 'unique_image_count', 'summary', 'svg_count',
+    'empty_src_count'}; summary - rezultātu skaits katram filtram (skat. summary.RESULT_FILTERS);
+    katram rezultātam ir image_id un occurrences - cik reizes šis attēls parādās lapā.
+    links - saraksts, kurā tiek savāktas lapas saites (absolūtas, pēc novirzīšanas).
+    result_cache - kopīga attēlu rezultātu kešatmiņa (skat. iter_image_analyses).
+    on_result(result, images_done, images_found) - izsaukts pēc katra attēla analīzes
+    (result ir None izlaistiem attēliem); images_found aug, kamēr lapa tiek lasīta.
+    use_page_cache - izmantot lapu analīžu kešatmiņu:
+    lapa tiek pieprasīta ar nosacījuma GET un, ja tā nav mainījusies (304), tiek atgriezts
+    saglabātais rezultāts; citādi no jauna tiek analizēti tikai attēli ar mainītu src vai alt.
+    Kopā ar links kešatmiņa netiek izmantota, jo 304 atbildē saišu nav.
+    languages - papildu valodas, kas tiek analizētas tajā pašā gājienā ar vienu MI rezultātu
+    katram attēlam (skat. iter_image_analyses).
+    settings/providers - AnalyzerSettings un AnalysisProviders; ja nav norādīti,
+    tiek ņemti no pašreizējās Flask aplikācijas (skat. context.py).
+    Tīkla kļūdas tiek izmestas kā requests izņēmumi, ne-HTML saturs - kā NotHtmlError.
+    """
+    languages = resolve_languages(selected_language, languages)
+    if settings is None:
+        settings = get_analyzer_settings()
+    page_cache = cached = None
+    if use_page_cache and links is None:
+        page_cache = get_page_cache(settings)
+    if page_cache is not None:
+        cache_key = page_cache_key(page_url, languages, settings)
+        cached = page_cache.get(cache_key)
+    validators = {'etag': cached['etag'], 'last_modified': cached['last_modified']} if cached else {}
+
+    started = time.perf_counter()
+    try:
+        with stream_url(page_url, settings, **validators) as response:
+            record_stage('connect', time.perf_counter() - started)
+            if response.not_modified and cached:
+                logger.info(f"Lapa {page_url} nav mainījusies (304), izmantots saglabātais rezultāts.")
+                PAGES_ANALYZED.labels('not_modified').inc()
+                page_analysis = cached['page']
+                page_analysis.setdefault('languages', list(languages))
+                if 'summary' not in page_analysis:
+                    page_analysis['summary'] = summarize_results(page_analysis['results'])
+                if on_result is not None:
+                    _replay_cached(page_analysis, on_result)
+                return page_analysis
+            response.raise_for_status()
+
+            content_type = response.content_type
+            if 'text/html' not in content_type:
+                raise NotHtmlError(content_type)
+
+            raw_links = [] if links is not None else None
+            images_digest = hashlib.sha256() if page_cache is not None else None
+            if cached:
+                result_cache = _ReusedResults(cached['page']['results'], languages, result_cache)
+            page_analysis = analyze_html(timed_iter(response.iter_content(), 'fetch'), page_url, selected_language,
+                                         encoding=response.charset, links=raw_links,
+                                         result_cache=result_cache, on_result=on_result,
+                                         images_digest=images_digest, languages=languages,
+                                         settings=settings, providers=providers)
+
+            if links is not None:
+                links.extend(urljoin(response.url, href) for href in raw_links)
+    except Exception as e:
+        ERRORS.labels('page', e.__class__.__name__).inc()
+        raise
+    PAGES_ANALYZED.labels('analyzed').inc()
+
+    if page_cache is not None:
+        images_hash = images_digest.hexdigest()
+        if cached:
+            unchanged = "nemainīti" if images_hash == cached['images_hash'] else "mainīti"
+            logger.info(f"Lapas {page_url} attēli ({unchanged}): {result_cache.reused} no "
+                        f"{page_analysis['image_count']} izmantoti no iepriekšējās analīzes.")
+        page_cache.set(cache_key, page_url, page_analysis, images_hash,
+                       etag=response.etag, last_modified=response.last_modified)
+    return page_analysis
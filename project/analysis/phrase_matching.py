@@ -0,0 +1,215 @@
+import logging
+import threading
+from itertools import chain, islice
+
+from .word_normalization import tokenize_text, normalize_many
+
+try:
+    import numpy as np
+    numpy_available = True
+except ImportError:
+    np = None
+    numpy_available = False
+
+logger = logging.getLogger(__name__)
+
+PHRASE_CACHE_SIZE = 50000
+# Lielākais frāžu vārdu id skaits; pārsniedzot to, vārdu tabula tiek veidota no jauna kopā ar frāžu kešatmiņu
+TOKEN_TABLE_SIZE = 200000
+# Mazākam frāžu skaitam vienkāršā kopu pārbaude ir ātrāka par NumPy masīvu sagatavošanu
+VECTORIZE_MIN_PHRASES = 64
+# Lielākais (pāri x vārdnīca) elementu skaits, kam matrica tiek veidota blīvi (baitos);
+# lielākām - kārtotu atslēgu dalības pārbaude (np.isin)
+BITSET_MAX_CELLS = 1024 * 1024
+
+
+class _Vocabulary:
+    """Vārdu id tabula un frāžu kešatmiņa; tiek nomainītas kopā, lai id vienmēr atbilstu viens otram."""
+
+    __slots__ = ('token_ids', 'phrases')
+
+    def __init__(self):
+        self.token_ids = {}
+        self.phrases = {}
+
+
+class PhraseIndex:
+    """
+    Frāžu salīdzināšanas indekss vienai valodai. Normalizētie vārdi tiek aizstāti ar
+    veseliem skaitļiem (id), frāzes glabātas kā id virknes, un daudzu (ALT teksts,
+    frāžu saraksts) pāru sakritības tiek aprēķinātas vienā vektorizētā NumPy operācijā
+    ar retinātu (pāris, vārds) matricu. Bez NumPy tiek izmantotas Python kopas.
+    Frāžu kešatmiņa un vārdu tabula ir ierobežotas (phrase_cache_size, token_table_size):
+    pārpildot tās tiek aizstātas ar jaunām, un katrs match_many izsaukums izmanto vienu to versiju.
+    """
+
+    def __init__(self, language, phrase_cache_size=PHRASE_CACHE_SIZE, token_table_size=TOKEN_TABLE_SIZE):
+        self.language = language
+        self.phrase_cache_size = phrase_cache_size
+        self.token_table_size = token_table_size
+        self._vocabulary = _Vocabulary()
+        self._lock = threading.Lock()
+
+    def _replace_vocabulary(self, full):
+        """Aizstāj pārpildīto vārdnīcu full ar tukšu (ja to jau nav izdarījis cits pavediens)."""
+        with self._lock:
+            if self._vocabulary is full:
+                self._vocabulary = _Vocabulary()
+            return self._vocabulary
+
+    def _intern(self, vocabulary, tokens):
+        token_ids = vocabulary.token_ids
+        missing = [token for token in tokens if token not in token_ids]
+        if missing:
+            with self._lock:
+                for token in missing:
+                    token_ids.setdefault(token, len(token_ids))
+        return [token_ids[token] for token in tokens]
+
+    def phrase_token_ids(self, phrase_lists, vocabulary=None, allow_reset=True):
+        """
+        Atgriež (unikālo frāžu normalizēto vārdu id korteži, katras frāzes indekss
+        unikālo sarakstā, izmantotā vārdnīca) visām frāzēm pēc kārtas. Tukšs kortežs
+        nozīmē, ka frāze nevar sakrist ne ar vienu ALT tekstu.
+        """
+        vocabulary = vocabulary or self._vocabulary
+        known = vocabulary.phrases
+        positions = {}
+        unique = []
+        missing = []
+        occurrences = []
+        for phrase in chain.from_iterable(phrase_lists):
+            position = positions.get(phrase)
+            if position is None:
+                position = positions[phrase] = len(unique)
+                ids = known.get(phrase) if phrase else ()
+                if ids is None:
+                    missing.append((position, phrase))
+                unique.append(ids)
+            occurrences.append(position)
+
+        if allow_reset and missing and (len(known) + len(missing) > self.phrase_cache_size
+                                        or len(vocabulary.token_ids) > self.token_table_size):
+            # Pārpildot kešatmiņu vai vārdu tabulu, frāzes tiek sagatavotas jaunā vārdnīcā
+            return self.phrase_token_ids(phrase_lists, self._replace_vocabulary(vocabulary), allow_reset=False)
+
+        if missing:
+            tokenized = [tokenize_text(phrase) for _, phrase in missing]
+            interned = self._intern(vocabulary, normalize_many(list(chain.from_iterable(tokenized)), self.language))
+            offset = 0
+            for (position, phrase), tokens in zip(missing, tokenized):
+                ids = tuple(sorted(set(interned[offset:offset + len(tokens)])))
+                offset += len(tokens)
+                known[phrase] = unique[position] = ids
+        return unique, occurrences, vocabulary
+
+    def alt_token_ids(self, alt_texts, vocabulary=None):
+        """Atgriež katra ALT teksta zināmo normalizēto vārdu id kopu (nezināmi vārdi nevar sakrist ne ar vienu frāzi)."""
+        tokenized = [tokenize_text(alt_text) if alt_text else [] for alt_text in alt_texts]
+        normalized = normalize_many(list(chain.from_iterable(tokenized)), self.language)
+        token_ids = (vocabulary or self._vocabulary).token_ids
+        result = []
+        offset = 0
+        for tokens in tokenized:
+            words = normalized[offset:offset + len(tokens)]
+            offset += len(tokens)
+            result.append({token_ids[word] for word in words if word in token_ids})
+        return result
+
+    def match_many(self, pairs):
+        """
+        pairs - (ALT teksts, AI frāžu saraksts) pāru saraksts.
+        Katram pārim atgriež (sakritušo frāžu skaits, frāžu skaits, sakritības maska).
+        """
+        phrase_lists = [phrases or () for _, phrases in pairs]
+        unique_ids, occurrences, vocabulary = self.phrase_token_ids(phrase_lists)
+        alt_ids = self.alt_token_ids([alt_text for alt_text, _ in pairs], vocabulary)
+
+        if numpy_available and len(occurrences) >= VECTORIZE_MIN_PHRASES:
+            matched = self._match_vectorized(phrase_lists, unique_ids, occurrences, alt_ids,
+                                             len(vocabulary.token_ids) + 1)
+        else:
+            phrase_ids = map(unique_ids.__getitem__, occurrences)
+            matched = [bool(ids) and alt.issuperset(ids)
+                       for phrases, alt in zip(phrase_lists, alt_ids)
+                       for ids in islice(phrase_ids, len(phrases))]
+
+        results = []
+        offset = 0
+        for phrases in phrase_lists:
+            mask = matched[offset:offset + len(phrases)]
+            offset += len(phrases)
+            results.append((sum(mask), len(mask), mask))
+        return results
+
+    def _match_vectorized(self, phrase_lists, unique_ids, occurrences, alt_ids, vocabulary_size):
+
+        # Unikālo frāžu vārdi CSR formātā
+        unique_lengths = np.fromiter(map(len, unique_ids), dtype=np.int64, count=len(unique_ids))
+        unique_tokens = np.fromiter(chain.from_iterable(unique_ids), dtype=np.int64,
+                                    count=int(unique_lengths.sum()))
+        unique_starts = np.cumsum(unique_lengths) - unique_lengths
+
+        # Katras frāzes parādīšanās pārī un tās vārdi
+        occurrences = np.array(occurrences, dtype=np.int64)
+        phrases_per_pair = np.fromiter(map(len, phrase_lists), dtype=np.int64, count=len(phrase_lists))
+        pair_of_occurrence = np.repeat(np.arange(len(phrase_lists), dtype=np.int64), phrases_per_pair)
+        lengths = unique_lengths[occurrences]
+        occurrence_of_token = np.repeat(np.arange(len(occurrences), dtype=np.int64), lengths)
+        token_offsets = np.arange(int(lengths.sum()), dtype=np.int64) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        tokens = unique_tokens[np.repeat(unique_starts[occurrences], lengths) + token_offsets]
+
+        # (pāris, vārds) matricas elementi kodēti kā pāris * vārdnīcas izmērs + vārda id
+        alt_sizes = np.fromiter(map(len, alt_ids), dtype=np.int64, count=len(alt_ids))
+        alt_keys = np.fromiter(chain.from_iterable(alt_ids), dtype=np.int64, count=int(alt_sizes.sum()))
+        alt_keys += np.repeat(np.arange(len(alt_ids), dtype=np.int64) * vocabulary_size, alt_sizes)
+        token_keys = pair_of_occurrence[occurrence_of_token] * vocabulary_size + tokens
+
+        cells = len(alt_ids) * vocabulary_size
+        if cells <= BITSET_MAX_CELLS:
+            # Blīva bitu matrica: viens indeksēšanas solis bez kārtošanas
+            alt_matrix = np.zeros(cells, dtype=bool)
+            alt_matrix[alt_keys] = True
+            hits = alt_matrix[token_keys]
+        else:
+            hits = np.isin(token_keys, alt_keys)
+        hit_counts = np.bincount(occurrence_of_token, weights=hits, minlength=len(occurrences))
+        return ((lengths > 0) & (hit_counts == lengths)).tolist()
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_phrase_index(language='lv'):
+    index = _indexes.get(language)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.setdefault(language, PhraseIndex(language))
+    return index
+
+
+def match_alt_texts_with_ai_phrases(pairs, language='lv'):
+    """Salīdzina daudzus (ALT teksts, AI frāzes) pārus vienā piegājienā; skat. PhraseIndex.match_many."""
+    return get_phrase_index(language).match_many(pairs)
+
+
+def compare_alt_text_with_ai_phrases(alt_text, ai_keyword_phrases, language='lv'):
+    """
+    Salīdzina ALT tekstu ar AI atslēgvārdu frāzēm.
+    Frāze tiek uzskatīta par atbilstošu, ja visi tās normalizētie vārdi
+    ir atrodami ALT teksta normalizētajos vārdos.
+    Atgriež sakritušo frāžu skaitu, kopējo frāžu skaitu un sakritības masku (boolean sarakstu).
+    Daudziem pāriem vienlaikus izmantojiet match_alt_texts_with_ai_phrases.
+    """
+    if not ai_keyword_phrases: # Ja nav AI frāžu, nav ko salīdzināt
+        return 0, 0, []
+
+    matched_phrase_count, total_phrases, matched_mask = match_alt_texts_with_ai_phrases(
+        [(alt_text, ai_keyword_phrases)], language
+    )[0]
+
+    logger.debug(f"Frāžu salīdzināšana: ALT='{alt_text}', AI frāzes='{ai_keyword_phrases}', "
+                 f"Sakrita frāzes={matched_phrase_count}, Kopā AI frāzes={total_phrases}, "
+                 f"Sakritības maska={matched_mask}")
+    return matched_phrase_count, total_phrases, matched_mask
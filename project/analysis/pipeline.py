@@ -0,0 +1,301 @@
+import copy
+import logging
+import contextvars
+from collections import deque
+from itertools import islice
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urljoin
+
+from .analyzer import (analyze_image_alt, build_failed_result, comparison_phrases, get_vision_candidate_uri,
+                       is_reusable_result, LABEL_TRANSLATION_LANGUAGES)
+from .context import get_analyzer_settings, get_analysis_providers
+from .identity import canonical_image_url, image_identity
+from .phrase_matching import match_alt_texts_with_ai_phrases
+from ..metrics import CHUNKS_IN_FLIGHT, ERRORS, IMAGES_ANALYZED, stage_timer
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_languages(selected_language, languages=None):
+    """Analīzes valodas: selected_language (primārā) un pārējās no languages bez atkārtojumiem."""
+    return tuple(dict.fromkeys([selected_language, *(languages or ())]))
+
+
+def language_key(languages):
+    """Valodu kopas atslēga kešatmiņām: 'lv' vienai valodai, 'lv+en' vairākām (primārā pirmā)."""
+    return '+'.join(languages)
+
+
+def split_language_key(key):
+    """language_key pretējā darbība: 'lv+en' -> ('lv', 'en')."""
+    return tuple(key.split('+'))
+
+
+def _result_cache_key(img, page_url, languages):
+    raw_src = (img.get('src') or '').strip()
+    if not raw_src:
+        return None
+    return urljoin(page_url, raw_src), img.get('alt'), language_key(languages)
+
+
+def _batch_phrase_matches(img_tags, vision_uris, vision_results, translation_results, languages, settings):
+    """
+    ALT tekstu salīdzinājums ar MI atslēgvārdiem visai attēlu grupai: viens
+    match_alt_texts_with_ai_phrases izsaukums katrai salīdzināšanas valodai, nevis katram attēlam.
+    Atgriež {(attēla indekss, valoda): (sakrita, kopā, maska)} attēliem, kuru frāzes jau zināmas.
+    """
+    pairs = {}
+    for i, (img, vision_uri) in enumerate(zip(img_tags, vision_uris)):
+        alt_text = (img.get('alt') or '').strip()
+        labels, _ = vision_results.get(vision_uri) or (None, None)
+        if not alt_text or not labels:
+            continue
+        translations = translation_results.get(vision_uri) or {}
+        for language in languages:
+            translation_result = translations.get(language)
+            if translation_result is None and language in LABEL_TRANSLATION_LANGUAGES and settings.enable_translation:
+                # Tulkojums nav iegūts grupai - analyze_image_alt tulkos un salīdzinās atsevišķi
+                continue
+            phrases, comparison_language, _ = comparison_phrases(labels, language, settings.enable_translation,
+                                                                 translation_result)
+            pairs.setdefault(comparison_language, []).append(((i, language), (alt_text, phrases)))
+
+    matches = {}
+    for comparison_language, items in pairs.items():
+        results = match_alt_texts_with_ai_phrases([pair for _, pair in items], comparison_language)
+        matches.update(zip((key for key, _ in items), results))
+    return matches
+
+
+def _analyze_languages(img, page_url, settings, languages, vision_result, translations, providers,
+                       rule_results=None, phrase_matches=None):
+    """
+    ALT pārbaudes katrā valodā ar kopīgu Vision rezultātu. Atgriež primārās (pirmās) valodas
+    rezultātu; vairākām valodām tam pievienots languages = {valoda: {'analysis', 'suggestions'}}.
+    rule_results - {valoda: noteikumu rezultāts}, phrase_matches - {valoda: (sakrita, kopā, maska)}
+    šim attēlam (skat. RuleEngine.evaluate_many un _batch_phrase_matches).
+    """
+    rule_results = rule_results or {}
+    phrase_matches = phrase_matches or {}
+    per_language = {
+        language: analyze_image_alt(img, page_url, settings, language, vision_result=vision_result,
+                                    translation_result=translations.get(language), providers=providers,
+                                    rule_result=rule_results.get(language),
+                                    phrase_match=phrase_matches.get(language))
+        for language in languages
+    }
+    result = per_language[languages[0]]
+    if result is not None and len(languages) > 1:
+        result['languages'] = {language: {'analysis': language_result['analysis'],
+                                          'suggestions': language_result['suggestions']}
+                               for language, language_result in per_language.items()}
+    return result
+
+
+class _SharedImageAnalyses:
+    """
+    Vienas lapas attēlu MI analīžu reģistrs: attēla identitāte (skat. identity.image_identity)
+    -> Future ar (vision_result, translation_result). Pirmā grupa, kurā attēls parādās, to
+    analizē; pārējās grupas gaida tās rezultātu, tāpēc katrs unikālais attēls tiek sūtīts
+    Vision API vienreiz, arī ja tas lapā atkārtojas vai ir citā izmēra variantā.
+    """
+
+    def __init__(self):
+        self._futures = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def claim(self, identity):
+        """Atgriež (future, owner): owner=True - izsaucējam jāanalizē attēls un jāaizpilda future."""
+        with self._lock:
+            future = self._futures.get(identity)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = self._futures[identity] = Future()
+            return future, True
+
+
+def _shared_vision_results(vision_uris, languages, providers, shared):
+    """
+    Vision atslēgvārdi un to tulkojumi grupas attēliem, katram unikālajam attēlam vienreiz
+    (atslēgvārdi nav atkarīgi no valodas, tulkojumi - katrai valodai, kurai tie vajadzīgi).
+    Atgriež {vision_uri: (labels, error)} un {vision_uri: {valoda: (tulkojums, error)}}.
+    Vispirms tiek analizēti un publicēti šīs grupas pieteiktie attēli un tikai tad gaidīti
+    citu grupu attēli, tāpēc grupas nevar bloķēt viena otru.
+    """
+    identities = {uri: canonical_image_url(uri) for uri in vision_uris if uri}
+    owned = {}
+    waiting = {}
+    owner_uris = {}
+    for uri, identity in identities.items():
+        if identity in owned or identity in waiting:
+            continue
+        future, owner = shared.claim(identity) if shared is not None else (Future(), True)
+        if owner:
+            owned[identity] = future
+            owner_uris[identity] = uri
+        else:
+            waiting[identity] = future
+
+    analyses = {}
+    try:
+        owner_vision = providers.vision_labels_batch(list(owner_uris.values())) if owner_uris else {}
+        owner_translations = {}
+        labelled_uris = [uri for uri, (labels, _) in owner_vision.items() if labels]
+        for language in languages:
+            if language in LABEL_TRANSLATION_LANGUAGES and labelled_uris and providers.translation_available():
+                translated = providers.translate_labels_batch([owner_vision[uri][0] for uri in labelled_uris], language)
+                for uri, translation in zip(labelled_uris, translated):
+                    owner_translations.setdefault(uri, {})[language] = translation
+        for identity, uri in owner_uris.items():
+            analyses[identity] = (owner_vision.get(uri), owner_translations.get(uri, {}))
+            owned[identity].set_result(analyses[identity])
+    except BaseException as e:
+        for future in owned.values():
+            if not future.done():
+                future.set_exception(e)
+        raise
+
+    for identity, future in waiting.items():
+        try:
+            analyses[identity] = future.result()
+        except Exception as e:
+            analyses[identity] = ((None, f"Neizdevās iegūt AI atslēgvārdus (Vision): {e}"), {})
+
+    vision_results = {uri: analyses[identity][0] for uri, identity in identities.items()}
+    translation_results = {uri: analyses[identity][1] for uri, identity in identities.items()}
+    return vision_results, translation_results
+
+
+def _analyze_chunk(img_tags, page_url, languages, settings, providers, result_cache=None, shared=None):
+    """
+    Analizē vienu attēlu grupu: Vision atslēgvārdi visai grupai vienā pakā,
+    to tulkojumi vienā deduplicētā posmā, tad ALT pārbaudes katram attēlam katrā valodā.
+    result_cache - kopīga kešatmiņa (src, alt, valodas) -> rezultāts, piem., vairāku
+    lapu pārmeklēšanai; tajā atrastie attēli netiek analizēti atkārtoti (rezultāti ar
+    kļūdām tajā netiek saglabāti).
+    shared - lapas _SharedImageAnalyses, lai atkārtoti attēli citās grupās netiktu analizēti vēlreiz.
+    Katram rezultātam tiek pievienots image_id - attēla identitāte lapā.
+    """
+    cache_keys = [None] * len(img_tags)
+    cached_results = {}
+    if result_cache is not None:
+        for i, img in enumerate(img_tags):
+            cache_keys[i] = _result_cache_key(img, page_url, languages)
+            cached = result_cache.get(cache_keys[i]) if cache_keys[i] else None
+            if cached is not None:
+                cached_results[i] = copy.deepcopy(cached)
+
+    vision_uris = [None] * len(img_tags)
+    vision_results = translation_results = {}
+    if providers.vision_available():
+        vision_uris = [None if i in cached_results else get_vision_candidate_uri(img, page_url)
+                       for i, img in enumerate(img_tags)]
+        vision_results, translation_results = _shared_vision_results(vision_uris, languages, providers, shared)
+
+    # Noteikumi visai grupai vienā izsaukumā katrai valodai ar vienreiz kompilētu noteikumu dzinēju
+    with stage_timer('rules'):
+        pending = [(img.get('src'), img.get('alt')) if i not in cached_results else (None, None)
+                   for i, img in enumerate(img_tags)]
+        rule_results = {language: settings.rule_engine(language, page_url).evaluate_many(pending, page_url)
+                        for language in languages}
+    with stage_timer('normalization'):
+        phrase_matches = _batch_phrase_matches(img_tags, vision_uris, vision_results, translation_results,
+                                               languages, settings)
+
+    results = []
+    for i, (img, vision_uri) in enumerate(zip(img_tags, vision_uris)):
+        if i in cached_results:
+            IMAGES_ANALYZED.labels('cached').inc()
+            cached_results[i]['image_id'] = image_identity(img, page_url)
+            results.append(cached_results[i])
+            continue
+        try:
+            with stage_timer('rules'):
+                result = _analyze_languages(img, page_url, settings, languages, vision_results.get(vision_uri),
+                                            translation_results.get(vision_uri) or {}, providers,
+                                            {language: rule_results[language][i] for language in languages},
+                                            {language: phrase_matches[i, language] for language in languages
+                                             if (i, language) in phrase_matches})
+        except Exception as e:
+            logger.exception(f"Attēla analīze neizdevās: {(img.get('src') or '')[:80]}")
+            IMAGES_ANALYZED.labels('failed').inc()
+            ERRORS.labels('image', e.__class__.__name__).inc()
+            result = build_failed_result(img, page_url, e)
+            result['image_id'] = image_identity(img, page_url)
+            results.append(result)
+            continue
+        IMAGES_ANALYZED.labels('skipped' if result is None else 'analyzed').inc()
+        if result is not None:
+            result['image_id'] = image_identity(img, page_url)
+        if cache_keys[i] and is_reusable_result(result):
+            result_cache.set(cache_keys[i], copy.deepcopy(result))
+        results.append(result)
+    return results
+
+
+def iter_image_analyses(img_tags, page_url, selected_language='lv', result_cache=None, settings=None, providers=None,
+                        languages=None):
+    """
+    Analizē attēlus grupās pa VISION_API_BATCH_SIZE, izpildot līdz
+    MAX_CONCURRENT_IMAGE_ANALYSES grupām paralēli.
+    img_tags var būt ģenerators (piem., straumējoša HTML parsētāja izvade): grupa
+    tiek nodota analīzei, tiklīdz tā ir pilna, un vienlaikus atmiņā tiek turēts
+    ierobežots grupu skaits. Atgriež (img, result) pārus dokumenta secībā
+    (result ir None, ja attēls izlaists). Viena attēla kļūda neietekmē pārējos.
+    Rezultāti tiek atgriezti pa grupām: grupas rezultāti - kad pabeigta tā un visas
+    iepriekšējās grupas (lēna grupa aiztur arī vēlāk pabeigtās), tāpēc straumējot
+    (skat. api.streaming) notikumi pienāk grupām, nevis katram attēlam atsevišķi.
+    settings/providers - AnalyzerSettings un AnalysisProviders; ja nav norādīti,
+    tiek ņemti no pašreizējās Flask aplikācijas.
+    languages - papildu valodas: lapa un Vision atslēgvārdi tiek iegūti vienreiz, bet valodas
+    pārbaudes (aizliegtās frāzes, tulkošana, normalizācija) - katrā valodā (skat. _analyze_languages).
+    """
+    languages = resolve_languages(selected_language, languages)
+    if settings is None:
+        settings = get_analyzer_settings()
+    if providers is None:
+        providers = get_analysis_providers()
+    max_workers = settings.max_concurrent_image_analyses
+    chunk_size = settings.vision_batch_size
+    shared = _SharedImageAnalyses()
+
+    def run_chunk(chunk):
+        # Darba pavedieniem Flask konteksts nav vajadzīgs; klienti nāk no procesa pūla
+        with CHUNKS_IN_FLIGHT.track_inprogress():
+            return _analyze_chunk(chunk, page_url, languages, settings, providers, result_cache, shared)
+
+    def collect(chunk, future):
+        try:
+            chunk_results = future.result()
+        except Exception as e:
+            logger.exception("Attēlu grupas analīze neizdevās")
+            chunk_results = [build_failed_result(img, page_url, e) for img in chunk]
+        return zip(chunk, chunk_results)
+
+    img_iter = iter(img_tags)
+    in_flight = deque()
+    image_count = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            chunk = list(islice(img_iter, chunk_size))
+            if chunk:
+                image_count += len(chunk)
+                # Konteksta kopija, lai grupas posmi tiktu uzskaitīti pieprasījuma laika sadalījumā
+                in_flight.append((chunk, executor.submit(contextvars.copy_context().run, run_chunk, chunk)))
+            # Ierobežojam gaidošo grupu skaitu, lai atmiņa nepieaugtu līdz ar lapas izmēru
+            while in_flight and (not chunk or len(in_flight) > max_workers or in_flight[0][1].done()):
+                yield from collect(*in_flight.popleft())
+            if not chunk and not in_flight:
+                break
+
+    logger.info(f"Analizēti {image_count} attēli (maks. {max_workers} grupas pa {chunk_size} vienlaicīgi), "
+                f"{shared.shared} atkārtotiem attēliem izmantota citas grupas MI analīze.")
+
+
+def analyze_images(img_tags, page_url, selected_language='lv', settings=None, providers=None, languages=None):
+    """Analizē attēlus paralēli un atgriež rezultātus dokumenta secībā (None - attēls izlaists)."""
+    return [result for _, result in iter_image_analyses(img_tags, page_url, selected_language, settings=settings,
+                                                         providers=providers, languages=languages)]
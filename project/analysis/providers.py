@@ -1,126 +1,556 @@
 import logging
-from flask import current_app, g
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+
+from .cache import TranslationCache, VisionLabelCache, PageResultCache
+from .clients import ClientPool
+from .fetcher import get_http_session
+from .images import PrefetchedImage, VISION_SKIPPED_PREFIX, fetch_image, check_image_size, prepare_vision_content
+from .resilience import ApiGuard, ProviderUnavailable
+from ..metrics import API_CALLS_IN_FLIGHT, ERRORS, stage_timer, timed_startup_step
 
 vision = None
 translate = None
 google_exceptions = None
 vision_client_available = False
 translation_client_available = False
+_vision_import_attempted = False
+_translation_import_attempted = False
+_import_lock = threading.Lock()
+
+_translation_cache = None
+_vision_cache = None
+_page_cache = None
+_cache_lock = threading.Lock()
+
+_vision_client_pool = None
+_translation_client_pool = None
+_vision_guard = None
+_translation_guard = None
+_pool_lock = threading.Lock()
 
 logger = logging.getLogger(__name__)
 
-# Mēģinām importēt bibliotēkas ielādes laikā
-try:
-    from google.cloud import vision
-    from google.api_core import exceptions as google_exceptions
-    vision_client_available = True
-    logger.info("google-cloud-vision bibliotēka atrasta.")
-except ImportError:
-    logger.warning("'google-cloud-vision' bibliotēka nav instalēta. Vision API nebūs pieejams.")
-
-try:
-    from google.cloud import translate_v2 as translate
-    translation_client_available = True
-    logger.info("google-cloud-translate bibliotēka atrasta.")
-except ImportError:
-    logger.warning("'google-cloud-translate' bibliotēka nav instalēta. Translation API nebūs pieejams.")
-
-
-def get_vision_client():
-    """Atgriež inicializētu Vision API klientu, izmantojot Flask 'g' objektu."""
-    if not vision_client_available or not current_app.config.get('ENABLE_VISION_API'):
-        return None
-    # Izmantojam g objektu, lai saglabātu klientu pieprasījuma kontekstā
-    if 'vision_client' not in g:
-        try:
-            g.vision_client = vision.ImageAnnotatorClient()
-            logger.info("Vision API klients inicializēts pieprasījumam.")
-        except Exception as e:
-            logger.error(f"Neizdevās inicializēt Vision API klientu: {e}", exc_info=True)
-            g.vision_client = None # Atzīmējam kā neizdevušos
-    return g.vision_client
-
-def get_translation_client():
-    """Atgriež inicializētu Translation API klientu, izmantojot Flask 'g' objektu."""
-    if not translation_client_available or not current_app.config.get('ENABLE_TRANSLATION_API'):
-        return None
-    if 'translation_client' not in g:
-        try:
-            g.translation_client = translate.Client()
-            logger.info("Translation API v2 klients inicializēts pieprasījumam.")
-        except Exception as e:
-            logger.error(f"Neizdevās inicializēt Translation API klientu: {e}", exc_info=True)
-            g.translation_client = None
-    return g.translation_client
-
-
-def get_vision_api_labels(image_uri):
-    """Izsauc Google Vision API label_detection un atgriež atslēgvārdu sarakstu."""
-    client = get_vision_client()
-    if not client:
-        return None, "Vision API klients nav pieejams."
-
-    labels_list = []
-    error_message = None
-    min_confidence = current_app.config.get('VISION_API_MIN_CONFIDENCE', 0.65)
 
-    try:
-        logger.info(f"Vaicājam Vision API: {image_uri[:80]}...")
-        image = vision.Image()
-        image.source.image_uri = image_uri
-        response = client.label_detection(image=image)
-
-        if response.error.message:
-            error_message = f'Vision API kļūda: {response.error.message}'
-            logger.error(error_message)
-            return None, error_message
-
-        annotations = response.label_annotations
-        if annotations:
-            for label in annotations:
-                if label.score >= min_confidence:
-                    labels_list.append(label.description.lower())
-            logger.info(f"Vision API atrasti {len(labels_list)} atslēgvārdi.")
-        else:
-            logger.info(f"Vision API neatgrieza atslēgvārdus: {image_uri[:80]}")
-            error_message = "AI neatpazina atslēgvārdus."
-
-    except google_exceptions.GoogleAPIError as e:
-        error_message = f"Google API kļūda (Vision): {e}"
-        logger.error(error_message, exc_info=False)
-    except Exception as e:
-        error_message = f"Neizdevās iegūt AI atslēgvārdus (Vision): {e}"
-        logger.error(error_message, exc_info=False)
+def load_vision_library():
+    """
+    Slinki importē google-cloud-vision, lai smagā gRPC/protobuf ielāde nenotiktu
+    aplikācijas startā (un nenotiktu vispār, ja ENABLE_VISION_API=False).
+    """
+    global vision, google_exceptions, vision_client_available, _vision_import_attempted
+    if not _vision_import_attempted:
+        with _import_lock:
+            if not _vision_import_attempted:
+                with timed_startup_step('import_google_cloud_vision'):
+                    try:
+                        from google.cloud import vision as vision_module
+                        from google.api_core import exceptions as exceptions_module
+                        vision, google_exceptions = vision_module, exceptions_module
+                        vision_client_available = True
+                        logger.info("google-cloud-vision bibliotēka atrasta.")
+                    except ImportError:
+                        logger.warning("'google-cloud-vision' bibliotēka nav instalēta. Vision API nebūs pieejams.")
+                _vision_import_attempted = True
+    return vision_client_available
+
+
+def load_translation_library():
+    """Slinki importē google-cloud-translate (skat. load_vision_library)."""
+    global translate, google_exceptions, translation_client_available, _translation_import_attempted
+    if not _translation_import_attempted:
+        with _import_lock:
+            if not _translation_import_attempted:
+                with timed_startup_step('import_google_cloud_translate'):
+                    try:
+                        from google.cloud import translate_v2 as translate_module
+                        from google.api_core import exceptions as exceptions_module
+                        translate, google_exceptions = translate_module, exceptions_module
+                        translation_client_available = True
+                        logger.info("google-cloud-translate bibliotēka atrasta.")
+                    except ImportError:
+                        logger.warning("'google-cloud-translate' bibliotēka nav instalēta. Translation API nebūs pieejams.")
+                _translation_import_attempted = True
+    return translation_client_available
+
+
+def _create_vision_client(keepalive_ms):
+    """Izveido Vision API klientu ar gRPC kanālu, kuram ieslēgts keepalive."""
+    transport_class = vision.ImageAnnotatorClient.get_transport_class('grpc')
+    channel = transport_class.create_channel(options=[
+        ('grpc.keepalive_time_ms', keepalive_ms),
+        ('grpc.keepalive_timeout_ms', 20000),
+        ('grpc.keepalive_permit_without_calls', 1),
+        ('grpc.http2.max_pings_without_data', 0),
+    ])
+    return vision.ImageAnnotatorClient(transport=transport_class(channel=channel))
+
+
+def get_vision_client_pool(settings):
+    """Atgriež procesa līmeņa Vision API klientu pūlu."""
+    global _vision_client_pool
+    if _vision_client_pool is None:
+        keepalive_ms = settings.grpc_keepalive_time_ms
+        with _pool_lock:
+            if _vision_client_pool is None:
+                _vision_client_pool = ClientPool(
+                    'Vision API',
+                    lambda: _create_vision_client(keepalive_ms),
+                    max_idle=settings.client_pool_max_idle,
+                )
+    return _vision_client_pool
+
+
+def get_translation_client_pool(settings):
+    """Atgriež procesa līmeņa Translation API klientu pūlu."""
+    global _translation_client_pool
+    if _translation_client_pool is None:
+        with _pool_lock:
+            if _translation_client_pool is None:
+                _translation_client_pool = ClientPool(
+                    'Translation API v2',
+                    lambda: translate.Client(),
+                    max_idle=settings.client_pool_max_idle,
+                )
+    return _translation_client_pool
+
+
+def _create_guard(name, settings, rate, burst):
+    return ApiGuard(
+        name, rate=rate, burst=burst,
+        max_retries=settings.api_max_retries,
+        backoff_base=settings.api_backoff_base,
+        backoff_max=settings.api_backoff_max,
+        deadline=settings.api_call_deadline,
+        failure_threshold=settings.api_breaker_failures,
+        reset_timeout=settings.api_breaker_reset,
+    )
+
+
+def get_vision_guard(settings):
+    """Atgriež procesa līmeņa Vision API izsaukumu aizsardzību (ātruma limits, atkārtojumi, ķēdes pārtraucējs)."""
+    global _vision_guard
+    if _vision_guard is None:
+        with _pool_lock:
+            if _vision_guard is None:
+                _vision_guard = _create_guard('Vision API', settings, settings.vision_rate_limit,
+                                              settings.vision_rate_burst)
+    return _vision_guard
 
-    return labels_list if labels_list else None, error_message
 
+def get_translation_guard(settings):
+    """Atgriež procesa līmeņa Translation API izsaukumu aizsardzību (skat. get_vision_guard)."""
+    global _translation_guard
+    if _translation_guard is None:
+        with _pool_lock:
+            if _translation_guard is None:
+                _translation_guard = _create_guard('Translation API', settings, settings.translation_rate_limit,
+                                                   settings.translation_rate_burst)
+    return _translation_guard
 
-def translate_labels(labels, target_language='lv'):
-    """Tulko atslēgvārdu sarakstu uz norādīto mērķa valodu."""
-    client = get_translation_client()
-    if not client or not labels:
-        return labels, "Translation API klients nav pieejams vai nav ko tulkot."
 
-    translated_labels = []
-    error_message = None
+def get_provider_stats():
+    """Atgriež API aizsardzības, klientu pūlu un kešatmiņu skaitītājus (tikai jau izveidotajiem)."""
+    components = {
+        'vision_guard': _vision_guard, 'translation_guard': _translation_guard,
+        'vision_client_pool': _vision_client_pool, 'translation_client_pool': _translation_client_pool,
+        'vision_cache': _vision_cache, 'translation_cache': _translation_cache, 'page_cache': _page_cache,
+    }
+    return {name: component.stats() for name, component in components.items() if component is not None}
+
+
+@contextmanager
+def _pooled_client(pool_getter, settings, name):
+    """Paņem klientu no pūla uz bloka izpildes laiku (None, ja klientu neizdevās izveidot)."""
+    pool = pool_getter(settings)
     try:
-        logger.info(f"Tulkojam {len(labels)} atslēgvārdus uz '{target_language}'...")
-        results = client.translate(labels, target_language=target_language)
-
-        if isinstance(results, list):
-            translated_labels = [item['translatedText'].lower() for item in results]
-        elif isinstance(results, dict):
-             translated_labels = [results['translatedText'].lower()]
-        else:
-            raise TypeError(f"Negaidīts tulkošanas rezultāta tips: {type(results)}")
-        logger.info(f"Iztulkoti {len(translated_labels)} atslēgvārdi.")
-
-    except google_exceptions.GoogleAPIError as e:
-        error_message = f"Google API kļūda (Translate): {e}"
-        logger.error(error_message, exc_info=False)
+        client = pool.acquire()
     except Exception as e:
-        error_message = f"Neizdevās iztulkot atslēgvārdus: {e}"
-        logger.error(error_message, exc_info=False)
-        return labels, error_message
+        logger.error(f"Neizdevās inicializēt {name} klientu: {e}", exc_info=True)
+        client = None
+    try:
+        yield client
+    finally:
+        if client is not None:
+            pool.release(client)
+
+
+VISION_API_MAX_BATCH_SIZE = 16
+# Lejupielādēto attēlu satura apjoms vienā batch_annotate_images pieprasījumā (API limits ir ~10 MB)
+VISION_API_MAX_REQUEST_BYTES = 8 * 1024 * 1024
+TRANSLATION_API_MAX_SEGMENTS = 128
+
+
+def get_vision_cache(settings):
+    """Atgriež procesa līmeņa Vision rezultātu kešatmiņu (vai None, ja tā ir izslēgta)."""
+    global _vision_cache
+    if not settings.vision_cache_enabled:
+        return None
+    if _vision_cache is None:
+        with _cache_lock:
+            if _vision_cache is None:
+                _vision_cache = VisionLabelCache(
+                    path=settings.vision_cache_path,
+                    memory_size=settings.vision_cache_memory_size,
+                    max_entries=settings.vision_cache_max_entries,
+                )
+                logger.info(f"Vision kešatmiņa inicializēta: {_vision_cache.path or 'tikai atmiņā'}")
+    return _vision_cache
+
+
+def _annotations_from_response(response):
+    """Izvelk (description, score) pārus no viena Vision API AnnotateImageResponse."""
+    if response.error.message:
+        error_message = f'Vision API kļūda: {response.error.message}'
+        logger.error(error_message)
+        return None, error_message
+    return [(label.description.lower(), label.score) for label in response.label_annotations], None
+
+
+def _labels_from_annotations(annotations, image_uri, min_confidence):
+    """Atlasa atslēgvārdus, kuru ticamība sasniedz min_confidence."""
+    if not annotations:
+        logger.info(f"Vision API neatgrieza atslēgvārdus: {image_uri[:80]}")
+        return None, "AI neatpazina atslēgvārdus."
+
+    labels_list = [description for description, score in annotations if score >= min_confidence]
+    logger.info(f"Vision API atrasti {len(labels_list)} atslēgvārdi.")
+    return labels_list if labels_list else None, None
+
+
+def _cached_labels(cache, content_hash, image_uri, min_confidence):
+    """Atgriež (labels, error) no kešatmiņas pēc satura jaucējkoda vai None."""
+    cached = cache.get_annotations(content_hash)
+    if cached is None:
+        return None
+    annotations, stored_min_confidence = cached
+    if stored_min_confidence != min_confidence:
+        logger.debug(f"Kešatmiņas atslēgvārdi pārfiltrēti ar {min_confidence} (saglabāti ar {stored_min_confidence}).")
+    return _labels_from_annotations(annotations, image_uri, min_confidence)
+
+
+def _prefetch_images(cache, image_uris, settings, allow_fetch=True):
+    """
+    Sagatavo attēlus Vision API izsaukumam. Rezultāti tiek meklēti kešatmiņā pēc URL
+    (ar ETag/Last-Modified pārbaudi) un satura jaucējkoda; ja ieslēgts VISION_PREFETCH_ENABLED,
+    attēli tiek paralēli lejupielādēti, izsekošanas pikseļi, atstarpes, pārāk lieli un
+    ne-attēlu faili tiek izlaisti, bet pārējie samazināti līdz VISION_MAX_IMAGE_EDGE.
+    Atgriež (results, images): kešatmiņā atrastos vai izlaistos {uri: (labels, error)} un
+    {uri: PrefetchedImage} pārējiem. Attēli, kurus neizdevās ielādēt, netiek iekļauti images
+    un tiek sūtīti Vision API ar image_uri. allow_fetch=False - tikai svaigi kešatmiņas
+    ieraksti, bez lejupielādes (kad Vision API tik un tā netiks izsaukts).
+    """
+    prefetch = settings.vision_prefetch_enabled
+    min_confidence = settings.vision_min_confidence
+    now = time.time()
+
+    results = {}
+    images = {}
+    to_fetch = {}
+    for uri in image_uris:
+        entry = cache.get_url_entry(uri) if cache else None
+        if entry and now - entry['validated_at'] < settings.vision_cache_revalidate_after:
+            cached = _cached_labels(cache, entry['content_hash'], uri, min_confidence)
+            if cached is not None:
+                results[uri] = cached
+            elif prefetch:
+                to_fetch[uri] = None # Saturs vajadzīgs sūtīšanai, tāpēc bez nosacījuma galvenēm
+            else:
+                images[uri] = PrefetchedImage(uri, entry['content_hash'], entry['etag'], entry['last_modified'])
+        elif cache or prefetch:
+            to_fetch[uri] = entry
+
+    if to_fetch and allow_fetch:
+        session = get_http_session(settings)
+        timeout = settings.request_timeout
+        max_bytes = settings.vision_prefetch_max_bytes if prefetch else settings.vision_cache_max_image_bytes
+
+        def prefetch_one(item):
+            uri, entry = item
+            image = fetch_image(session, uri, entry, timeout, max_bytes, keep_content=prefetch)
+            if image is None or image.skip_reason:
+                return image, None
+            if cache:
+                cache.store_url(uri, *image.fingerprint)
+                cached = _cached_labels(cache, image.content_hash, uri, min_confidence)
+                if cached is not None:
+                    return image, cached
+            if image.content is not None:
+                check_image_size(image, settings.vision_min_image_edge)
+                if not image.skip_reason:
+                    image.content = prepare_vision_content(image, settings.vision_max_image_edge)
+                    if len(image.content) > VISION_API_MAX_REQUEST_BYTES:
+                        image.content = None
+            return image, None
+
+        max_workers = max(1, min(settings.max_concurrent_image_analyses, len(to_fetch)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for uri, (image, cached) in zip(to_fetch, executor.map(prefetch_one, to_fetch.items())):
+                if cached is not None:
+                    results[uri] = cached
+                elif image is not None and image.skip_reason:
+                    logger.info(f"Attēls netiek sūtīts Vision API ({image.skip_reason}): {uri[:80]}")
+                    results[uri] = (None, f"{VISION_SKIPPED_PREFIX}: {image.skip_reason}.")
+                elif image is not None:
+                    images[uri] = image
+
+    if cache:
+        cache_hits = sum(1 for labels, error in results.values() if not (error or '').startswith(VISION_SKIPPED_PREFIX))
+        logger.info(f"Vision kešatmiņā atrasti {cache_hits} no {len(image_uris)} attēliem.")
+    return results, images
+
+
+def _vision_batches(image_uris, images, batch_size):
+    """Sadala attēlus pieprasījumos pa ne vairāk kā batch_size attēliem un VISION_API_MAX_REQUEST_BYTES baitiem."""
+    batch = []
+    batch_bytes = 0
+    for uri in image_uris:
+        image = images.get(uri)
+        size = len(image.content) if image is not None and image.content else 0
+        if batch and (len(batch) >= batch_size or batch_bytes + size > VISION_API_MAX_REQUEST_BYTES):
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(uri)
+        batch_bytes += size
+    if batch:
+        yield batch
+
+
+def _vision_image(uri, image):
+    """Vision API Image: lejupielādēts saturs image.content laukā, citādi attēla URL."""
+    if image is not None and image.content:
+        return vision.Image(content=image.content)
+    return vision.Image(source=vision.ImageSource(image_uri=uri))
+
+
+def get_translation_cache(settings):
+    """Atgriež procesa līmeņa tulkojumu kešatmiņu (vai None, ja tā ir izslēgta)."""
+    global _translation_cache
+    if not settings.translation_cache_enabled:
+        return None
+    if _translation_cache is None:
+        with _cache_lock:
+            if _translation_cache is None:
+                _translation_cache = TranslationCache(
+                    path=settings.translation_cache_path,
+                    memory_size=settings.translation_cache_memory_size,
+                    max_entries=settings.translation_cache_max_entries,
+                    ttl=settings.translation_cache_ttl,
+                )
+                logger.info(f"Tulkojumu kešatmiņa inicializēta: {_translation_cache.path or 'tikai atmiņā'}")
+    return _translation_cache
+
+
+def get_page_cache(settings):
+    """Atgriež procesa līmeņa lapu analīžu kešatmiņu (vai None, ja tā ir izslēgta)."""
+    global _page_cache
+    if not settings.page_cache_enabled:
+        return None
+    if _page_cache is None:
+        with _cache_lock:
+            if _page_cache is None:
+                _page_cache = PageResultCache(
+                    path=settings.page_cache_path,
+                    memory_size=settings.page_cache_memory_size,
+                    max_entries=settings.page_cache_max_entries,
+                    ttl=settings.page_cache_ttl,
+                )
+                logger.info(f"Lapu analīžu kešatmiņa inicializēta: {_page_cache.path or 'tikai atmiņā'}")
+    return _page_cache
+
+
+class AnalysisProviders:
+    """
+    Analīzes ārējie pakalpojumi - Vision un Translation API (ar procesa līmeņa klientu
+    pūliem un kešatmiņām), sagatavoti no AnalyzerSettings. Objekts nav piesaistīts
+    Flask kontekstam un ir drošs lietošanai no vairākiem pavedieniem: klients tiek
+    paņemts no pūla tikai uz viena API izsaukuma laiku.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+
+    def vision_available(self):
+        return self.settings.enable_vision and load_vision_library()
+
+    def translation_available(self):
+        return self.settings.enable_translation and load_translation_library()
+
+    def vision_client(self):
+        """Konteksta pārvaldnieks, kas atgriež Vision API klientu no pūla (vai None)."""
+        if not self.vision_available():
+            return nullcontext(None)
+        return _pooled_client(get_vision_client_pool, self.settings, 'Vision API')
+
+    def translation_client(self):
+        """Konteksta pārvaldnieks, kas atgriež Translation API klientu no pūla (vai None)."""
+        if not self.translation_available():
+            return nullcontext(None)
+        return _pooled_client(get_translation_client_pool, self.settings, 'Translation API')
+
+    def vision_labels(self, image_uri):
+        """Iegūst viena attēla Vision API atslēgvārdus; atgriež (labels, error)."""
+        return self.vision_labels_batch([image_uri]).get(image_uri, (None, "Vision API klients nav pieejams."))
+
+    def vision_labels_batch(self, image_uris):
+        """
+        Anotē vairākus attēlus ar batch_annotate_images, sadalot tos pa
+        VISION_API_BATCH_SIZE lielām daļām. Kešatmiņā atrastie un izlaistie attēli (skat.
+        _prefetch_images) API netiek sūtīti; lejupielādētie tiek sūtīti kā image.content.
+        Atgriež vārdnīcu {image_uri: (labels, error)} ar tādu pašu formu kā vision_labels.
+        """
+        unique_uris = list(dict.fromkeys(uri for uri in image_uris if uri))
+        if not unique_uris:
+            return {}
+
+        settings = self.settings
+        min_confidence = settings.vision_min_confidence
+
+        cache = get_vision_cache(settings)
+        guard = get_vision_guard(settings)
+        batch_size = min(settings.vision_batch_size, VISION_API_MAX_BATCH_SIZE)
+        with self.vision_client() as client:
+            # Bez klienta (nav bibliotēkas vai neizdevās izveidot) attēli netiek lejupielādēti -
+            # tiek izmantoti tikai svaigi kešatmiņas ieraksti
+            with stage_timer('vision_prefetch'):
+                results, images = _prefetch_images(cache, unique_uris, settings,
+                                                   allow_fetch=client is not None and guard.available())
+            pending_uris = [uri for uri in unique_uris if uri not in results]
+            if not pending_uris:
+                return results
+            if not client:
+                results.update({uri: (None, "Vision API klients nav pieejams.") for uri in pending_uris})
+                return results
+
+            for chunk in _vision_batches(pending_uris, images, batch_size):
+                try:
+                    inline_count = sum(1 for uri in chunk if uri in images and images[uri].content)
+                    logger.info(f"Vaicājam Vision API ar {len(chunk)} attēliem vienā pieprasījumā "
+                                f"({inline_count} nosūtīti kā saturs)...")
+                    annotate_requests = [
+                        vision.AnnotateImageRequest(
+                            image=_vision_image(uri, images.get(uri)),
+                            features=[vision.Feature(type_=vision.Feature.Type.LABEL_DETECTION)],
+                        )
+                        for uri in chunk
+                    ]
+                    # Atkārtojumus veic guard, tāpēc klienta iebūvētie atkārtojumi ir izslēgti
+                    with API_CALLS_IN_FLIGHT.labels('vision').track_inprogress(), stage_timer('vision'):
+                        batch_response = guard.call(lambda timeout: client.batch_annotate_images(
+                            requests=annotate_requests, timeout=timeout, retry=None))
+
+                    # Atbildes nāk tādā pašā secībā kā pieprasījumi
+                    for uri, response in zip(chunk, batch_response.responses):
+                        annotations, error_message = _annotations_from_response(response)
+                        if error_message:
+                            results[uri] = (None, error_message)
+                            continue
+                        results[uri] = _labels_from_annotations(annotations, uri, min_confidence)
+                        if cache and uri in images:
+                            cache.store_annotations(images[uri].content_hash, annotations, min_confidence)
+                    for uri in chunk[len(batch_response.responses):]:
+                        results[uri] = (None, "Vision API neatgrieza atbildi šim attēlam.")
+
+                except ProviderUnavailable as e:
+                    logger.warning(f"Vision API izlaists {len(chunk)} attēliem: {e.reason}.")
+                    ERRORS.labels('vision', 'ProviderUnavailable').inc()
+                    results.update({uri: (None, str(e)) for uri in chunk})
+                except google_exceptions.GoogleAPIError as e:
+                    error_message = f"Google API kļūda (Vision): {e}"
+                    logger.error(error_message, exc_info=False)
+                    ERRORS.labels('vision', e.__class__.__name__).inc()
+                    results.update({uri: (None, error_message) for uri in chunk})
+                except Exception as e:
+                    ERRORS.labels('vision', e.__class__.__name__).inc()
+                    error_message = f"Neizdevās iegūt AI atslēgvārdus (Vision): {e}"
+                    logger.error(error_message, exc_info=False)
+                    results.update({uri: (None, error_message) for uri in chunk})
+
+        return results
+
+    def translate_labels(self, labels, target_language='lv'):
+        """Tulko atslēgvārdu sarakstu uz norādīto mērķa valodu."""
+        if not labels:
+            return labels, "Translation API klients nav pieejams vai nav ko tulkot."
+        return self.translate_labels_batch([labels], target_language)[0]
+
+    def translate_labels_batch(self, label_lists, target_language='lv'):
+        """
+        Tulko vairāku attēlu atslēgvārdu sarakstus ar vienu deduplicētu tulkošanas posmu.
+        Kešatmiņā atrastie tulkojumi netiek pieprasīti atkārtoti; pārējie unikālie
+        atslēgvārdi tiek sūtīti pa TRANSLATION_API_MAX_SEGMENTS lielām daļām.
+        Atgriež sarakstu ar (translated_labels, error) pāriem tādā pašā secībā kā label_lists.
+        """
+        unique_labels = list(dict.fromkeys(label for labels in label_lists if labels for label in labels))
+
+        cache = get_translation_cache(self.settings)
+        translations = cache.get_many(unique_labels, target_language) if cache and unique_labels else {}
+        missing_labels = [label for label in unique_labels if label not in translations]
+        if unique_labels:
+            logger.info(f"Tulkojumu kešatmiņā atrasti {len(translations)} no {len(unique_labels)} atslēgvārdiem.")
+
+        failed = {}
+        guard = get_translation_guard(self.settings)
+        if missing_labels and not guard.available():
+            error_message = str(ProviderUnavailable(guard.name, "ķēdes pārtraucējs atvērts pēc atkārtotām kļūdām"))
+            failed.update(dict.fromkeys(missing_labels, error_message))
+        elif missing_labels:
+            with self.translation_client() as client:
+                if client:
+                    new_translations = self._translate_missing(client, guard, missing_labels, target_language, failed)
+                    translations.update(new_translations)
+                    if cache:
+                        cache.set_many(new_translations, target_language)
+                else:
+                    failed.update(dict.fromkeys(missing_labels, "Translation API klients nav pieejams vai nav ko tulkot."))
+
+        batch_results = []
+        for labels in label_lists:
+            if not labels:
+                batch_results.append((labels, "Translation API klients nav pieejams vai nav ko tulkot."))
+                continue
+            error_message = next((failed[label] for label in labels if label in failed), None)
+            if error_message:
+                batch_results.append((labels, error_message))
+            else:
+                batch_results.append(([translations[label] for label in labels], None))
+
+        logger.info(f"Iztulkoti {len(translations)} unikāli atslēgvārdi {len(label_lists)} attēliem.")
+        return batch_results
 
-    return translated_labels, error_message
\ No newline at end of file
+    def _translate_missing(self, client, guard, labels, target_language, failed):
+        """
+        Tulko atslēgvārdus pa translation_max_segments lielām daļām (caur guard); neizdevušās
+        daļas kļūdu ieraksta failed. translate_v2 klientam nevar padot taimautu, tāpēc guard
+        termiņš ierobežo gaidīšanu un atkārtojumus, nevis viena HTTP pieprasījuma ilgumu.
+        """
+        chunk_size = min(self.settings.translation_max_segments, TRANSLATION_API_MAX_SEGMENTS)
+        new_translations = {}
+        for start in range(0, len(labels), chunk_size):
+            chunk = labels[start:start + chunk_size]
+            try:
+                logger.info(f"Tulkojam {len(chunk)} unikālus atslēgvārdus uz '{target_language}' vienā pieprasījumā...")
+                with API_CALLS_IN_FLIGHT.labels('translation').track_inprogress(), stage_timer('translation'):
+                    results = guard.call(lambda timeout: client.translate(chunk, target_language=target_language))
+                if isinstance(results, dict):
+                    results = [results]
+                if not isinstance(results, list) or len(results) != len(chunk):
+                    raise TypeError(f"Negaidīts tulkošanas rezultāts: {type(results)}")
+                for label, item in zip(chunk, results):
+                    new_translations[label] = item['translatedText'].lower()
+            except ProviderUnavailable as e:
+                logger.warning(f"Translation API izlaists {len(chunk)} atslēgvārdiem: {e.reason}.")
+                ERRORS.labels('translation', 'ProviderUnavailable').inc()
+                failed.update(dict.fromkeys(chunk, str(e)))
+            except google_exceptions.GoogleAPIError as e:
+                error_message = f"Google API kļūda (Translate): {e}"
+                logger.error(error_message, exc_info=False)
+                ERRORS.labels('translation', e.__class__.__name__).inc()
+                failed.update(dict.fromkeys(chunk, error_message))
+            except Exception as e:
+                ERRORS.labels('translation', e.__class__.__name__).inc()
+                error_message = f"Neizdevās iztulkot atslēgvārdus: {e}"
+                logger.error(error_message, exc_info=False)
+                failed.update(dict.fromkeys(chunk, error_message))
+        return new_translations
@@ -0,0 +1,251 @@
+import os
+import time
+import random
+import logging
+import threading
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Ziņojumu sākums rezultātiem, kuros MI analīze tika izlaista, jo API īslaicīgi nav pieejams
+PROVIDER_UNAVAILABLE_PREFIX = "MI analīze īslaicīgi nav pieejama"
+
+# HTTP statusa kodi (arī google.api_core izņēmumu .code), pēc kuriem pieprasījumu vērts atkārtot
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+CIRCUIT_CLOSED = 'closed'
+CIRCUIT_OPEN = 'open'
+CIRCUIT_HALF_OPEN = 'half_open'
+
+_guards = []
+
+
+class ProviderUnavailable(Exception):
+    """API izsaukums netika veikts: ķēdes pārtraucējs ir atvērts vai kvotas gaidīšana pārsniedz termiņu."""
+
+    def __init__(self, name, reason):
+        super().__init__(f"{PROVIDER_UNAVAILABLE_PREFIX} ({name}: {reason}).")
+        self.name = name
+        self.reason = reason
+
+
+def is_retryable_error(error):
+    """Vai kļūda ir īslaicīga (kvota, pārslodze, taimauts, savienojums) un izsaukumu vērts atkārtot."""
+    code = getattr(error, 'code', None)
+    if isinstance(code, int):
+        return code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                              TimeoutError, ConnectionError))
+
+
+class TokenBucket:
+    """
+    Žetonu spainis pieprasījumu ātruma ierobežošanai: rate žetoni sekundē, ne vairāk
+    kā capacity uzkrāti. rate=0 - bez ierobežojuma.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = max(0.0, float(rate))
+        self.capacity = max(1.0, float(capacity if capacity is not None else rate or 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def acquire(self, timeout=None):
+        """
+        Paņem vienu žetonu, ja vajadzīgs - gaidot. Atgriež gaidīšanas laiku sekundēs
+        vai None, ja žetons nebūtu pieejams timeout sekunžu laikā (tad nekas netiek paņemts).
+        """
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if timeout is not None and wait > timeout:
+                return None
+            # Žetons tiek rezervēts uzreiz, tāpēc vienlaicīgie gaidītāji nostājas rindā
+            self._tokens -= 1
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class CircuitBreaker:
+    """
+    Ķēdes pārtraucējs: pēc failure_threshold secīgām kļūmēm atveras un reset_timeout
+    sekundes izsaukumus noraida uzreiz. Pēc tam (half_open) tiek pielaists viens
+    izmēģinājuma izsaukums - veiksmīgs aizver ķēdi, neveiksmīgs to atkal atver.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = max(0.0, float(reset_timeout))
+        self._lock = threading.Lock()
+        self._state = CIRCUIT_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.open_count = 0
+
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
+        self._trial_in_flight = False
+
+    def _current_state(self, now):
+        if self._state == CIRCUIT_OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = CIRCUIT_HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def allow(self):
+        """Vai izsaukumu drīkst veikt; half_open stāvoklī - tikai vienu vienlaicīgi."""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CIRCUIT_CLOSED:
+                return True
+            if state == CIRCUIT_HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def release_trial(self):
+        """Atbrīvo half_open izmēģinājumu, ja atļautais izsaukums netika veikts."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CIRCUIT_CLOSED:
+                logger.info(f"{self.name}: ķēdes pārtraucējs aizvērts, API atkal pieejams.")
+            self._state = CIRCUIT_CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == CIRCUIT_HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != CIRCUIT_OPEN:
+                    self.open_count += 1
+                    logger.warning(f"{self.name}: ķēdes pārtraucējs atvērts pēc {self._failures} kļūmēm, "
+                                   f"izsaukumi tiek izlaisti {self.reset_timeout:g}s.")
+                self._state = CIRCUIT_OPEN
+                self._opened_at = time.monotonic()
+
+
+class ApiGuard:
+    """
+    Ārējā API izsaukumu aizsardzība: ātruma ierobežošana (TokenBucket), atkārtojumi ar
+    eksponenciālu aizturi un nejaušību īslaicīgām kļūdām, kopējs termiņš vienam
+    izsaukumam (ieskaitot gaidīšanu un atkārtojumus) un ķēdes pārtraucējs.
+    """
+
+    def __init__(self, name, rate=0, burst=None, max_retries=3, backoff_base=0.5, backoff_max=8.0,
+                 deadline=20.0, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = max(0.0, float(backoff_base))
+        self.backoff_max = max(0.0, float(backoff_max))
+        self.deadline = max(0.1, float(deadline))
+        self._stats_lock = threading.Lock()
+        self._stats = {'calls': 0, 'successes': 0, 'failures': 0, 'client_errors': 0, 'retries': 0, 'rejected': 0,
+                       'rate_limited': 0, 'rate_limit_wait_seconds': 0.0, 'deadline_exceeded': 0}
+        _guards.append(self)
+
+    def _reset_after_fork(self):
+        self._stats_lock = threading.Lock()
+        self.bucket._reset_after_fork()
+        self.breaker._reset_after_fork()
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    def available(self):
+        """Vai ķēdes pārtraucējs pašlaik ļauj izsaukumus (lai var izlaist sagatavošanās darbu)."""
+        return self.breaker.state != CIRCUIT_OPEN
+
+    def backoff_delay(self, attempt):
+        """Aizture pirms atkārtojuma nr. attempt (0, 1, ...): "full jitter" līdz base * 2^attempt."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def call(self, func):
+        """
+        Izsauc func(timeout), kur timeout ir atlikušais termiņš sekundēs. Īslaicīgas kļūdas
+        tiek atkārtotas, kamēr atļauj max_retries un termiņš; pēdējā kļūda tiek izmesta.
+        Ja ķēde ir atvērta vai kvotas žetons nav gaidāms termiņa laikā - ProviderUnavailable.
+        """
+        if not self.breaker.allow():
+            self._count(rejected=1)
+            raise ProviderUnavailable(self.name, "ķēdes pārtraucējs atvērts pēc atkārtotām kļūdām")
+
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            waited = self.bucket.acquire(timeout=deadline - time.monotonic())
+            if waited is None:
+                self.breaker.release_trial()
+                self._count(rejected=1, deadline_exceeded=1)
+                raise ProviderUnavailable(self.name, "pieprasījumu kvota izsmelta")
+            if waited:
+                self._count(rate_limited=1, rate_limit_wait_seconds=waited)
+
+            self._count(calls=1)
+            try:
+                result = func(max(0.1, deadline - time.monotonic()))
+            except Exception as e:
+                if not is_retryable_error(e):
+                    # API atbildēja (piem., 400) - tā nav pakalpojuma kļūme, bet arī nepierāda, ka tas
+                    # ir atkal pieejams, tāpēc half_open izmēģinājums tiek tikai atbrīvots
+                    self.breaker.release_trial()
+                    self._count(failures=1, client_errors=1)
+                    raise
+                delay = self.backoff_delay(attempt)
+                out_of_time = time.monotonic() + delay >= deadline
+                if attempt >= self.max_retries or out_of_time:
+                    self.breaker.record_failure()
+                    self._count(failures=1, deadline_exceeded=int(out_of_time))
+                    raise
+                attempt += 1
+                self._count(retries=1)
+                logger.info(f"{self.name}: īslaicīga kļūda ({e.__class__.__name__}), "
+                            f"atkārtojums {attempt}/{self.max_retries} pēc {delay:.2f}s.")
+                time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            self._count(successes=1)
+            return result
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['circuit_state'] = self.breaker.state
+        stats['circuit_open_count'] = self.breaker.open_count
+        return stats
+
+
+def _reset_guards_after_fork():
+    for guard in _guards:
+        guard._reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_guards_after_fork)
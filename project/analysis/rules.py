@@ -0,0 +1,224 @@
+import os
+import string
+import logging
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from urllib.parse import urlparse, urljoin
+
+from werkzeug.utils import import_string
+
+logger = logging.getLogger(__name__)
+
+# Noklusējuma ALT teksta noteikumi izpildes secībā (skat. ALT_TEXT_RULES konfigurācijā)
+DEFAULT_ALT_TEXT_RULES = (
+    'project.analysis.rules.LengthRule',
+    'project.analysis.rules.ForbiddenPhraseRule',
+    'project.analysis.rules.FilenameRule',
+)
+# Rakstzīmes, kas tiek noņemtas no ALT teksta malām pirms salīdzināšanas ar faila nosaukumu
+FILENAME_STRIP_CHARS = string.punctuation + ' '
+# Garākais ALT teksts ar attēla paplašinājumu, kas vēl tiek uzskatīts par faila nosaukumu
+FILENAME_MAX_LENGTH = 80
+
+_PHRASE_END = ''
+
+
+class PhraseTrie:
+    """
+    Frāžu prefiksu koks (pa rakstzīmēm): ALT teksta sākums tiek salīdzināts ar visām frāzēm
+    vienā gājienā, tāpēc pārbaudes ilgums atkarīgs no garākās frāzes, nevis frāžu skaita.
+    Frāze sakrīt, ja ALT teksts ir šī frāze vai sākas ar to un atstarpi; ja sakrīt vairākas,
+    tiek atgriezta sarakstā pirmā (kā secīgā pārbaudē).
+    """
+
+    def __init__(self, phrases=()):
+        self._root = {}
+        self.size = 0
+        for position, (phrase, phrase_lower) in enumerate(phrases):
+            if not phrase_lower:
+                continue
+            node = self._root
+            for char in phrase_lower:
+                node = node.setdefault(char, {})
+            if _PHRASE_END not in node:
+                node[_PHRASE_END] = (position, phrase)
+                self.size += 1
+
+    def match_prefix(self, text):
+        """Atgriež frāzi (oriģinālajā rakstībā), ar kuru sākas text (mazajiem burtiem), vai None."""
+        node = self._root
+        best = None
+        last = len(text) - 1
+        for i, char in enumerate(text):
+            node = node.get(char)
+            if node is None:
+                break
+            entry = node.get(_PHRASE_END)
+            if entry is not None and (i == last or text[i + 1] == ' ') and (best is None or entry[0] < best[0]):
+                best = entry
+        return best[1] if best is not None else None
+
+
+class AltTextCandidate:
+    """Viens pārbaudāmais (src, ALT teksts) pāris; text - ALT bez atstarpēm malās, lower - mazajiem burtiem."""
+
+    __slots__ = ('src', 'text', 'lower')
+
+    def __init__(self, src, text):
+        self.src = src
+        self.text = text
+        self.lower = text.lower()
+
+
+class AltTextRule(ABC):
+    """
+    ALT teksta noteikuma bāzes klase. Noteikums tiek izveidots (kompilēts) vienreiz katrai
+    valodai un vietnei; phrases - valodas un vietnes aizliegtās frāzes ((frāze, mazajiem burtiem), ...).
+    check(candidate, flags) tiek izsaukts katram netukšam ALT tekstam: atgriež ieteikumu vai
+    None un iestata analysis laukus (piem., is_placeholder) vārdnīcā flags.
+    """
+
+    def __init__(self, settings, language, phrases):
+        self.settings = settings
+        self.language = language
+
+    @abstractmethod
+    def check(self, candidate, flags):
+        pass
+
+
+class LengthRule(AltTextRule):
+    def __init__(self, settings, language, phrases):
+        super().__init__(settings, language, phrases)
+        self.min_length = settings.min_alt_length
+        self.max_length = settings.max_alt_length
+
+    def check(self, candidate, flags):
+        alt_len = len(candidate.text)
+        if alt_len > self.max_length:
+            flags['is_too_long'] = True
+            return (f"ALT teksts (garums: {alt_len}) pārsniedz ieteicamo {self.max_length} rakstzīmju limitu. "
+                    f"Apsveriet saīsināšanu.")
+        if alt_len < self.min_length:
+            flags['is_too_short'] = True
+            return (f"ALT teksts '{candidate.text}' (garums: {alt_len}) ir īsāks par {self.min_length} rakstzīmēm. "
+                    f"Detalizētāks apraksts varētu būt noderīgāks.")
+        return None
+
+
+class ForbiddenPhraseRule(AltTextRule):
+    def __init__(self, settings, language, phrases):
+        super().__init__(settings, language, phrases)
+        self.trie = PhraseTrie(phrases)
+
+    def check(self, candidate, flags):
+        phrase = self.trie.match_prefix(candidate.lower)
+        if phrase is None:
+            return None
+        flags['is_placeholder'] = True
+        return f"ALT teksts sākas ar vai ir vispārīga frāze: '{phrase}'. Aizstājiet ar konkrētāku aprakstu."
+
+
+@lru_cache(maxsize=4096)
+def _url_filename(src):
+    """(faila nosaukums, nosaukums bez paplašinājuma) mazajiem burtiem no URL ceļa vai None."""
+    try:
+        filename = os.path.basename(urlparse(src).path)
+    except ValueError:
+        return None
+    if not filename:
+        return None
+    return filename.lower(), os.path.splitext(filename)[0].lower()
+
+
+class FilenameRule(AltTextRule):
+    def __init__(self, settings, language, phrases):
+        super().__init__(settings, language, phrases)
+        self.extensions = tuple(extension.lower() for extension in settings.filename_extensions)
+
+    def check(self, candidate, flags):
+        if flags.get('is_placeholder') or not candidate.src:
+            return None
+        filename = _url_filename(candidate.src)
+        if filename is None:
+            return None
+        alt_check = candidate.lower.strip(FILENAME_STRIP_CHARS)
+        is_exact_match = alt_check in filename
+        if not (is_exact_match or (len(alt_check) < FILENAME_MAX_LENGTH and alt_check.endswith(self.extensions))):
+            return None
+        flags['is_filename'] = True
+        return (f"ALT teksts ('{candidate.text}') varētu būt faila nosaukums. "
+                f"Faila nosaukumi parasti nav informatīvi. Aizstājiet ar satura aprakstu.")
+
+
+class RuleEngine:
+    """
+    Vienai valodai un vietnei kompilēti ALT teksta noteikumi. evaluate/evaluate_many atgriež
+    (flags, suggestions) katram pārim - analysis lauki un ieteikumi noteikumu secībā; tukšiem
+    vai trūkstošiem ALT tekstiem - None (tos apstrādā analyze_image_alt).
+    """
+
+    def __init__(self, rules):
+        self.rules = tuple(rules)
+
+    def evaluate(self, src, alt):
+        text = alt.strip() if alt else ''
+        if not text:
+            return None
+        candidate = AltTextCandidate(src, text)
+        flags = {}
+        suggestions = []
+        for rule in self.rules:
+            suggestion = rule.check(candidate, flags)
+            if suggestion:
+                suggestions.append(suggestion)
+        return flags, suggestions
+
+    def evaluate_many(self, pairs, base_url=None):
+        """
+        Noteikumu rezultāti (src, alt) pāru sarakstam (piem., vienai attēlu grupai) tādā pašā
+        secībā; relatīvie src tiek atrisināti pret base_url, atkārtoti pāri - novērtēti vienreiz.
+        """
+        evaluated = {}
+        results = []
+        for src, alt in pairs:
+            key = (src, alt)
+            if key not in evaluated:
+                absolute_src = (src or '').strip()
+                if base_url and absolute_src:
+                    try:
+                        absolute_src = urljoin(base_url, absolute_src)
+                    except ValueError:
+                        pass
+                evaluated[key] = self.evaluate(absolute_src, alt)
+            results.append(evaluated[key])
+        return results
+
+
+def site_for_url(url, sites):
+    """Vietne no sites (domēni bez 'www.'), kurai pieder url (arī apakšdomēni), vai None."""
+    if not url or not sites:
+        return None
+    try:
+        host = (urlparse(url).hostname or '').lower()
+    except ValueError:
+        return None
+    if host.startswith('www.'):
+        host = host[4:]
+    while host:
+        if host in sites:
+            return host
+        _, _, host = host.partition('.')
+    return None
+
+
+def compile_rule_engine(settings, language, site=None):
+    """Izveido RuleEngine no settings.alt_text_rules ar valodas un vietnes (ja norādīta) aizliegtajām frāzēm."""
+    phrases = settings.forbidden_phrases_for(language)
+    if site is not None:
+        phrases = phrases + settings.site_forbidden_phrases[site].get(language, ())
+    rules = [(import_string(rule) if isinstance(rule, str) else rule)(settings, language, phrases)
+             for rule in settings.alt_text_rules]
+    logger.debug(f"Kompilēti ALT noteikumi valodai {language}"
+                 f"{f' vietnei {site}' if site else ''}: {len(rules)} noteikumi, {len(phrases)} frāzes.")
+    return RuleEngine(rules)
@@ -0,0 +1,207 @@
+import json
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+from .rules import DEFAULT_ALT_TEXT_RULES, compile_rule_engine, site_for_url
+
+logger = logging.getLogger(__name__)
+
+# Paplašinājumi, pēc kuriem ALT teksts tiek atpazīts kā faila nosaukums
+IMAGE_FILE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp', '.tiff', '.ico')
+
+
+def _prepare_forbidden_phrases(forbidden_phrases):
+    """valoda -> ((frāze, frāze mazajiem burtiem), ...), lai to nebūtu jādara katram attēlam."""
+    return MappingProxyType({
+        language: tuple((phrase, phrase.lower()) for phrase in phrases)
+        for language, phrases in (forbidden_phrases or {}).items()
+    })
+
+
+def _load_site_forbidden_phrases(path):
+    """
+    Vietņu papildu aizliegtās frāzes no JSON faila {"vietne": {"valoda": ["frāze", ...]}}:
+    vietne -> valoda -> ((frāze, frāze mazajiem burtiem), ...). Kļūdas gadījumā - tukšs.
+    """
+    if not path:
+        return MappingProxyType({})
+    try:
+        with open(path, encoding='utf-8') as f:
+            raw = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Neizdevās ielādēt vietņu aizliegtās frāzes no {path}: {e}")
+        return MappingProxyType({})
+    sites = {}
+    for site, languages in raw.items():
+        site = site.strip().lower()
+        if site.startswith('www.'):
+            site = site[4:]
+        sites[site] = _prepare_forbidden_phrases(languages)
+    logger.info(f"Ielādētas aizliegtās frāzes {len(sites)} vietnēm no {path}.")
+    return MappingProxyType(sites)
+
+
+@dataclass(frozen=True)
+class AnalyzerSettings:
+    """
+    Nemainīgi, iepriekš sagatavoti analīzes iestatījumi. Tiek izveidoti vienreiz no
+    aplikācijas konfigurācijas (from_config) un padoti analīzes funkcijām tieši, tāpēc
+    attēlu analīze var notikt pavedienu un procesu pūlos bez Flask konteksta.
+    """
+
+    enable_vision: bool = False
+    enable_translation: bool = False
+    min_alt_length: int = 5
+    max_alt_length: int = 125
+    forbidden_phrases: MappingProxyType = field(default_factory=lambda: MappingProxyType({}), hash=False)
+    filename_extensions: tuple = IMAGE_FILE_EXTENSIONS
+    site_forbidden_phrases: MappingProxyType = field(default_factory=lambda: MappingProxyType({}), hash=False)
+    alt_text_rules: tuple = DEFAULT_ALT_TEXT_RULES
+
+    vision_min_confidence: float = 0.65
+    vision_batch_size: int = 16
+    translation_max_segments: int = 128
+    max_concurrent_image_analyses: int = 8
+
+    user_agent: str = None
+    request_timeout: int = 15
+    max_response_bytes: int = 20 * 1024 * 1024
+    http_pool_connections: int = 16
+    http_pool_maxsize: int = 10
+
+    client_pool_max_idle: int = 8
+    grpc_keepalive_time_ms: int = 30000
+
+    vision_rate_limit: float = 10.0
+    vision_rate_burst: int = 10
+    translation_rate_limit: float = 10.0
+    translation_rate_burst: int = 10
+    api_max_retries: int = 3
+    api_backoff_base: float = 0.5
+    api_backoff_max: float = 8.0
+    api_call_deadline: float = 20.0
+    api_breaker_failures: int = 5
+    api_breaker_reset: float = 30.0
+
+    vision_prefetch_enabled: bool = True
+    vision_prefetch_max_bytes: int = 10 * 1024 * 1024
+    vision_min_image_edge: int = 16
+    vision_max_image_edge: int = 1024
+
+    vision_cache_enabled: bool = True
+    vision_cache_path: str = None
+    vision_cache_memory_size: int = 2048
+    vision_cache_max_entries: int = 20000
+    vision_cache_revalidate_after: int = 3600
+    vision_cache_max_image_bytes: int = 10 * 1024 * 1024
+
+    translation_cache_enabled: bool = True
+    translation_cache_path: str = None
+    translation_cache_memory_size: int = 4096
+    translation_cache_max_entries: int = 100000
+    translation_cache_ttl: int = 0
+
+    page_cache_enabled: bool = True
+    page_cache_path: str = None
+    page_cache_memory_size: int = 64
+    page_cache_max_entries: int = 2000
+    page_cache_ttl: int = 7 * 24 * 3600
+
+    # Kompilētie noteikumu dzinēji (valoda, vietne) -> RuleEngine, skat. rule_engine
+    _rule_engines: dict = field(default_factory=dict, init=False, repr=False, compare=False, hash=False)
+
+    @classmethod
+    def from_config(cls, config):
+        """Izveido iestatījumus no Flask konfigurācijas (vai jebkuras vārdnīcas ar tām pašām atslēgām)."""
+        return cls(
+            enable_vision=bool(config.get('ENABLE_VISION_API', False)),
+            enable_translation=bool(config.get('ENABLE_TRANSLATION_API', False)),
+            min_alt_length=config.get('USER_SPECIFIED_MIN_ALT_LENGTH', 5),
+            max_alt_length=config.get('USER_SPECIFIED_MAX_ALT_LENGTH', 125),
+            forbidden_phrases=_prepare_forbidden_phrases(config.get('FORBIDDEN_PHRASES')),
+            site_forbidden_phrases=_load_site_forbidden_phrases(config.get('SITE_FORBIDDEN_PHRASES_PATH')),
+            alt_text_rules=tuple(config.get('ALT_TEXT_RULES') or DEFAULT_ALT_TEXT_RULES),
+            vision_min_confidence=config.get('VISION_API_MIN_CONFIDENCE', 0.65),
+            vision_batch_size=max(1, int(config.get('VISION_API_BATCH_SIZE', 16))),
+            translation_max_segments=max(1, int(config.get('TRANSLATION_API_MAX_SEGMENTS', 128))),
+            max_concurrent_image_analyses=max(1, int(config.get('MAX_CONCURRENT_IMAGE_ANALYSES', 8))),
+            user_agent=config.get('USER_AGENT'),
+            request_timeout=config.get('REQUEST_TIMEOUT', 15),
+            max_response_bytes=config.get('HTTP_MAX_RESPONSE_BYTES', 20 * 1024 * 1024),
+            http_pool_connections=config.get('HTTP_POOL_CONNECTIONS', 16),
+            http_pool_maxsize=config.get('HTTP_POOL_MAXSIZE', 10),
+            client_pool_max_idle=config.get('GOOGLE_CLIENT_POOL_MAX_IDLE', 8),
+            grpc_keepalive_time_ms=config.get('GRPC_KEEPALIVE_TIME_MS', 30000),
+            vision_rate_limit=config.get('VISION_API_RATE_LIMIT', 10.0),
+            vision_rate_burst=config.get('VISION_API_RATE_BURST', 10),
+            translation_rate_limit=config.get('TRANSLATION_API_RATE_LIMIT', 10.0),
+            translation_rate_burst=config.get('TRANSLATION_API_RATE_BURST', 10),
+            api_max_retries=config.get('GOOGLE_API_MAX_RETRIES', 3),
+            api_backoff_base=config.get('GOOGLE_API_BACKOFF_BASE', 0.5),
+            api_backoff_max=config.get('GOOGLE_API_BACKOFF_MAX', 8.0),
+            api_call_deadline=config.get('GOOGLE_API_CALL_DEADLINE', 20.0),
+            api_breaker_failures=config.get('GOOGLE_API_BREAKER_FAILURES', 5),
+            api_breaker_reset=config.get('GOOGLE_API_BREAKER_RESET', 30.0),
+            vision_prefetch_enabled=bool(config.get('VISION_PREFETCH_ENABLED', True)),
+            vision_prefetch_max_bytes=config.get('VISION_PREFETCH_MAX_BYTES', 10 * 1024 * 1024),
+            vision_min_image_edge=config.get('VISION_MIN_IMAGE_EDGE', 16),
+            vision_max_image_edge=config.get('VISION_MAX_IMAGE_EDGE', 1024),
+            vision_cache_enabled=bool(config.get('VISION_CACHE_ENABLED', True)),
+            vision_cache_path=config.get('VISION_CACHE_PATH'),
+            vision_cache_memory_size=config.get('VISION_CACHE_MEMORY_SIZE', 2048),
+            vision_cache_max_entries=config.get('VISION_CACHE_MAX_ENTRIES', 20000),
+            vision_cache_revalidate_after=config.get('VISION_CACHE_REVALIDATE_AFTER', 3600),
+            vision_cache_max_image_bytes=config.get('VISION_CACHE_MAX_IMAGE_BYTES', 10 * 1024 * 1024),
+            translation_cache_enabled=bool(config.get('TRANSLATION_CACHE_ENABLED', True)),
+            translation_cache_path=config.get('TRANSLATION_CACHE_PATH'),
+            translation_cache_memory_size=config.get('TRANSLATION_CACHE_MEMORY_SIZE', 4096),
+            translation_cache_max_entries=config.get('TRANSLATION_CACHE_MAX_ENTRIES', 100000),
+            translation_cache_ttl=config.get('TRANSLATION_CACHE_TTL', 0),
+            page_cache_enabled=bool(config.get('PAGE_CACHE_ENABLED', True)),
+            page_cache_path=config.get('PAGE_CACHE_PATH'),
+            page_cache_memory_size=config.get('PAGE_CACHE_MEMORY_SIZE', 64),
+            page_cache_max_entries=config.get('PAGE_CACHE_MAX_ENTRIES', 2000),
+            page_cache_ttl=config.get('PAGE_CACHE_TTL', 7 * 24 * 3600),
+        )
+
+    def forbidden_phrases_for(self, language):
+        return self.forbidden_phrases.get(language, ())
+
+    def rule_engine(self, language, page_url=None):
+        """
+        ALT teksta noteikumi valodai un lapas vietnei (ar tās papildu frāzēm, ja tādas ir),
+        kompilēti pirmajā izsaukumā un pēc tam izmantoti atkārtoti visiem attēliem.
+        """
+        key = (language, site_for_url(page_url, self.site_forbidden_phrases))
+        engine = self._rule_engines.get(key)
+        if engine is None:
+            engine = self._rule_engines.setdefault(key, compile_rule_engine(self, *key))
+        return engine
+
+    def analysis_fingerprint(self):
+        """
+        Jaucējkods iestatījumiem, kas ietekmē attēlu analīzes rezultātu (ne tīkla vai
+        kešatmiņu iestatījumiem), lai saglabātos lapu rezultātus neizmantotu pēc to maiņas.
+        """
+        relevant = {
+            'enable_vision': self.enable_vision,
+            'enable_translation': self.enable_translation,
+            'min_alt_length': self.min_alt_length,
+            'max_alt_length': self.max_alt_length,
+            'forbidden_phrases': {language: [phrase for phrase, _ in phrases]
+                                  for language, phrases in sorted(self.forbidden_phrases.items())},
+            'filename_extensions': list(self.filename_extensions),
+            'site_forbidden_phrases': {site: {language: [phrase for phrase, _ in phrases]
+                                              for language, phrases in sorted(languages.items())}
+                                       for site, languages in sorted(self.site_forbidden_phrases.items())},
+            'alt_text_rules': [rule if isinstance(rule, str) else f"{rule.__module__}.{rule.__qualname__}"
+                               for rule in self.alt_text_rules],
+            'vision_min_confidence': self.vision_min_confidence,
+            'vision_prefetch_enabled': self.vision_prefetch_enabled,
+            'vision_prefetch_max_bytes': self.vision_prefetch_max_bytes,
+            'vision_min_image_edge': self.vision_min_image_edge,
+            'vision_max_image_edge': self.vision_max_image_edge,
+        }
+        return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode('utf-8')).hexdigest()
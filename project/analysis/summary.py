@@ -0,0 +1,53 @@
+# Rezultātu filtri (lietotāja saskarnē un glabātuvē) un to bitu karogi
+FLAG_ISSUES = 1
+FLAG_EMPTY_ALT = 2
+FLAG_MISSING_ALT = 4
+RESULT_FILTERS = {
+    'all': 0,
+    'issues': FLAG_ISSUES,
+    'empty_alt': FLAG_EMPTY_ALT,
+    'missing_alt': FLAG_MISSING_ALT,
+}
+
+
+def result_flags(result):
+    """Attēla rezultāta filtru karogi (FLAG_*), lai glabātuvē varētu atlasīt bez JSON parsēšanas."""
+    analysis = result.get('analysis') or {}
+    flags = 0
+    if not analysis.get('exists', True):
+        flags |= FLAG_MISSING_ALT
+    if analysis.get('is_empty'):
+        flags |= FLAG_EMPTY_ALT
+    if flags or result.get('suggestions'):
+        flags |= FLAG_ISSUES
+    return flags
+
+
+def filter_flag(name):
+    """Filtra nosaukuma karogs (0 - visi rezultāti); nezināmam filtram - None."""
+    return RESULT_FILTERS.get(name or 'all')
+
+
+class ResultSummary:
+    """Lapas kopsavilkuma skaitītāji, kas tiek papildināti katram rezultātam analīzes laikā."""
+
+    def __init__(self):
+        self.counts = dict.fromkeys(RESULT_FILTERS, 0)
+
+    def add(self, result):
+        flags = result_flags(result)
+        for name, flag in RESULT_FILTERS.items():
+            if flags & flag == flag:
+                self.counts[name] += 1
+        return flags
+
+    def as_dict(self):
+        return dict(self.counts)
+
+
+def summarize_results(results):
+    """Kopsavilkums jau gataviem rezultātiem (piem., vecākiem saglabātiem ierakstiem bez tā)."""
+    summary = ResultSummary()
+    for result in results:
+        summary.add(result)
+    return summary.as_dict()
@@ -0,0 +1,39 @@
+import logging
+
+from .context import get_analysis_providers
+from .word_normalization import warm_up_language
+from ..metrics import get_startup_timings, timed_startup_step
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up(app):
+    """
+    Iepriekš ielādē smagos resursus, lai pirmais pieprasījums nebūtu lēns:
+    Google bibliotēkas un klientu pūlus (ja API ieslēgti) un WARMUP_LANGUAGES
+    valodu lematizatorus/stemmerus. Izsaukt, kad darba process sāk darbu, piem.,
+    gunicorn.conf.py:
+
+        def post_fork(server, worker):
+            from project.analysis.warmup import warm_up
+            warm_up(worker.app.wsgi())
+
+    vai automātiski no create_app, ja WARMUP_ON_STARTUP=True. Atgriež sagatavošanas
+    soļu ilgumus (skat. metrics.get_startup_timings).
+    """
+    providers = get_analysis_providers(app)
+    with timed_startup_step('warm_up'):
+        if providers.settings.enable_vision:
+            with timed_startup_step('vision_client'), providers.vision_client() as client:
+                if client is None:
+                    logger.warning("Vision API klientu neizdevās sagatavot.")
+        if providers.settings.enable_translation:
+            with timed_startup_step('translation_client'), providers.translation_client() as client:
+                if client is None:
+                    logger.warning("Translation API klientu neizdevās sagatavot.")
+
+        for language in app.config.get('WARMUP_LANGUAGES', []):
+            with timed_startup_step(f'normalization_{language}'):
+                warm_up_language(language)
+
+    return get_startup_timings()
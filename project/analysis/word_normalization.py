@@ -1,24 +1,42 @@
 import re
 import logging
-from nltk.stem import SnowballStemmer
+import threading
+from functools import lru_cache
 import simplemma
 from LatvianStemmer import stem
 
+from ..metrics import timed_startup_step
+
 logger = logging.getLogger(__name__)
 
+# NLTK tiek importēts slinki - tikai tad, kad pirmo reizi vajadzīgs angļu stemmers
 snowball_stemmers = {}
-try:
-    snowball_stemmers['en'] = SnowballStemmer('english')
-    logger.info("NLTK SnowballStemmer inicializēts angļu valodai")
-except Exception as e:
-    logger.warning(f"Nevarēja inicializēt SnowballStemmer: {e}")
+_snowball_lock = threading.Lock()
+_snowball_attempted = False
 
-def normalize_word(word, language='lv'):
-    if not word:
-        return word
-        
-    word = word.lower()
-    
+
+def get_snowball_stemmer(language='en'):
+    """Atgriež NLTK SnowballStemmer angļu valodai, inicializējot to pirmajā izsaukumā."""
+    global _snowball_attempted
+    if not _snowball_attempted:
+        with _snowball_lock:
+            if not _snowball_attempted:
+                with timed_startup_step('import_nltk_snowball'):
+                    try:
+                        from nltk.stem import SnowballStemmer
+                        snowball_stemmers['en'] = SnowballStemmer('english')
+                        logger.info("NLTK SnowballStemmer inicializēts angļu valodai")
+                    except Exception as e:
+                        logger.warning(f"Nevarēja inicializēt SnowballStemmer: {e}")
+                _snowball_attempted = True
+    return snowball_stemmers.get(language)
+
+# Meklē burtu virknes, kas var ietvert iekšējas defises (piem., "self-propelled").
+TOKEN_RE = re.compile(r'\b[a-zA-ZāčēģīķļņšūžĀČĒĢĪĶĻŅŠŪŽ]+(?:-[a-zA-ZāčēģīķļņšūžĀČĒĢĪĶĻŅŠŪŽ]+)*\b', re.UNICODE)
+NORMALIZATION_CACHE_SIZE = 50000
+
+
+def _normalize_lowercase_word(word, language):
     if language == 'lv':
         try:
             return simplemma.lemmatize(word, lang='lv')
@@ -33,9 +51,10 @@ def normalize_word(word, language='lv'):
         return word
         
     elif language == 'en':
-        if 'en' in snowball_stemmers:
+        stemmer = get_snowball_stemmer('en')
+        if stemmer is not None:
             try:
-                return snowball_stemmers['en'].stem(word)
+                return stemmer.stem(word)
             except Exception as e:
                 logger.debug(f"SnowballStemmer kļūda vārdam '{word}': {e}")
         
@@ -53,58 +72,88 @@ def normalize_word(word, language='lv'):
             logger.debug(f"simplemma kļūda vārdam '{word}' valodai '{language}': {e}")
         return word
 
-def tokenize_text(text):
-    if not text:
-        return []
-    # Meklē burtu virknes, kas var ietvert iekšējas defises (piem., "self-propelled").
-    words = re.findall(r'\b[a-zA-ZāčēģīķļņšūžĀČĒĢĪĶĻŅŠŪŽ]+(?:-[a-zA-ZāčēģīķļņšūžĀČĒĢĪĶĻŅŠŪŽ]+)*\b', text.lower(), re.UNICODE)
-    return words
 
-def compare_alt_text_with_ai_phrases(alt_text, ai_keyword_phrases, language='lv'):
+class NormalizationEngine:
     """
-    Salīdzina ALT tekstu ar AI atslēgvārdu frāzēm.
-    Frāze tiek uzskatīta par atbilstošu, ja visi tās normalizētie vārdi
-    ir atrodami ALT teksta normalizētajos vārdos.
-    Atgriež sakritušo frāžu skaitu, kopējo frāžu skaitu un sakritības masku (boolean sarakstu).
+    Vārdu normalizācija ar ierobežotu atmiņas kešatmiņu katrai valodai.
+    AI atslēgvārdu vārdnīca stipri atkārtojas, tāpēc lielākā daļa lematizācijas
+    izsaukumu tiek aizstāti ar kešatmiņas trāpījumiem.
     """
-    if not ai_keyword_phrases: # Ja nav AI frāžu, nav ko salīdzināt
-        return 0, 0, []
-        
-    if not alt_text: # Ja nav ALT teksta, neviena frāze nevar sakrist
-        return 0, len(ai_keyword_phrases), [False] * len(ai_keyword_phrases)
 
-    alt_words_tokenized = tokenize_text(alt_text)
-    normalized_alt_words_set = {normalize_word(word, language) for word in alt_words_tokenized if word}
+    def __init__(self, max_entries_per_language=NORMALIZATION_CACHE_SIZE):
+        self.max_entries_per_language = max_entries_per_language
+        self._memos = {}
+        self._lock = threading.Lock()
+        self._deduplicated = 0
 
-    if not normalized_alt_words_set: # Ja ALT teksts nesatur normalizējamus vārdus
-        return 0, len(ai_keyword_phrases), [False] * len(ai_keyword_phrases)
+    def _memo(self, language):
+        memo = self._memos.get(language)
+        if memo is None:
+            with self._lock:
+                memo = self._memos.get(language)
+                if memo is None:
+                    memo = lru_cache(maxsize=self.max_entries_per_language)(
+                        lambda word: _normalize_lowercase_word(word, language)
+                    )
+                    self._memos[language] = memo
+        return memo
 
-    matched_phrase_count = 0
-    matched_mask = [False] * len(ai_keyword_phrases) # Inicializē masku
+    def normalize(self, word, language='lv'):
+        if not word:
+            return word
+        return self._memo(language)(word.lower())
 
-    for i, phrase_text in enumerate(ai_keyword_phrases):
-        if not phrase_text or not phrase_text.strip():
-            # matched_mask[i] paliek False tukšām/nederīgām frāzēm
-            continue 
+    def normalize_many(self, words, language='lv'):
+        """Normalizē vārdu sarakstu, katru unikālo vārdu apstrādājot tikai vienreiz."""
+        memo = self._memo(language)
+        lowered = [word.lower() if word else word for word in words]
+        unique = {word: None for word in lowered if word}
+        for word in unique:
+            unique[word] = memo(word)
+        with self._lock:
+            self._deduplicated += len(lowered) - len(unique)
+        return [unique[word] if word else word for word in lowered]
 
-        ai_phrase_tokenized_words = tokenize_text(phrase_text)
-        if not ai_phrase_tokenized_words:
-            # matched_mask[i] paliek False
-            continue
+    def stats(self):
+        """Atgriež kešatmiņas trāpījumu skaitītājus katrai valodai."""
+        stats = {'deduplicated': self._deduplicated, 'languages': {}}
+        for language, memo in list(self._memos.items()):
+            info = memo.cache_info()
+            lookups = info.hits + info.misses
+            stats['languages'][language] = {
+                'hits': info.hits, 'misses': info.misses, 'size': info.currsize,
+                'hit_rate': info.hits / lookups if lookups else 0.0,
+            }
+        return stats
 
-        current_ai_phrase_normalized_words = {normalize_word(word, language) for word in ai_phrase_tokenized_words if word}
-        
-        if not current_ai_phrase_normalized_words:
-            # matched_mask[i] paliek False
-            continue
+    def clear(self):
+        with self._lock:
+            self._memos.clear()
+            self._deduplicated = 0
 
-        if current_ai_phrase_normalized_words.issubset(normalized_alt_words_set):
-            matched_phrase_count += 1
-            matched_mask[i] = True # Atzīmē šo frāzi kā sakritušu
-            
-    final_total_phrases_to_compare_against = len(ai_keyword_phrases)
 
-    logger.debug(f"Frāžu salīdzināšana: Alt normalizētie vārdi='{normalized_alt_words_set}', "
-                 f"AI frāzes='{ai_keyword_phrases}', Sakrita frāzes={matched_phrase_count}, Kopā AI frāzes={final_total_phrases_to_compare_against}, "
-                 f"Sakritības maska={matched_mask}")
-    return matched_phrase_count, final_total_phrases_to_compare_against, matched_mask
\ No newline at end of file
+engine = NormalizationEngine()
+
+
+def normalize_word(word, language='lv'):
+    return engine.normalize(word, language)
+
+
+def normalize_many(words, language='lv'):
+    return engine.normalize_many(words, language)
+
+
+def warm_up_language(language):
+    """Ielādē valodas lematizatora vārdnīcu (un stemmeru), lai pirmais pieprasījums nebūtu lēns."""
+    if language == 'en':
+        get_snowball_stemmer('en')
+    try:
+        simplemma.lemmatize('test', lang=language)
+    except Exception as e:
+        logger.warning(f"Nevarēja sagatavot simplemma valodai '{language}': {e}")
+
+
+def tokenize_text(text):
+    if not text:
+        return []
+    return TOKEN_RE.findall(text.lower())
@@ -0,0 +1,99 @@
+import requests
+from flask import Response, jsonify, request, current_app, stream_with_context
+
+from . import api_bp
+from .streaming import iter_analysis_events, page_summary, format_ndjson, format_sse, StreamCapacityExceeded
+from ..analysis.page import (analyze_page, describe_page_error, validate_page_url, validate_languages,
+                             parse_languages, NotHtmlError)
+from ..analysis.pipeline import resolve_languages
+from ..metrics import collect_timings
+
+STREAM_FORMATS = {
+    'ndjson': ('application/x-ndjson', format_ndjson),
+    'sse': ('text/event-stream', format_sse),
+}
+
+# Nederīgs lietotāja ievadītais URL (nevis lapas servera kļūda)
+CLIENT_URL_ERRORS = (
+    requests.exceptions.InvalidURL,
+    requests.exceptions.MissingSchema,
+    requests.exceptions.InvalidSchema,
+    requests.exceptions.URLRequired,
+)
+
+
+def _response_format(data):
+    """'json' (noklusējums), 'ndjson' vai 'sse' - no parametra format vai Accept galvenes."""
+    requested = data.get('format')
+    if requested:
+        return requested
+    best = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson', 'text/event-stream'])
+    return {'application/x-ndjson': 'ndjson', 'text/event-stream': 'sse'}.get(best, 'json')
+
+
+def _error_status(error):
+    if isinstance(error, NotHtmlError):
+        return 422
+    if isinstance(error, CLIENT_URL_ERRORS):
+        return 400
+    if isinstance(error, requests.exceptions.Timeout):
+        return 504
+    if isinstance(error, requests.exceptions.RequestException):
+        return 502
+    return 500
+
+
+@api_bp.route('/analyze', methods=['GET', 'POST'])
+def analyze():
+    """
+    Analizē lapas attēlus un atgriež tos pašus {'src', 'alt', 'analysis', 'suggestions'} ierakstus
+    kā rezultātu lapa. format=json - viena atbilde pēc visu attēlu analīzes; format=ndjson
+    vai format=sse - katrs attēls tiek nosūtīts, tiklīdz tā analīze pabeigta. timings=1 -
+    pievienot analīzes posmu ilgumus. languages - papildu valodas (saraksts vai 'en,lv'), kuru
+    pārbaudes katram attēlam tiek pievienotas laukā languages, izmantojot to pašu MI analīzi.
+    """
+    data = request.get_json(silent=True) or request.values
+    page_url = (data.get('url') or '').strip()
+    selected_language = data.get('language', 'lv')
+    extra_languages = data.getlist('languages') if hasattr(data, 'getlist') else data.get('languages')
+    languages = resolve_languages(selected_language, parse_languages(extra_languages))
+    with_timings = str(data.get('timings', '')).lower() in ('1', 'true')
+    response_format = _response_format(data)
+
+    error_message = validate_page_url(page_url)
+    if not error_message:
+        error_message = validate_languages(languages, current_app.config.get('SUPPORTED_LANGUAGES', {}))
+    if not error_message and response_format not in ('json', *STREAM_FORMATS):
+        error_message = f"Neatbalstīts formāts: '{response_format}'."
+    if error_message:
+        return jsonify({'error': error_message}), 400
+
+    if response_format in STREAM_FORMATS:
+        mimetype, formatter = STREAM_FORMATS[response_format]
+        try:
+            events = iter_analysis_events(current_app._get_current_object(), page_url, selected_language,
+                                          with_timings, languages=languages)
+        except StreamCapacityExceeded:
+            current_app.logger.warning(f"Straumējošās analīzes vietas aizņemtas, noraidīts: {page_url}")
+            return jsonify({'error': "Serveris ir aizņemts, lūdzu, mēģiniet vēlreiz vēlāk."}), 503, {'Retry-After': '5'}
+        body = (formatter(event, payload) for event, payload in events)
+        # X-Accel-Buffering: starpniekserveris (nginx) nedrīkst uzkrāt straumi
+        response = Response(stream_with_context(body), mimetype=mimetype,
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+        # Atbilde tiek aizvērta arī tad, ja serveris straumi tā arī nesāka lasīt
+        response.call_on_close(events.close)
+        return response
+
+    with collect_timings() as timings:
+        try:
+            page_analysis = analyze_page(page_url, selected_language, use_page_cache=True, languages=languages)
+        except Exception as e:
+            error_message = describe_page_error(e, page_url, current_app.config)
+            if isinstance(e, (NotHtmlError, requests.exceptions.RequestException)):
+                current_app.logger.error(f"Neizdevās analizēt {page_url}: {error_message}")
+            else:
+                current_app.logger.exception(f"Neparedzēta kļūda apstrādājot {page_url}")
+            return jsonify({'error': error_message}), _error_status(e)
+    response = page_summary(page_analysis, timings if with_timings else None)
+    response['results'] = page_analysis['results']
+    return jsonify(response)
@@ -0,0 +1,151 @@
+import os
+import json
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from ..analysis.page import analyze_page, describe_page_error, NotHtmlError
+from ..metrics import collect_timings
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+_executor_lock = threading.Lock()
+
+
+class AnalysisCancelled(Exception):
+    """Klients atvienojās - straumējošā analīze tiek pārtraukta."""
+
+
+class StreamCapacityExceeded(Exception):
+    """Visas straumējošo analīžu vietas (STREAM_MAX_CONCURRENT) ir aizņemtas."""
+
+
+def _get_stream_slots(app):
+    """Aplikācijas straumējošo analīžu izpildītājs un brīvo vietu semafors; katram procesam (arī pēc fork) savs."""
+    entry = app.extensions.get('stream_executor')
+    if entry is None or entry[0] != os.getpid():
+        with _executor_lock:
+            entry = app.extensions.get('stream_executor')
+            if entry is None or entry[0] != os.getpid():
+                limit = max(1, int(app.config.get('STREAM_MAX_CONCURRENT', 8)))
+                entry = (os.getpid(), ThreadPoolExecutor(max_workers=limit, thread_name_prefix='api-stream'),
+                         threading.BoundedSemaphore(limit))
+                app.extensions['stream_executor'] = entry
+    return entry[1], entry[2]
+
+
+def page_summary(page_analysis, timings=None):
+    """Lapas kopsavilkums bez attēlu rezultātiem (straumes 'done' notikumam)."""
+    summary = {key: value for key, value in page_analysis.items() if key != 'results'}
+    if timings is not None:
+        summary['timings'] = timings.as_dict()
+    return summary
+
+
+class AnalysisEventStream:
+    """
+    Straumējošās analīzes notikumi (skat. iter_analysis_events). Analīze tiek nodota izpildītājam
+    tikai, sākot iterāciju; close() to pārtrauc pie nākamā attēla un, ja iterācija vēl nav sākta
+    (klients atvienojās pirms pirmā notikuma), uzreiz atbrīvo aizņemto vietu.
+    """
+
+    def __init__(self, app, executor, slots, page_url, selected_language, with_timings, languages):
+        self.app = app
+        self.page_url = page_url
+        self._executor = executor
+        self._slots = slots
+        self._analyze = (page_url, selected_language, with_timings, languages)
+        self._events = queue.Queue()
+        self._cancelled = threading.Event()
+        self._state_lock = threading.Lock()
+        self._started = False
+        self._released = False
+
+    def _release_slot(self):
+        with self._state_lock:
+            if self._released:
+                return
+            self._released = True
+        self._slots.release()
+
+    def _on_result(self, result, images_done, images_found):
+        if self._cancelled.is_set():
+            raise AnalysisCancelled()
+        if result is not None:
+            self._events.put(('result', {'data': result, 'progress': {'done': images_done, 'found': images_found}}))
+
+    def _run(self):
+        page_url, selected_language, with_timings, languages = self._analyze
+        with self.app.app_context(), collect_timings() as timings:
+            try:
+                if self._cancelled.is_set():
+                    raise AnalysisCancelled()
+                page_analysis = analyze_page(page_url, selected_language, on_result=self._on_result,
+                                             use_page_cache=True, languages=languages)
+                self._events.put(('done', {'data': page_summary(page_analysis, timings if with_timings else None)}))
+            except AnalysisCancelled:
+                logger.info(f"Straumējošā analīze pārtraukta (klients atvienojās): {page_url}")
+            except Exception as e:
+                if not isinstance(e, (NotHtmlError, requests.exceptions.RequestException)):
+                    logger.exception(f"Neparedzēta kļūda straumējot {page_url}")
+                self._events.put(('error', {'data': {'error': describe_page_error(e, page_url, self.app.config)}}))
+            finally:
+                self._release_slot()
+                self._events.put(_END)
+
+    def __iter__(self):
+        with self._state_lock:
+            if self._started or self._cancelled.is_set():
+                return
+            self._started = True
+        try:
+            self._executor.submit(self._run)
+        except BaseException:
+            self._release_slot()
+            raise
+        try:
+            while True:
+                event = self._events.get()
+                if event is _END:
+                    return
+                yield event
+        finally:
+            # Arī GeneratorExit (klients atvienojās) - analīzes pavediens apstājas pie nākamā attēla
+            self._cancelled.set()
+
+    def close(self):
+        """Pārtrauc analīzi; izsaukt, kad atbilde tiek aizvērta (piem., response.call_on_close)."""
+        self._cancelled.set()
+        with self._state_lock:
+            started = self._started
+        if not started:
+            self._release_slot()
+
+
+def iter_analysis_events(app, page_url, selected_language='lv', with_timings=False, languages=None):
+    """
+    Aizņem straumējošās analīzes vietu un atgriež AnalysisEventStream, kas, sākot iterāciju, sāk lapas
+    analīzi un atgriež (yield) notikumus, tiklīdz tie ir gatavi: ('result', {'data': attēla rezultāts,
+    'progress': {'done', 'found'}}) katram attēlam, beigās ('done', {'data': kopsavilkums}) vai
+    ('error', {'data': {'error': ziņojums}}). Attēli tiek analizēti grupās (VISION_API_BATCH_SIZE),
+    tāpēc rezultāti tiek sūtīti pa grupām dokumenta secībā (skat. iter_image_analyses).
+    Ja visas STREAM_MAX_CONCURRENT vietas ir aizņemtas - StreamCapacityExceeded (analīze netiek sākta).
+    Straumes close() (arī, ja iterācija nav sākta) pārtrauc analīzi un atbrīvo vietu.
+    languages - papildu valodas (skat. analyze_page).
+    """
+    executor, slots = _get_stream_slots(app)
+    if not slots.acquire(blocking=False):
+        raise StreamCapacityExceeded()
+    return AnalysisEventStream(app, executor, slots, page_url, selected_language, with_timings, languages)
+
+
+def format_ndjson(event, payload):
+    return json.dumps({'event': event, **payload}, ensure_ascii=False) + '\n'
+
+
+def format_sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
@@ -0,0 +1,40 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from ..analysis.context import get_analyzer_settings
+from .runner import iter_url_list, iter_sitemap_targets, iter_html_files, run_audit, write_jsonl, write_csv
+
+
+@click.command('audit')
+@click.option('--urls', 'url_file', type=click.File('r', encoding='utf-8'),
+              help="Fails ar URL sarakstu, viens URL rindā ('-' - standarta ievade).")
+@click.option('--sitemap', help="Vietnes kartes (sitemap.xml) URL.")
+@click.option('--html-dir', type=click.Path(exists=True, file_okay=False), help="Mape ar saglabātiem .html failiem.")
+@click.option('--base-url', help="URL, pret kuru atrisināt saglabāto HTML failu relatīvās attēlu adreses.")
+@click.option('--language', default='lv', help="ALT tekstu pārbaudes valoda.")
+@click.option('--workers', type=int, default=None, help="Darba procesu skaits (noklusējums - AUDIT_WORKERS vai CPU kodolu skaits).")
+@click.option('--format', 'output_format', type=click.Choice(['jsonl', 'csv']), default='jsonl',
+              help="jsonl - viena rinda katrai lapai, csv - viena rinda katram attēlam.")
+@click.option('--output', type=click.File('w', encoding='utf-8', lazy=False), default='-', help="Izvades fails ('-' - standarta izvade).")
+@click.option('--timings', is_flag=True, help="Pievienot katras lapas analīzes posmu ilgumus (tikai jsonl).")
+@with_appcontext
+def audit_command(url_file, sitemap, html_dir, base_url, language, workers, output_format, output, timings):
+    """Bezsaistes ALT tekstu audits URL sarakstam, vietnes kartei vai saglabātu HTML failu mapei."""
+    sources = [source for source in (url_file, sitemap, html_dir) if source]
+    if len(sources) != 1:
+        raise click.UsageError("Norādiet tieši vienu no --urls, --sitemap vai --html-dir.")
+
+    if url_file:
+        targets = iter_url_list(url_file)
+    elif sitemap:
+        targets = iter_sitemap_targets(sitemap, get_analyzer_settings())
+    else:
+        targets = iter_html_files(html_dir, base_url)
+
+    reports = run_audit(targets, language, workers=workers or current_app.config.get('AUDIT_WORKERS'),
+                        with_timings=timings)
+    writer = write_csv if output_format == 'csv' else write_jsonl
+    counts = writer(reports, output)
+    summary = ', '.join(f"{status}: {count}" for status, count in sorted(counts.items())) or 'nav lapu'
+    click.echo(f"Audits pabeigts ({summary}).", err=True)
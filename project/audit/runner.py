@@ -0,0 +1,194 @@
+import os
+import csv
+import json
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from urllib.parse import urljoin
+
+import requests
+from flask import current_app
+
+from ..analysis.page import analyze_page, analyze_html, describe_page_error, validate_page_url, NotHtmlError
+from ..crawler.crawler import iter_sitemap_urls
+from ..metrics import collect_timings
+
+logger = logging.getLogger(__name__)
+
+HTML_EXTENSIONS = ('.html', '.htm')
+FILE_READ_CHUNK_SIZE = 64 * 1024
+
+CSV_FIELDS = (
+    'page_url', 'status', 'error', 'src', 'image_id', 'occurrences', 'alt', 'alt_exists', 'alt_empty', 'too_long', 'too_short',
+    'placeholder', 'filename', 'ai_matched', 'ai_total', 'ai_labels', 'suggestions',
+)
+
+
+# --- Avoti: katrs mērķis ir (lapas URL, HTML faila ceļš vai None) ---
+
+def iter_url_list(lines):
+    """Atgriež mērķus no URL saraksta (viens URL rindā; tukšas rindas un # komentāri tiek izlaisti)."""
+    for line in lines:
+        url = line.strip()
+        if url and not url.startswith('#'):
+            yield url, None
+
+
+def iter_sitemap_targets(sitemap_url, settings=None):
+    """Atgriež mērķus no vietnes kartes; settings - AnalyzerSettings (skat. iter_sitemap_urls)."""
+    for url in iter_sitemap_urls([sitemap_url], settings):
+        yield url, None
+
+
+def iter_html_files(directory, base_url=None):
+    """
+    Atgriež mērķus no mapes ar saglabātiem HTML failiem (rekursīvi, sakārtoti).
+    Relatīvās attēlu adreses tiek atrisinātas pret base_url + faila relatīvo ceļu,
+    ja base_url nav norādīts - pret faila file:// adresi (tad Vision analīze nav iespējama).
+    """
+    root = Path(directory).resolve()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if not filename.lower().endswith(HTML_EXTENSIONS):
+                continue
+            path = Path(dirpath) / filename
+            if base_url:
+                page_url = urljoin(base_url.rstrip('/') + '/', path.relative_to(root).as_posix())
+            else:
+                page_url = path.as_uri()
+            yield page_url, str(path)
+
+
+# --- Analīze ---
+
+def audit_target(page_url, path=None, selected_language='lv', with_timings=False):
+    """
+    Analizē vienu lapu (URL vai saglabātu HTML failu) un atgriež tās pārskatu:
+    analyze_page rezultāts ar 'status' ('ok', 'skipped' vai 'error') un 'error'.
+    with_timings - pievienot 'timings' ar analīzes posmu ilgumiem (skat. RequestTimings).
+    Jāizsauc aplikācijas kontekstā; pieprasījuma konteksts nav vajadzīgs.
+    """
+    if with_timings:
+        with collect_timings() as timings:
+            report = audit_target(page_url, path, selected_language)
+        report['timings'] = timings.as_dict()
+        return report
+
+    report = {'url': page_url}
+    if path is not None:
+        report['file'] = path
+    try:
+        if path is None:
+            url_error = validate_page_url(page_url)
+            if url_error:
+                report.update(status='error', error=url_error)
+                return report
+            page_analysis = analyze_page(page_url, selected_language)
+        else:
+            with open(path, 'rb') as f:
+                page_analysis = analyze_html(iter(partial(f.read, FILE_READ_CHUNK_SIZE), b''),
+                                             page_url, selected_language)
+        report.update(page_analysis)
+        report['status'] = 'ok'
+    except NotHtmlError as e:
+        report.update(status='skipped', error=str(e))
+    except requests.exceptions.RequestException as e:
+        report.update(status='error', error=describe_page_error(e, page_url, current_app.config))
+    except OSError as e:
+        report.update(status='error', error=f"Neizdevās nolasīt failu: {e}")
+    except Exception as e:
+        logger.exception(f"Neparedzēta kļūda analizējot {page_url}")
+        report.update(status='error', error=f"Neparedzēta kļūda: {e}")
+    return report
+
+
+_worker_app_context = None
+
+
+def _init_worker(config_filename):
+    """Procesu pūla darba procesa sagatavošana: sava aplikācija un pastāvīgs aplikācijas konteksts."""
+    global _worker_app_context
+    from .. import create_app
+    _worker_app_context = create_app(config_filename, start_job_queue=False).app_context()
+    _worker_app_context.push()
+
+
+def run_audit(targets, selected_language='lv', workers=None, config_filename='config.py', with_timings=False):
+    """
+    Analizē mērķus procesu pūlā un atgriež (yield) pārskatus ievades secībā.
+    targets var būt ģenerators: vienlaicīgi tiek apstrādāti ne vairāk kā 2 x workers
+    mērķi, tāpēc atmiņas patēriņš nav atkarīgs no saraksta garuma.
+    workers=1 - analīze notiek šajā procesā (pašreizējā aplikācijas kontekstā).
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for page_url, path in targets:
+            yield audit_target(page_url, path, selected_language, with_timings)
+        return
+
+    max_in_flight = workers * 2
+    target_iter = iter(targets)
+    in_flight = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config_filename,)) as executor:
+        while True:
+            target = next(target_iter, None)
+            if target is not None:
+                in_flight.append(executor.submit(audit_target, *target, selected_language, with_timings))
+            while in_flight and (target is None or len(in_flight) >= max_in_flight or in_flight[0].done()):
+                yield in_flight.popleft().result()
+            if target is None and not in_flight:
+                break
+
+
+# --- Izvade ---
+
+def write_jsonl(reports, stream):
+    """Raksta katras lapas pārskatu kā vienu JSON rindu. Atgriež apstrādāto pārskatu skaitu pēc statusa."""
+    counts = {}
+    for report in reports:
+        stream.write(json.dumps(report, ensure_ascii=False) + '\n')
+        stream.flush()
+        counts[report['status']] = counts.get(report['status'], 0) + 1
+    return counts
+
+
+def _csv_rows(report):
+    page_fields = {'page_url': report['url'], 'status': report['status'], 'error': report.get('error', '')}
+    if not report.get('results'):
+        yield page_fields
+        return
+    for result in report['results']:
+        analysis = result['analysis']
+        ai_analysis = analysis.get('ai_analysis') or {}
+        yield dict(
+            page_fields,
+            src=result['src'],
+            image_id=result.get('image_id') or '',
+            occurrences=result.get('occurrences', 1),
+            alt=result['alt'] if result['alt'] is not None else '',
+            alt_exists=analysis['exists'],
+            alt_empty=analysis['is_empty'],
+            too_long=analysis['is_too_long'],
+            too_short=analysis['is_too_short'],
+            placeholder=analysis['is_placeholder'],
+            filename=analysis['is_filename'],
+            ai_matched=ai_analysis.get('matched_phrase_count', ''),
+            ai_total=ai_analysis.get('total_phrases_compared', ''),
+            ai_labels='; '.join(ai_analysis.get('labels_for_display') or []),
+            suggestions=' | '.join(result['suggestions']),
+        )
+
+
+def write_csv(reports, stream):
+    """Raksta vienu CSV rindu katram attēlam (lapām bez attēliem - vienu rindu ar statusu)."""
+    writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS, restval='')
+    writer.writeheader()
+    counts = {}
+    for report in reports:
+        writer.writerows(_csv_rows(report))
+        stream.flush()
+        counts[report['status']] = counts.get(report['status'], 0) + 1
+    return counts
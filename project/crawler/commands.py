@@ -0,0 +1,30 @@
+import sys
+import json
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .crawler import Crawler
+
+
+@click.command('crawl')
+@click.argument('start_url')
+@click.option('--language', default='lv', help="ALT tekstu pārbaudes valoda.")
+@click.option('--max-pages', type=int, default=None, help="Maksimālais pārmeklējamo lapu skaits.")
+@click.option('--max-depth', type=int, default=None, help="Maksimālais saišu dziļums no sākuma lapas.")
+@click.option('--concurrency', type=int, default=None, help="Vienlaicīgi apstrādājamo lapu skaits.")
+@click.option('--rate-limit', type=float, default=None, help="Pieprasījumi sekundē vienam resursdatoram.")
+@click.option('--ignore-robots', is_flag=True, help="Neievērot robots.txt.")
+@click.option('--no-sitemaps', is_flag=True, help="Neizmantot sitemap.xml sākuma URL.")
+@with_appcontext
+def crawl_command(start_url, language, max_pages, max_depth, concurrency, rate_limit, ignore_robots, no_sitemaps):
+    """Pārmeklē vietni un izvada katras lapas ALT analīzi JSON Lines formātā."""
+    crawler = Crawler(
+        current_app._get_current_object(), start_url, language=language,
+        max_pages=max_pages, max_depth=max_depth, concurrency=concurrency, rate_limit=rate_limit,
+        respect_robots=False if ignore_robots else None, use_sitemaps=False if no_sitemaps else None,
+    )
+    for report in crawler.crawl():
+        sys.stdout.write(json.dumps(report, ensure_ascii=False) + '\n')
+        sys.stdout.flush()
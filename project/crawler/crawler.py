@@ -0,0 +1,240 @@
+import time
+import logging
+import threading
+import xml.etree.ElementTree as ET
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse, urljoin, urldefrag
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from ..analysis.cache import LRUCache
+from ..analysis.context import get_analyzer_settings, get_analysis_providers
+from ..analysis.fetcher import fetch_url
+from ..analysis.page import analyze_page, NotHtmlError
+
+logger = logging.getLogger(__name__)
+
+# Saites uz šādiem failiem netiek ievietotas pārmeklēšanas rindā
+SKIPPED_EXTENSIONS = (
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg', '.bmp', '.ico', '.tiff',
+    '.pdf', '.zip', '.gz', '.rar', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+    '.mp3', '.mp4', '.avi', '.mov', '.webm', '.css', '.js', '.json', '.xml',
+)
+MAX_SITEMAPS = 50
+
+
+def normalize_crawl_url(url):
+    """Noņem fragmentu un normalizē shēmu/resursdatoru, lai vienu lapu nepārmeklētu divreiz."""
+    url, _ = urldefrag(url.strip())
+    parsed = urlparse(url)
+    path = parsed.path or '/'
+    return parsed._replace(scheme=parsed.scheme.lower(), netloc=parsed.netloc.lower(), path=path).geturl()
+
+
+def iter_sitemap_urls(sitemap_urls, settings=None):
+    """
+    Atgriež (yield) lapu URL no vietnes kartēm; sitemapindex kartes tiek atvērtas rekursīvi
+    (ne vairāk kā MAX_SITEMAPS kartes). Nepieejamas vai bojātas kartes tiek izlaistas.
+    settings - AnalyzerSettings (HTTP sesija, taimauts un izmēra ierobežojums, skat. stream_url).
+    """
+    sitemaps = deque(sitemap_urls)
+    visited = set()
+    while sitemaps and len(visited) < MAX_SITEMAPS:
+        sitemap_url = sitemaps.popleft()
+        if sitemap_url in visited:
+            continue
+        visited.add(sitemap_url)
+        try:
+            response = fetch_url(sitemap_url, settings=settings)
+            if response.status_code >= 400:
+                continue
+            root = ET.fromstring(response.content)
+        except (requests.exceptions.RequestException, ET.ParseError) as e:
+            logger.info(f"Neizdevās nolasīt vietnes karti {sitemap_url}: {e}")
+            continue
+        for element in root.iter():
+            if not element.tag.endswith('loc') or not element.text:
+                continue
+            loc = element.text.strip()
+            if root.tag.endswith('sitemapindex'):
+                sitemaps.append(loc)
+            else:
+                yield loc
+
+
+class HostRateLimiter:
+    """Ierobežo pieprasījumu biežumu katram resursdatoram atsevišķi."""
+
+    def __init__(self, requests_per_second=0):
+        self.interval = 1.0 / requests_per_second if requests_per_second and requests_per_second > 0 else 0.0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host, min_interval=0.0):
+        interval = max(self.interval, min_interval or 0.0)
+        if not interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Crawler:
+    """
+    Vietnes pārmeklētājs, kas izmanto to pašu lapas ielādes un analyze_image_alt ceļu
+    kā vienas lapas analīze. Ir deduplicēta URL rinda, tās pašas izcelsmes un dziļuma
+    ierobežojumi, robots.txt ievērošana un sitemap.xml sākuma URL, kā arī paralēla
+    lapu apstrāde ar pieprasījumu biežuma ierobežojumu katram resursdatoram.
+    Attēlu analīzes rezultāti tiek atkārtoti izmantoti visās pārmeklētajās lapās.
+    """
+
+    def __init__(self, app, start_url, language='lv', max_pages=None, max_depth=None,
+                 concurrency=None, rate_limit=None, same_origin=True, respect_robots=None,
+                 use_sitemaps=None):
+        config = app.config
+        self.app = app
+        self.settings = get_analyzer_settings(app)
+        self.providers = get_analysis_providers(app)
+        self.start_url = normalize_crawl_url(start_url)
+        self.language = language
+        self.max_pages = max_pages if max_pages is not None else config.get('CRAWL_MAX_PAGES', 500)
+        self.max_depth = max_depth if max_depth is not None else config.get('CRAWL_MAX_DEPTH', 3)
+        self.concurrency = max(1, concurrency if concurrency is not None else config.get('CRAWL_CONCURRENCY', 4))
+        self.same_origin = same_origin
+        self.respect_robots = respect_robots if respect_robots is not None else config.get('CRAWL_RESPECT_ROBOTS', True)
+        self.use_sitemaps = use_sitemaps if use_sitemaps is not None else config.get('CRAWL_USE_SITEMAPS', True)
+        self.user_agent = config.get('USER_AGENT') or '*'
+        self.rate_limiter = HostRateLimiter(
+            rate_limit if rate_limit is not None else config.get('CRAWL_HOST_RATE_LIMIT', 2.0)
+        )
+        self.result_cache = LRUCache(config.get('CRAWL_IMAGE_RESULT_CACHE_SIZE', 10000))
+
+        parsed = urlparse(self.start_url)
+        self.origin = (parsed.scheme, parsed.netloc)
+        self._robots = {}
+        self.seen = set()
+        self.frontier = deque()
+
+    # --- Filtri ---
+
+    def is_allowed(self, url):
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https'):
+            return False
+        if self.same_origin and (parsed.scheme, parsed.netloc) != self.origin:
+            return False
+        if parsed.path.lower().endswith(SKIPPED_EXTENSIONS):
+            return False
+        if self.respect_robots:
+            robots = self._get_robots(parsed)
+            if robots is not None and not robots.can_fetch(self.user_agent, url):
+                logger.debug(f"robots.txt aizliedz: {url}")
+                return False
+        return True
+
+    def _get_robots(self, parsed):
+        """
+        robots.txt resursdatoram (vai None, ja to neizdevās ielādēt); katrs tiek ielādēts vienreiz.
+        Izsauc tikai galvenais pavediens (URL rindas filtri), tāpēc slēdzene nav vajadzīga;
+        darba pavedieni tikai nolasa jau ielādētos (skat. _crawl_delay).
+        """
+        key = (parsed.scheme, parsed.netloc)
+        if key not in self._robots:
+            self._robots[key] = self._fetch_robots(parsed)
+        return self._robots[key]
+
+    def _fetch_robots(self, parsed):
+        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+        robots = RobotFileParser(robots_url)
+        try:
+            response = fetch_url(robots_url, settings=self.settings)
+            if response.status_code in (401, 403):
+                robots.disallow_all = True
+            elif response.status_code >= 400:
+                robots.allow_all = True
+            else:
+                robots.parse(response.text.splitlines())
+        except requests.exceptions.RequestException as e:
+            logger.info(f"Neizdevās ielādēt robots.txt ({robots_url}): {e}")
+            robots = None
+        return robots
+
+    def _crawl_delay(self, url):
+        if not self.respect_robots:
+            return 0.0
+        robots = self._robots.get(tuple(urlparse(url)[:2]))
+        delay = robots.crawl_delay(self.user_agent) if robots is not None else None
+        return float(delay) if delay else 0.0
+
+    # --- Sākuma URL ---
+
+    def _sitemap_urls(self):
+        """Savāc lapu URL no robots.txt norādītajām kartēm vai /sitemap.xml."""
+        parsed = urlparse(self.start_url)
+        robots = self._get_robots(parsed) if self.respect_robots else None
+        sitemaps = (robots.site_maps() if robots is not None else None) or \
+            [f"{parsed.scheme}://{parsed.netloc}/sitemap.xml"]
+        page_urls = list(islice(iter_sitemap_urls(sitemaps, self.settings), self.max_pages))
+        logger.info(f"No vietnes kartēm iegūti {len(page_urls)} URL.")
+        return page_urls
+
+    def _enqueue(self, url, depth):
+        url = normalize_crawl_url(url)
+        if url in self.seen or not self.is_allowed(url):
+            return
+        self.seen.add(url)
+        self.frontier.append((url, depth))
+
+    # --- Pārmeklēšana ---
+
+    def _process_page(self, url, depth):
+        self.rate_limiter.wait(urlparse(url).netloc, self._crawl_delay(url))
+        links = [] if depth < self.max_depth else None
+        report = {'url': url, 'depth': depth}
+        try:
+            page_analysis = analyze_page(url, self.language, links=links, result_cache=self.result_cache,
+                                         settings=self.settings, providers=self.providers)
+            report.update(page_analysis)
+            report['status'] = 'ok'
+        except NotHtmlError as e:
+            report.update(status='skipped', error=str(e))
+        except requests.exceptions.RequestException as e:
+            report.update(status='error', error=f"Tīkla pieprasījuma kļūda: {e}")
+        except Exception as e:
+            logger.exception(f"Neparedzēta kļūda pārmeklējot {url}")
+            report.update(status='error', error=f"Neparedzēta kļūda: {e}")
+        return report, links or []
+
+    def crawl(self):
+        """Pārmeklē vietni un atgriež (yield) katras lapas pārskatu, tiklīdz tā ir apstrādāta."""
+        self._enqueue(self.start_url, 0)
+        if self.use_sitemaps:
+            for url in self._sitemap_urls():
+                self._enqueue(url, 0)
+
+        started = 0
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while self.frontier or pending:
+                while self.frontier and len(pending) < self.concurrency and started < self.max_pages:
+                    url, depth = self.frontier.popleft()
+                    pending[executor.submit(self._process_page, url, depth)] = (url, depth)
+                    started += 1
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, depth = pending.pop(future)
+                    report, links = future.result()
+                    for link in links:
+                        self._enqueue(urljoin(url, link), depth + 1)
+                    yield report
+
+        logger.info(f"Pārmeklēšana pabeigta: {started} lapas, {len(self.seen)} atrasti URL.")
@@ -0,0 +1,133 @@
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from werkzeug.utils import import_string
+
+from ..analysis.page import analyze_page, describe_page_error, NotHtmlError
+from ..analysis.pipeline import split_language_key
+from ..analysis.summary import ResultSummary
+
+logger = logging.getLogger(__name__)
+
+_queue_lock = threading.Lock()
+
+
+class JobQueue:
+    """
+    Procesa iekšēja analīzes darbu rinda. Darbi tiek izpildīti fona pavedienos,
+    progress un daļējie rezultāti tiek rakstīti glabātuvē, tāpēc tos var nolasīt
+    jebkurā brīdī un pēc restartēšanas nepabeigtie darbi tiek atsākti.
+    """
+
+    def __init__(self, app, store, workers=2, flush_size=16, stale_after=600):
+        self.app = app
+        self.store = store
+        self.flush_size = max(1, int(flush_size))
+        self.stale_after = stale_after
+        self.executor = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix='alt-job')
+
+    def submit(self, url, language):
+        """Ievieto darbu rindā un atgriež tā ierakstu."""
+        job = self.store.create_job(url, language)
+        self.executor.submit(self._run, job['id'])
+        logger.info(f"Darbs {job['id']} ievietots rindā: {url} ({language})")
+        return job
+
+    def resume(self):
+        """Atsāk rindā esošos un pārtrauktos darbus (piem., pēc restartēšanas)."""
+        job_ids = self.store.requeue_stale_jobs(self.stale_after)
+        for job_id in job_ids:
+            self.executor.submit(self._run, job_id)
+        if job_ids:
+            logger.info(f"Atsākti {len(job_ids)} nepabeigti darbi.")
+        return job_ids
+
+    def stats(self):
+        return self.store.count_by_status()
+
+    def _run(self, job_id):
+        if not self.store.claim_job(job_id):
+            return
+        job = self.store.get_job(job_id)
+        buffer = []
+        summary = ResultSummary()
+        state = {'saved': 0, 'done': 0, 'found': 0}
+
+        def flush():
+            self.store.append_results(job_id, state['saved'], buffer)
+            state['saved'] += len(buffer)
+            buffer.clear()
+            self.store.update_progress(job_id, state['done'], state['found'], summary.as_dict())
+
+        def on_result(result, images_done, images_found):
+            if result is not None:
+                buffer.append(result)
+                summary.add(result)
+            state['done'], state['found'] = images_done, images_found
+            if len(buffer) >= self.flush_size or images_done % self.flush_size == 0:
+                flush()
+
+        logger.info(f"Sākam darbu {job_id}: {job['url']}")
+        with self.app.app_context():
+            try:
+                languages = split_language_key(job['language'])
+                analyze_page(job['url'], languages[0], on_result=on_result, use_page_cache=True,
+                             languages=languages)
+                flush()
+                self.store.finish_job(job_id)
+                logger.info(f"Darbs {job_id} pabeigts: {state['saved']} rezultāti.")
+            except Exception as e:
+                # Daļējo rezultātu saglabāšana ir neobligāta: ja kļūda bija pašā glabātuvē, arī tā
+                # var neizdoties, bet darbam tik un tā jātiek atzīmētam kā neizdevušamies
+                try:
+                    flush()
+                except Exception:
+                    logger.exception(f"Darba {job_id} daļējos rezultātus neizdevās saglabāt")
+                error_message = describe_page_error(e, job['url'], self.app.config)
+                expected = isinstance(e, (NotHtmlError, requests.exceptions.RequestException))
+                logger.error(f"Darbs {job_id} neizdevās: {error_message}", exc_info=not expected)
+                self.store.finish_job(job_id, error=error_message)
+
+
+def get_job_store(app):
+    """
+    Atgriež aplikācijas darbu un saglabāto analīžu glabātuvi (JOB_STORE_BACKEND) bez darbu rindas
+    (fona pavedieni netiek palaisti); katram procesam (arī pēc fork) tiek izveidota sava.
+    """
+    entry = app.extensions.get('job_store')
+    if entry is None or entry[0] != os.getpid():
+        with _queue_lock:
+            entry = app.extensions.get('job_store')
+            if entry is None or entry[0] != os.getpid():
+                store_class = import_string(app.config.get('JOB_STORE_BACKEND', 'project.jobs.store.SQLiteJobStore'))
+                entry = (os.getpid(), store_class.from_config(app.config))
+                app.extensions['job_store'] = entry
+    return entry[1]
+
+
+def get_job_queue(app):
+    """
+    Atgriež aplikācijas darbu rindu; katram procesam (arī pēc fork) tiek izveidota sava un
+    tajā tiek atsākti nepabeigtie darbi. Tiek izveidota, startējot aplikāciju (skat. create_app,
+    JOB_QUEUE_ON_STARTUP), vai pirmajā darbu pieprasījumā.
+    """
+    entry = app.extensions.get('job_queue')
+    if entry is None or entry[0] != os.getpid():
+        store = get_job_store(app)
+        with _queue_lock:
+            entry = app.extensions.get('job_queue')
+            if entry is None or entry[0] != os.getpid():
+                config = app.config
+                queue = JobQueue(
+                    app, store,
+                    workers=config.get('JOB_WORKERS', 2),
+                    flush_size=config.get('JOB_PROGRESS_FLUSH_SIZE', 16),
+                    stale_after=config.get('JOB_STALE_AFTER', 600),
+                )
+                entry = (os.getpid(), queue)
+                app.extensions['job_queue'] = entry
+                queue.resume()
+    return entry[1]
@@ -0,0 +1,51 @@
+from flask import jsonify, request, current_app, url_for
+
+from . import jobs_bp
+from .queue import get_job_queue, get_job_store
+from .store import KIND_JOB
+from ..analysis.page import validate_page_url, validate_languages, parse_languages
+from ..analysis.pipeline import resolve_languages, language_key
+from ..analysis.summary import RESULT_FILTERS, filter_flag
+
+
+@jobs_bp.route('/jobs', methods=['POST'])
+def create_job():
+    data = request.get_json(silent=True) or request.form
+    page_url = (data.get('url') or '').strip()
+    selected_language = data.get('language', 'lv')
+    extra_languages = data.getlist('languages') if hasattr(data, 'getlist') else data.get('languages')
+    languages = resolve_languages(selected_language, parse_languages(extra_languages))
+
+    error_message = validate_page_url(page_url)
+    if not error_message:
+        error_message = validate_languages(languages, current_app.config.get('SUPPORTED_LANGUAGES', {}))
+    if error_message:
+        return jsonify({'error': error_message}), 400
+
+    # Darba valoda glabātuvē ir valodu kopas atslēga, piem., 'lv+en'
+    job = get_job_queue(current_app._get_current_object()).submit(page_url, language_key(languages))
+    status_url = url_for('jobs.get_job', job_id=job['id'])
+    return jsonify({'job_id': job['id'], 'status': job['status'], 'status_url': status_url}), 202, {'Location': status_url}
+
+
+@jobs_bp.route('/jobs', methods=['GET'])
+def queue_stats():
+    return jsonify(get_job_store(current_app._get_current_object()).count_by_status())
+
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    store = get_job_store(current_app._get_current_object())
+    job = store.get_job(job_id)
+    # Saglabātās rezultātu lapu analīzes nav darbi
+    if job is None or job['kind'] != KIND_JOB:
+        return jsonify({'error': "Darbs nav atrasts."}), 404
+
+    flags = filter_flag(request.args.get('filter'))
+    if flags is None:
+        return jsonify({'error': f"Nezināms filtrs; iespējamie: {', '.join(RESULT_FILTERS)}."}), 400
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', current_app.config.get('JOB_RESULTS_PAGE_SIZE', 100), type=int)
+    job['results'] = store.get_results(job_id, offset=max(0, offset), limit=max(0, limit), flags=flags)
+    job['results_offset'] = max(0, offset)
+    return jsonify(job)
@@ -0,0 +1,249 @@
+import json
+import time
+import uuid
+from abc import ABC, abstractmethod
+
+from ..analysis.cache import SQLiteStore
+from ..analysis.summary import result_flags
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+# Ierakstu veidi: fona darbs (POST /jobs) vai saglabāta rezultātu lapas analīze (save_analysis)
+KIND_JOB = 'job'
+KIND_REPORT = 'report'
+
+
+def report_summary(page_analysis):
+    """Saglabājamās lapas analīzes kopsavilkums: filtru skaiti (skat. analysis.summary) un unikālo attēlu skaits."""
+    return dict(page_analysis.get('summary') or {}, unique_images=page_analysis.get('unique_image_count'))
+
+
+class JobStore(ABC):
+    """
+    Analīzes darbu glabātuves saskarne. Citu glabātuvi var pievienot, realizējot
+    šīs metodes un norādot klasi konfigurācijā JOB_STORE_BACKEND.
+    """
+
+    @classmethod
+    @abstractmethod
+    def from_config(cls, config):
+        pass
+
+    @abstractmethod
+    def create_job(self, url, language):
+        """Izveido darbu statusā 'queued' un atgriež to kā vārdnīcu."""
+
+    @abstractmethod
+    def claim_job(self, job_id):
+        """Atomāri pārslēdz darbu no 'queued' uz 'running'; atgriež False, ja to jau paņēmis cits."""
+
+    @abstractmethod
+    def update_progress(self, job_id, images_done, images_total, summary=None):
+        """Saglabā progresu un (ja norādīts) rezultātu kopsavilkumu (skat. analysis.summary)."""
+
+    @abstractmethod
+    def append_results(self, job_id, start_index, results):
+        pass
+
+    @abstractmethod
+    def finish_job(self, job_id, error=None):
+        pass
+
+    @abstractmethod
+    def get_job(self, job_id):
+        pass
+
+    @abstractmethod
+    def get_results(self, job_id, offset=0, limit=None, flags=0):
+        """Rezultāti dokumenta secībā; flags - tikai rezultāti ar visiem šiem karogiem (summary.FLAG_*)."""
+
+    @abstractmethod
+    def save_analysis(self, url, language, page_analysis):
+        """
+        Saglabā jau pabeigtu lapas analīzi (rezultātu lapošanai) vienā transakcijā kā 'report'
+        veida ierakstu: darbu rinda, statistika un darbu API to neredz; atgriež ieraksta id.
+        """
+
+    @abstractmethod
+    def purge_finished(self, older_than, kind=KIND_JOB):
+        """
+        Dzēš kind veida pabeigtos un neizdevušos ierakstus (ar rezultātiem), kas pēdējo reizi
+        mainīti pirms older_than sekundēm; atgriež dzēsto skaitu.
+        """
+
+    @abstractmethod
+    def requeue_stale_jobs(self, stale_after):
+        """Atgriež rindā darbus, kuru izpilde pārtrūka (piem., restartējot), un atgriež rindā esošo darbu id."""
+
+    @abstractmethod
+    def count_by_status(self):
+        """Fona darbu (bez saglabātajām analīzēm) skaits pēc statusa."""
+
+
+class SQLiteJobStore(SQLiteStore, JobStore):
+    """Noklusējuma darbu glabātuve SQLite failā; darbi saglabājas pēc restartēšanas."""
+
+    JOB_FIELDS = ('id', 'kind', 'url', 'language', 'status', 'images_done', 'images_total',
+                  'results_count', 'error', 'summary', 'created_at', 'updated_at')
+
+    # Cik bieži (sekundēs) katra veida veci ieraksti tiek dzēsti
+    PURGE_INTERVAL = 60
+
+    def __init__(self, path, job_retention=None, report_retention=None):
+        super().__init__(path)
+        self.retention = {KIND_JOB: job_retention, KIND_REPORT: report_retention}
+        self._last_purge = dict.fromkeys(self.retention, 0.0)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.get('JOB_STORE_PATH'), job_retention=config.get('JOB_RETENTION'),
+                   report_retention=config.get('RESULTS_RETENTION'))
+
+    def init_schema(self, conn):
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            f" id TEXT PRIMARY KEY, kind TEXT NOT NULL DEFAULT '{KIND_JOB}', url TEXT NOT NULL, language TEXT NOT NULL,"
+            ' status TEXT NOT NULL,'
+            ' images_done INTEGER NOT NULL DEFAULT 0, images_total INTEGER NOT NULL DEFAULT 0,'
+            ' results_count INTEGER NOT NULL DEFAULT 0, error TEXT,'
+            ' created_at REAL NOT NULL, updated_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS job_results ('
+            ' job_id TEXT NOT NULL, idx INTEGER NOT NULL, payload TEXT NOT NULL,'
+            ' flags INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (job_id, idx))'
+        )
+        # Iepriekšējo versiju datubāzēm trūkstošās kolonnas
+        job_columns = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+        if 'summary' not in job_columns:
+            conn.execute('ALTER TABLE jobs ADD COLUMN summary TEXT')
+        if 'kind' not in job_columns:
+            conn.execute(f"ALTER TABLE jobs ADD COLUMN kind TEXT NOT NULL DEFAULT '{KIND_JOB}'")
+        conn.execute('CREATE INDEX IF NOT EXISTS jobs_kind_status ON jobs (kind, status, updated_at)')
+        if 'flags' not in {row[1] for row in conn.execute('PRAGMA table_info(job_results)')}:
+            conn.execute('ALTER TABLE job_results ADD COLUMN flags INTEGER NOT NULL DEFAULT 0')
+
+    def create_job(self, url, language):
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self.connection() as conn:
+            conn.execute(
+                'INSERT INTO jobs (id, url, language, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, url, language, JOB_QUEUED, now, now)
+            )
+        return self.get_job(job_id)
+
+    def claim_job(self, job_id):
+        with self.connection() as conn:
+            claimed = conn.execute(
+                'UPDATE jobs SET status = ?, updated_at = ? WHERE id = ? AND status = ?',
+                (JOB_RUNNING, time.time(), job_id, JOB_QUEUED)
+            ).rowcount
+            if claimed:
+                # Iepriekšējas (pārtrauktas) izpildes daļējie rezultāti tiek dzēsti
+                conn.execute('DELETE FROM job_results WHERE job_id = ?', (job_id,))
+                conn.execute('UPDATE jobs SET images_done = 0, images_total = 0, results_count = 0, summary = NULL WHERE id = ?',
+                             (job_id,))
+        return bool(claimed)
+
+    def save_analysis(self, url, language, page_analysis):
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        results = page_analysis['results']
+        with self.connection() as conn:
+            conn.execute(
+                'INSERT INTO jobs (id, kind, url, language, status, images_done, images_total, results_count, summary,'
+                ' created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (job_id, KIND_REPORT, url, language, JOB_DONE, page_analysis['image_count'],
+                 page_analysis['image_count'], len(results), json.dumps(report_summary(page_analysis)), now, now)
+            )
+            conn.executemany(
+                'INSERT INTO job_results (job_id, idx, payload, flags) VALUES (?, ?, ?, ?)',
+                [(job_id, i, json.dumps(result, ensure_ascii=False), result_flags(result))
+                 for i, result in enumerate(results)]
+            )
+        self._purge_expired(KIND_REPORT, now)
+        return job_id
+
+    def _purge_expired(self, kind, now):
+        """Ne biežāk kā reizi PURGE_INTERVAL sekundēs dzēš kind ierakstus, kas vecāki par to glabāšanas laiku."""
+        retention = self.retention[kind]
+        if retention and now - self._last_purge[kind] >= self.PURGE_INTERVAL:
+            self._last_purge[kind] = now
+            self.purge_finished(retention, kind)
+
+    def purge_finished(self, older_than, kind=KIND_JOB):
+        with self.connection() as conn:
+            job_ids = [row[0] for row in conn.execute(
+                'SELECT id FROM jobs WHERE kind = ? AND status IN (?, ?) AND updated_at < ?',
+                (kind, JOB_DONE, JOB_FAILED, time.time() - older_than)
+            )]
+            conn.executemany('DELETE FROM job_results WHERE job_id = ?', [(job_id,) for job_id in job_ids])
+            conn.executemany('DELETE FROM jobs WHERE id = ?', [(job_id,) for job_id in job_ids])
+        return len(job_ids)
+
+    def update_progress(self, job_id, images_done, images_total, summary=None):
+        with self.connection() as conn:
+            conn.execute(
+                'UPDATE jobs SET images_done = ?, images_total = ?, summary = COALESCE(?, summary), updated_at = ?'
+                ' WHERE id = ?',
+                (images_done, images_total, json.dumps(summary) if summary is not None else None, time.time(), job_id)
+            )
+
+    def append_results(self, job_id, start_index, results):
+        if not results:
+            return
+        with self.connection() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO job_results (job_id, idx, payload, flags) VALUES (?, ?, ?, ?)',
+                [(job_id, start_index + i, json.dumps(result, ensure_ascii=False), result_flags(result))
+                 for i, result in enumerate(results)]
+            )
+            conn.execute('UPDATE jobs SET results_count = ? WHERE id = ?', (start_index + len(results), job_id))
+
+    def finish_job(self, job_id, error=None):
+        now = time.time()
+        with self.connection() as conn:
+            conn.execute(
+                'UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?',
+                (JOB_FAILED if error else JOB_DONE, error, now, job_id)
+            )
+        self._purge_expired(KIND_JOB, now)
+
+    def get_job(self, job_id):
+        with self.connection() as conn:
+            row = conn.execute(f'SELECT {", ".join(self.JOB_FIELDS)} FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(self.JOB_FIELDS, row))
+        job['summary'] = json.loads(job['summary']) if job['summary'] else None
+        return job
+
+    def get_results(self, job_id, offset=0, limit=None, flags=0):
+        with self.connection() as conn:
+            rows = conn.execute(
+                'SELECT payload FROM job_results WHERE job_id = ? AND flags & ? = ? ORDER BY idx LIMIT ? OFFSET ?',
+                (job_id, flags, flags, -1 if limit is None else limit, offset)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def requeue_stale_jobs(self, stale_after):
+        with self.connection() as conn:
+            conn.execute(
+                'UPDATE jobs SET status = ? WHERE kind = ? AND status = ? AND updated_at < ?',
+                (JOB_QUEUED, KIND_JOB, JOB_RUNNING, time.time() - stale_after)
+            )
+            rows = conn.execute('SELECT id FROM jobs WHERE kind = ? AND status = ? ORDER BY created_at',
+                                (KIND_JOB, JOB_QUEUED)).fetchall()
+        return [row[0] for row in rows]
+
+    def count_by_status(self):
+        with self.connection() as conn:
+            rows = conn.execute('SELECT status, COUNT(*) FROM jobs WHERE kind = ? GROUP BY status', (KIND_JOB,)).fetchall()
+        counts = dict.fromkeys((JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED), 0)
+        counts.update(rows)
+        return counts
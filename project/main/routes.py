@@ -1,96 +1,125 @@
+import math
+
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse, urljoin
-from flask import render_template, request, current_app
+from flask import render_template, request, current_app, make_response, abort, url_for
 
 from . import main_bp
-from ..analysis.analyzer import analyze_image_alt, is_svg_file
+from ..analysis.page import analyze_page, describe_page_error, validate_page_url, validate_languages, NotHtmlError
+from ..analysis.pipeline import resolve_languages, language_key, split_language_key
+from ..analysis.summary import filter_flag
+from ..jobs.queue import get_job_store
+from ..jobs.store import JOB_DONE, report_summary
+from ..metrics import collect_timings, stage_timer
+
+
+def _get_report(store, report_id):
+    """Saglabātā analīze (pabeigts darbs) vai None."""
+    report = store.get_job(report_id) if report_id else None
+    return report if report is not None and report['status'] == JOB_DONE else None
+
 
 @main_bp.route('/', methods=['GET', 'POST'])
 def index():
+    report = None
     results = None
     error_message = None
     submitted_url = ""
     selected_language = 'lv'
+    extra_languages = []
 
     config = current_app.config
-    user_agent = config.get('USER_AGENT')
-    request_timeout = config.get('REQUEST_TIMEOUT')
-
-    if request.method == 'POST':
-        page_url = request.form.get('url', '').strip()
-        selected_language = request.form.get('language', 'lv')
-        submitted_url = page_url
+    store = get_job_store(current_app._get_current_object())
+    page_size = max(1, config.get('RESULTS_PAGE_SIZE', 50))
+    active_filter = request.args.get('filter', 'all')
+    if filter_flag(active_filter) is None:
+        active_filter = 'all'
+    page = max(1, request.args.get('page', 1, type=int))
+    page_count = 1
+    offset = 0
+    # Posmu laika sadalījums: rezultātu lapā (bez veidnes renderēšanas) un Server-Timing galvenē
+    show_timings = config.get('SHOW_REQUEST_TIMINGS') or request.values.get('timings') == '1'
 
-        if page_url:
-            parsed_uri = urlparse(page_url)
-            if not parsed_uri.scheme in ['http', 'https']:
-                 error_message = "URL jāsākas ar http:// vai https://."
-                 current_app.logger.warning(f"Nederīga URL shēma: {page_url}")
-                 return render_template('index.html', results=None, error=error_message, submitted_url=submitted_url, selected_language=selected_language)
+    with collect_timings() as timings:
+        report_id = request.args.get('report')
+        if request.method == 'POST':
+            report_id = None
+            page_url = request.form.get('url', '').strip()
+            selected_language = request.form.get('language', 'lv')
+            # Papildu valodas tiek pārbaudītas tajā pašā gājienā ar vienu MI analīzi katram attēlam
+            extra_languages = request.form.getlist('languages')
+            languages = resolve_languages(selected_language, extra_languages)
+            submitted_url = page_url
 
-            current_app.logger.info(f"Analizējam URL: {page_url} valodai: {selected_language}")
-            try:
-                headers = {'User-Agent': user_agent}
-                response = requests.get(page_url, headers=headers, timeout=request_timeout, allow_redirects=True)
-                response.raise_for_status()
-
-                content_type = response.headers.get('content-type', '').lower()
-                if 'text/html' not in content_type:
-                    error_message = f"Saturs nav HTML (Tips: {content_type})."
-                    current_app.logger.warning(f"Nederīgs satura tips {content_type} no {page_url}")
-                    return render_template('index.html', results=None, error=error_message, submitted_url=submitted_url, selected_language=selected_language)
-
-                soup = BeautifulSoup(response.text, 'html.parser')
-                img_tags = soup.find_all('img')
-                current_app.logger.info(f"Atrasti {len(img_tags)} <img> tagi.")
-
-                results = []
-                svg_count = 0
-                empty_src_count = 0
-                
-                for img in img_tags:
-                    # Analizējam attēlu, funkcija atgriež None, ja tas jāizlaiž
-                    image_analysis_data = analyze_image_alt(img, page_url, selected_language)
-                    
-                    if image_analysis_data is not None:
-                        results.append(image_analysis_data)
+            error_message = validate_page_url(page_url)
+            if error_message:
+                current_app.logger.warning(f"Nederīgs URL: '{page_url}'")
+            else:
+                error_message = validate_languages(languages, config.get('SUPPORTED_LANGUAGES', {}))
+            if not error_message:
+                current_app.logger.info(f"Analizējam URL: {page_url} valodām: {', '.join(languages)}")
+                page_analysis = None
+                try:
+                    page_analysis = analyze_page(page_url, selected_language, use_page_cache=True,
+                                                 languages=languages)
+                except Exception as e:
+                    error_message = describe_page_error(e, page_url, config)
+                    if isinstance(e, (NotHtmlError, requests.exceptions.RequestException)):
+                        current_app.logger.error(f"Neizdevās analizēt {page_url}: {error_message}")
                     else:
-                        # Pārbaudām, kāpēc tas tika izlaists
-                        src = img.get('src', '')
-                        if not src or src.strip() == '':
-                            empty_src_count += 1
-                        elif src and is_svg_file(urljoin(page_url, src)):
-                            svg_count += 1
+                        current_app.logger.exception(f"Neparedzēta kļūda apstrādājot {page_url}")
+                if page_analysis is not None:
+                    # Rezultāti tiek saglabāti, lai tos varētu rādīt pa lapām un filtrēt serverī
+                    try:
+                        with stage_timer('store'):
+                            report_id = store.save_analysis(page_url, language_key(languages), page_analysis)
+                    except Exception:
+                        # Glabātuve nav pieejama - rezultāti tiek parādīti uzreiz visi, bez lapošanas
+                        current_app.logger.exception(f"Neizdevās saglabāt {page_url} analīzi, rezultāti netiek lapoti")
+                        report = {'id': None, 'url': page_url, 'language': language_key(languages),
+                                  'status': JOB_DONE, 'summary': report_summary(page_analysis)}
+                        results = page_analysis['results']
+                        active_filter = 'all'
+
+        if report_id and not error_message:
+            report = _get_report(store, report_id)
+            if report is None:
+                error_message = "Analīzes rezultāti nav atrasti. Lūdzu, analizējiet lapu vēlreiz."
+            else:
+                submitted_url = report['url']
+                selected_language, *extra_languages = split_language_key(report['language'])
+                matching = (report['summary'] or {}).get(active_filter, 0)
+                page_count = max(1, math.ceil(matching / page_size))
+                page = min(page, page_count)
+                offset = (page - 1) * page_size
+                results = store.get_results(report_id, offset=offset, limit=page_size,
+                                            flags=filter_flag(active_filter))
 
-                # Informējam par izlaistajiem
-                if svg_count > 0 or empty_src_count > 0:
-                    current_app.logger.info(f"Izlaisti {svg_count} SVG attēli un {empty_src_count} attēli bez src")
+        stage_timings = timings.as_dict() if show_timings and request.method == 'POST' else None
+        with stage_timer('render'):
+            response = make_response(render_template(
+                'index.html', report=report, results=results, error=error_message, submitted_url=submitted_url,
+                selected_language=selected_language, extra_languages=extra_languages, active_filter=active_filter, page=page,
+                page_count=page_count, offset=offset, show_timings=show_timings, timings=stage_timings))
+        if show_timings:
+            response.headers['Server-Timing'] = timings.server_timing()
+    return response
 
-            except requests.exceptions.Timeout:
-                error_message = f"Vaicājuma laiks ({request_timeout}s) pārsniegts."
-                current_app.logger.error(f"Timeout: {page_url}")
-            except requests.exceptions.HTTPError as e:
-                status_code = e.response.status_code if e.response is not None else 'N/A'
-                error_message = f"HTTP kļūda {status_code} piekļūstot '{page_url}'."
-                if status_code == 404: error_message = f"Lapa nav atrasta (404): '{page_url}'."
-                elif status_code == 403: error_message = f"Piekļuve liegta (403): '{page_url}'."
-                current_app.logger.error(f"HTTP kļūda {status_code}: {page_url}", exc_info=False)
-            except requests.exceptions.ConnectionError:
-                 server_host = urlparse(page_url).netloc or page_url
-                 error_message = f"Neizdevās savienoties ar '{server_host}'."
-                 current_app.logger.error(f"Savienojuma kļūda: {page_url}")
-            except requests.exceptions.InvalidURL:
-                 error_message = f"Nederīgs URL formāts: '{page_url}'."
-                 current_app.logger.warning(f"Nederīgs URL: {page_url}")
-            except requests.exceptions.RequestException as e:
-                error_message = f"Tīkla pieprasījuma kļūda: {e}"
-                current_app.logger.error(f"RequestException: {page_url}", exc_info=True)
-            except Exception as e:
-                error_message = "Radās neparedzēta iekšēja kļūda."
-                current_app.logger.exception(f"Neparedzēta kļūda apstrādājot {page_url}")
 
-        elif request.method == 'POST':
-              error_message = "Lūdzu, ievadiet URL adresi."
+@main_bp.route('/reports/<report_id>/results', methods=['GET'])
+def report_results(report_id):
+    """Nākamā rezultātu daļa kā HTML saraksta elementi ("Ielādēt vēl"); X-More-Url - nākamās daļas adrese."""
+    store = get_job_store(current_app._get_current_object())
+    active_filter = request.args.get('filter') or 'all'
+    flags = filter_flag(active_filter)
+    report = _get_report(store, report_id)
+    if report is None or flags is None:
+        abort(404)
 
-    return render_template('index.html', results=results, error=error_message, submitted_url=submitted_url, selected_language=selected_language)
\ No newline at end of file
+    page_size = max(1, current_app.config.get('RESULTS_PAGE_SIZE', 50))
+    offset = max(0, request.args.get('offset', 0, type=int))
+    results = store.get_results(report_id, offset=offset, limit=page_size, flags=flags)
+    response = make_response(render_template('_result_items.html', results=results, offset=offset))
+    if offset + len(results) < (report['summary'] or {}).get(active_filter, 0):
+        response.headers['X-More-Url'] = url_for('main.report_results', report_id=report_id,
+                                                 filter=active_filter, offset=offset + len(results))
+    return response
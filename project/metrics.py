@@ -0,0 +1,218 @@
+import os
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    disable_created_metrics, generate_latest,
+)
+from prometheus_client import multiprocess
+
+# Procesa metrikas ar prometheus_client. Ja darba procesi ir vairāki (piem., gunicorn), pirms
+# to palaišanas jānorāda PROMETHEUS_MULTIPROC_DIR - tukša direktorija, kurā katrs process raksta
+# savas vērtības; /metrics tās apkopo no visiem procesiem (multiprocess režīms). gunicorn.conf.py:
+#
+#     def child_exit(server, worker):
+#         from project.metrics import mark_worker_exited
+#         mark_worker_exited(worker.pid)
+#
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Bez *_created laikrindām (multiprocess režīmā tās netiek apkopotas)
+disable_created_metrics()
+
+STAGE_DURATION = Histogram(
+    'alt_checker_stage_duration_seconds',
+    'Analīzes posmu ilgums (bez ligzdoto posmu laika).',
+    ['stage'],
+    buckets=DEFAULT_BUCKETS,
+)
+HTTP_REQUESTS = Counter('alt_checker_http_requests', 'Apstrādātie HTTP pieprasījumi.', ['endpoint', 'method', 'status'])
+HTTP_REQUEST_DURATION = Histogram('alt_checker_http_request_duration_seconds', 'HTTP pieprasījumu ilgums.', ['endpoint'],
+                                  buckets=DEFAULT_BUCKETS)
+HTTP_IN_FLIGHT = Gauge('alt_checker_http_requests_in_flight', 'Pašlaik apstrādātie HTTP pieprasījumi.',
+                       multiprocess_mode='livesum')
+PAGES_ANALYZED = Counter('alt_checker_pages_analyzed', 'Analizētās lapas pēc rezultāta.', ['outcome'])
+IMAGES_ANALYZED = Counter('alt_checker_images_analyzed', 'Analizētie attēli pēc rezultāta.', ['outcome'])
+ERRORS = Counter('alt_checker_errors', 'Kļūdas pēc posma un veida.', ['stage', 'kind'])
+CHUNKS_IN_FLIGHT = Gauge('alt_checker_image_chunks_in_flight', 'Pašlaik analizētās attēlu grupas.',
+                         multiprocess_mode='livesum')
+API_CALLS_IN_FLIGHT = Gauge('alt_checker_api_calls_in_flight', 'Pašlaik notiekošie ārējo API izsaukumi.', ['api'],
+                            multiprocess_mode='livesum')
+
+
+class CallbackCollector:
+    """prometheus_client kolektors no funkcijas, kas nolasīšanas brīdī atgriež metriku saimes (MetricFamily)."""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def collect(self):
+        return self.callback()
+
+
+def process_labels():
+    """Papildu etiķetes procesa līmeņa vērtībām: multiprocess režīmā - pid, lai dažādu procesu vērtības nesajuktu."""
+    return {'pid': str(os.getpid())} if MULTIPROCESS else {}
+
+
+def render_metrics(*callbacks):
+    """
+    Atgriež (teksts, satura tips) Prometheus ekspozīcijas formātā: reģistrētās metrikas (multiprocess
+    režīmā - apkopotas no visiem procesiem) un callbacks - funkcijas, kas atgriež metriku saimes no
+    citu komponenšu stats(), tāpēc tām nav nekādu izmaksu pieprasījumu apstrādes laikā.
+    """
+    registry = CollectorRegistry()
+    if MULTIPROCESS:
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry.register(REGISTRY)
+    for callback in callbacks:
+        registry.register(CallbackCollector(callback))
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_exited(pid):
+    """Multiprocess režīmā izmet beigušā darba procesa gauge vērtības (izsaukt no gunicorn child_exit)."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
+
+
+# --- Posmu laika uzskaite ---
+
+_stage_stack = threading.local()
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Viena pieprasījuma (vai audita lapas) posmu kopējie ilgumi un izsaukumu skaits."""
+
+    def __init__(self):
+        self._stages = {}
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            total, count = self._stages.get(stage, (0.0, 0))
+            self._stages[stage] = (total + seconds, count + 1)
+
+    def as_dict(self):
+        """{posms: {'seconds', 'count'}} un 'total' - kopējais ilgums kopš sākuma."""
+        with self._lock:
+            stages = {stage: {'seconds': round(total, 6), 'count': count}
+                      for stage, (total, count) in self._stages.items()}
+        stages['total'] = {'seconds': round(time.perf_counter() - self.started, 6), 'count': 1}
+        return stages
+
+    def server_timing(self):
+        """Server-Timing HTTP galvenes vērtība (ilgumi milisekundēs)."""
+        return ', '.join(f'{stage};dur={values["seconds"] * 1000:.1f}' for stage, values in self.as_dict().items())
+
+
+@contextmanager
+def collect_timings():
+    """Bloka izpildes laikā (arī pavedienos, kas palaisti ar copy_context) posmi tiek uzskaitīti RequestTimings."""
+    timings = RequestTimings()
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def current_timings():
+    return _request_timings.get()
+
+
+def record_stage(stage, seconds):
+    """Ieraksta posma ilgumu histogrammā un pašreizējā pieprasījuma RequestTimings (ja tāds ir)."""
+    STAGE_DURATION.labels(stage).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+def _enter_stage():
+    stack = getattr(_stage_stack, 'frames', None)
+    if stack is None:
+        stack = _stage_stack.frames = []
+    stack.append(0.0)
+    return stack
+
+
+def _exit_stage(stack, elapsed):
+    """Atgriež posma laiku bez ligzdoto posmu laika un pieskaita kopējo laiku vecākajam posmam."""
+    nested = stack.pop()
+    if stack:
+        stack[-1] += elapsed
+    return elapsed - nested
+
+
+@contextmanager
+def stage_timer(stage):
+    """Mēra bloka izpildes ilgumu kā posmu stage; ligzdoto posmu laiks tiek atskaitīts."""
+    stack = _enter_stage()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, _exit_stage(stack, time.perf_counter() - started))
+
+
+def timed_iter(iterable, stage):
+    """
+    Iterators, kas uzskaita laiku, kas pavadīts, gaidot nākamo elementu no iterable
+    (piem., tīkla lasīšana vai parsēšana), un ieraksta to kā vienu posmu, kad iterācija beidzas.
+    """
+    iterator = iter(iterable)
+    total = 0.0
+    try:
+        while True:
+            stack = _enter_stage()
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                total += _exit_stage(stack, time.perf_counter() - started)
+            yield item
+    finally:
+        record_stage(stage, total)
+
+
+# --- Procesa sagatavošanas soļu ilgumi ---
+
+# Smago moduļu ielādes un sagatavošanas ilgumi sekundēs (procesa līmenī)
+startup_timings = {}
+_startup_timings_lock = threading.Lock()
+
+
+def record_startup_timing(name, seconds):
+    with _startup_timings_lock:
+        startup_timings[name] = startup_timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def timed_startup_step(name):
+    """Mēra bloka izpildes ilgumu un saglabā to startup_timings."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        record_startup_timing(name, elapsed)
+        logger.info(f"Sagatavošanas solis '{name}' ilga {elapsed:.3f}s.")
+
+
+def get_startup_timings():
+    with _startup_timings_lock:
+        return dict(startup_timings)
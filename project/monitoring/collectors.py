@@ -0,0 +1,66 @@
+from flask import current_app
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from ..analysis.providers import get_provider_stats
+from ..jobs.queue import get_job_store
+from ..metrics import get_startup_timings, process_labels
+
+CIRCUIT_STATES = ('closed', 'open', 'half_open')
+GUARD_EVENTS = ('successes', 'failures', 'client_errors', 'retries', 'rejected', 'rate_limited', 'deadline_exceeded')
+
+_FAMILIES = {'counter': CounterMetricFamily, 'gauge': GaugeMetricFamily}
+
+
+def _family(name, kind, documentation, samples, per_process=True):
+    """
+    Metriku saime no [(etiķetes, vērtība), ...]; per_process - vērtība ir tikai šī procesa
+    (multiprocess režīmā tai tiek pievienota pid etiķete).
+    """
+    extra = process_labels() if per_process else {}
+    labelnames = list(samples[0][0]) + list(extra) if samples else list(extra)
+    family = _FAMILIES[kind](name, documentation, labels=labelnames)
+    for labels, value in samples:
+        family.add_metric([*labels.values(), *extra.values()], value)
+    return family
+
+
+def collect_provider_metrics():
+    """Google API aizsardzības, klientu pūlu un kešatmiņu skaitītāji no get_provider_stats()."""
+    stats = get_provider_stats()
+    guards = {name[:-len('_guard')]: values for name, values in stats.items() if name.endswith('_guard')}
+    pools = {name[:-len('_client_pool')]: values for name, values in stats.items() if name.endswith('_client_pool')}
+    caches = {name[:-len('_cache')]: values for name, values in stats.items() if name.endswith('_cache')}
+
+    yield _family('alt_checker_api_calls_total', 'counter',
+                  'Ārējo API izsaukumu mēģinājumi (ieskaitot atkārtojumus).',
+                  [({'api': api}, values['calls']) for api, values in guards.items()])
+    yield _family('alt_checker_api_events_total', 'counter',
+                  'Ārējo API izsaukumu iznākumi, atkārtojumi un noraidījumi.',
+                  [({'api': api, 'event': event}, values[event])
+                   for api, values in guards.items() for event in GUARD_EVENTS])
+    yield _family('alt_checker_api_rate_limit_wait_seconds_total', 'counter',
+                  'Laiks, kas pavadīts gaidot API kvotas žetonu.',
+                  [({'api': api}, values['rate_limit_wait_seconds']) for api, values in guards.items()])
+    yield _family('alt_checker_api_circuit_state', 'gauge', 'Ķēdes pārtraucēja stāvoklis (1 - pašreizējais).',
+                  [({'api': api, 'state': state}, int(values['circuit_state'] == state))
+                   for api, values in guards.items() for state in CIRCUIT_STATES])
+    yield _family('alt_checker_api_circuit_opened_total', 'counter', 'Cik reizes ķēdes pārtraucējs ir atvērts.',
+                  [({'api': api}, values['circuit_open_count']) for api, values in guards.items()])
+    yield _family('alt_checker_client_pool_clients', 'gauge',
+                  'API klientu pūla klienti (idle - brīvie, created - izveidotie).',
+                  [({'pool': pool, 'state': state}, value)
+                   for pool, values in pools.items() for state, value in values.items()])
+    yield _family('alt_checker_cache_events_total', 'counter',
+                  'Kešatmiņu trāpījumi, netrāpījumi, saglabāšanas un izmešanas.',
+                  [({'cache': cache, 'event': event}, value)
+                   for cache, values in caches.items() for event, value in values.items() if event != 'memory_entries'])
+    yield _family('alt_checker_cache_memory_entries', 'gauge', 'Ierakstu skaits kešatmiņu atmiņas slānī.',
+                  [({'cache': cache}, values['memory_entries']) for cache, values in caches.items()])
+
+def collect_app_metrics():
+    """Fona darbu rindas stāvoklis un procesa sagatavošanas soļu ilgumi (jāizsauc pieprasījuma kontekstā)."""
+    job_counts = get_job_store(current_app._get_current_object()).count_by_status()
+    yield _family('alt_checker_jobs', 'gauge', 'Fona analīzes darbi pēc statusa.',
+                  [({'status': status}, count) for status, count in job_counts.items()], per_process=False)
+    yield _family('alt_checker_startup_seconds', 'gauge', 'Procesa sagatavošanas soļu ilgums.',
+                  [({'step': step}, seconds) for step, seconds in get_startup_timings().items()])
@@ -0,0 +1,37 @@
+import time
+
+from flask import Response, g, request
+
+from . import monitoring_bp
+from .collectors import collect_provider_metrics, collect_app_metrics
+from ..metrics import HTTP_REQUESTS, HTTP_REQUEST_DURATION, HTTP_IN_FLIGHT, render_metrics
+
+
+@monitoring_bp.before_app_request
+def start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    g.metrics_in_flight = True
+    HTTP_IN_FLIGHT.inc()
+
+
+@monitoring_bp.after_app_request
+def record_request_metrics(response):
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        # Endpoint vārds, nevis ceļš, lai etiķešu vērtību skaits būtu ierobežots (piem., /jobs/<id>)
+        endpoint = request.endpoint or 'not_found'
+        HTTP_REQUEST_DURATION.labels(endpoint).observe(time.perf_counter() - started)
+        HTTP_REQUESTS.labels(endpoint, request.method, response.status_code).inc()
+    return response
+
+
+@monitoring_bp.teardown_app_request
+def finish_request_metrics(error=None):
+    if g.pop('metrics_in_flight', False):
+        HTTP_IN_FLIGHT.dec()
+
+
+@monitoring_bp.route('/metrics')
+def metrics():
+    output, content_type = render_metrics(collect_provider_metrics, collect_app_metrics)
+    return Response(output, content_type=content_type)